@@ -0,0 +1,137 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+SENSORS = ("temp", "vibration", "pressure")
+
+
+class StreamingAnomalyDetector:
+    """
+    Online per-equipment anomaly scores for temp, vibration and pressure.
+
+    Each machine keeps a fixed-size slot in compact arrays: a slow EWMA
+    mean/variance (the baseline), a fast EWMA mean (the trend), the EWMA
+    of squared residuals around the trend (sensor noise) and a count per
+    sensor. Missing (NaN / inf) sensor values leave that sensor's state
+    untouched and do not count towards its score.
+    A reading's spike score is its z-score against the baseline *before*
+    it is absorbed; the drift score is how far the fast mean has moved
+    away from the slow one, in noise standard deviations. (Normalizing
+    drift by the baseline variance would let a slow ramp inflate its own
+    yardstick and never be flagged.)
+    """
+
+    def __init__(self, alpha=0.05, fast_alpha=0.3, spike_z=4.0, drift_z=2.0, warmup=10, capacity=64):
+        self.alpha = alpha
+        self.fast_alpha = fast_alpha
+        self.spike_z = spike_z
+        self.drift_z = drift_z
+        self.warmup = warmup
+
+        self.index = {}
+        self.mean = np.zeros((capacity, len(SENSORS)))
+        self.var = np.zeros((capacity, len(SENSORS)))
+        self.fast = np.zeros((capacity, len(SENSORS)))
+        self.noise = np.zeros((capacity, len(SENSORS)))
+        self.count = np.zeros((capacity, len(SENSORS)), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _slots(self, equipment_ids):
+        codes, uniques = pd.factorize(np.asarray(equipment_ids, dtype=object))
+        slots = np.empty(len(uniques), dtype=np.int64)
+        for i, eq in enumerate(uniques):
+            slot = self.index.get(eq)
+            if slot is None:
+                slot = self.index[eq] = len(self.index)
+            slots[i] = slot
+        if len(self.index) > len(self.count):
+            self._grow(len(self.index))
+        return slots[codes]
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * len(self.count))
+        for name in ("mean", "var", "fast", "noise", "count"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def update(self, df):
+        # CSV uploads and the ingest writer may score concurrently
+        with self._lock:
+            return self._update(df)
+
+    def _update(self, df):
+        """
+        Score and absorb a batch of readings (in arrival order).
+
+        Args:
+            df: DataFrame with equipment_id and the SENSORS columns
+
+        Returns:
+            DataFrame aligned with df: anomaly_score (max |z| across sensors),
+            drift_score (max |fast - slow| / noise std), is_spike, is_drift
+        """
+        n = len(df)
+        if n == 0:
+            return pd.DataFrame(columns=["anomaly_score", "drift_score", "is_spike", "is_drift"], index=df.index)
+        slots = self._slots(df["equipment_id"].to_numpy())
+        values = df[list(SENSORS)].to_numpy(dtype=np.float64)
+        z = np.zeros((n, len(SENSORS)))
+        drift = np.zeros((n, len(SENSORS)))
+        warm = np.zeros((n, len(SENSORS)), dtype=bool)
+
+        # A batch can hold several readings for one machine, and each must see
+        # the state left by the previous one. Process "rounds": round k takes the
+        # k-th reading of every machine, so each round is one vectorized update.
+        rank = pd.Series(slots).groupby(slots).cumcount().to_numpy()
+        order = np.argsort(rank, kind="stable")
+        bounds = np.searchsorted(rank[order], np.arange(rank.max() + 2))
+
+        for k in range(len(bounds) - 1):
+            rows = order[bounds[k]:bounds[k + 1]]
+            s = slots[rows]
+            x = values[rows]
+            seen = np.isfinite(x)
+            x = np.where(seen, x, 0.0)
+            first = self.count[s] == 0
+
+            std = np.sqrt(self.var[s])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z[rows] = np.where(seen & (std > 0), (x - self.mean[s]) / std, 0.0)
+            warm[rows] = seen & (self.count[s] >= self.warmup)
+
+            # EWMA mean/variance (West's incremental form); first reading seeds the state
+            delta = x - self.mean[s]
+            mean = np.where(first, x, self.mean[s] + self.alpha * delta)
+            var = np.where(first, 0.0, (1 - self.alpha) * (self.var[s] + self.alpha * delta ** 2))
+            residual = x - self.fast[s]
+            fast = np.where(first, x, self.fast[s] + self.fast_alpha * residual)
+            noise = np.where(first, 0.0, (1 - self.alpha) * self.noise[s] + self.alpha * residual ** 2)
+            # Missing values keep the previous state
+            self.mean[s] = np.where(seen, mean, self.mean[s])
+            self.var[s] = np.where(seen, var, self.var[s])
+            self.fast[s] = np.where(seen, fast, self.fast[s])
+            self.noise[s] = np.where(seen, noise, self.noise[s])
+            self.count[s] += seen
+
+            std = np.sqrt(self.noise[s])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                drift[rows] = np.where(seen & (std > 0), (self.fast[s] - self.mean[s]) / std, 0.0)
+
+        anomaly_score = np.where(warm, np.abs(z), 0.0).max(axis=1)
+        drift_score = np.where(warm, np.abs(drift), 0.0).max(axis=1)
+        return pd.DataFrame({
+            "anomaly_score": anomaly_score,
+            "drift_score": drift_score,
+            "is_spike": anomaly_score >= self.spike_z,
+            "is_drift": drift_score >= self.drift_z,
+        }, index=df.index)
+
+    def needs_diagnosis(self, anomaly_score, drift_score):
+        """Cheap pre-filter before an LLM call: only spikes or drift are worth diagnosing"""
+        return (anomaly_score or 0.0) >= self.spike_z or (drift_score or 0.0) >= self.drift_z
+
+
+detector = StreamingAnomalyDetector()
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+SERIES_METRICS = ("temp", "vibration", "pressure")
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Args:
+        x: Monotonic x values (e.g. timestamps as float seconds)
+        y: Values to plot
+        n_out: Target number of points (first and last are always kept)
+
+    Returns:
+        Sorted integer indices of the points to keep
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets over the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    # Bucket averages in one pass via prefix sums
+    x = x - x[0]
+    csx = np.concatenate(([0.0], np.cumsum(x)))
+    csy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = edges[1:] - edges[:-1]
+    avg_x = (csx[edges[1:]] - csx[edges[:-1]]) / counts
+    avg_y = (csy[edges[1:]] - csy[edges[:-1]]) / counts
+    # The bucket after the last interior bucket is the final point itself
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[i] - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def build_series(df, metric, points):
+    """
+    Build one downsampled series per equipment for a metric.
+
+    Args:
+        df: DataFrame with equipment_id, timestamp and the metric column
+        metric: One of SERIES_METRICS
+        points: Target number of points per series
+
+    Returns:
+        List of {"equipment_id", "timestamp", "value", "raw_points"} dicts
+    """
+    if df.empty:
+        return []
+
+    df = df[["equipment_id", "timestamp", metric]].dropna()
+    df = df.assign(timestamp=pd.to_datetime(df["timestamp"]))
+    df = df.sort_values(["equipment_id", "timestamp"], kind="stable")
+
+    series = []
+    for equipment_id, group in df.groupby("equipment_id", sort=True):
+        ts = group["timestamp"].to_numpy()
+        values = group[metric].to_numpy(dtype=np.float64)
+        seconds = (ts - ts[0]) / np.timedelta64(1, "s")
+        idx = lttb_indices(seconds, values, points)
+        series.append({
+            "equipment_id": equipment_id,
+            "timestamp": pd.DatetimeIndex(ts[idx]).strftime("%Y-%m-%dT%H:%M:%S").tolist(),
+            "value": values[idx].tolist(),
+            "raw_points": len(group),
+        })
+    return series
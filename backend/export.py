@@ -0,0 +1,110 @@
+import io
+import json
+import os
+from itertools import islice
+
+import pandas as pd
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "10000"))
+
+EXPORT_COLUMNS = ["timestamp", "equipment_id", "temp", "vibration", "pressure", "failure_type",
+                  "anomaly_score", "drift_score", "analysis"]
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _frame(rows):
+    df = pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["analysis"] = df["analysis"].map(lambda a: None if a is None else json.dumps(a, ensure_ascii=False))
+    return df
+
+
+def csv_chunks(batches):
+    """One CSV chunk per batch of row tuples, header first"""
+    yield (",".join(EXPORT_COLUMNS) + "\n").encode()
+    for rows in batches:
+        yield _frame(rows).to_csv(header=False, index=False, date_format=TIMESTAMP_FORMAT).encode()
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain()"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parquet_chunks(batches):
+    """One Parquet row group per batch, flushed as it is written; the footer comes last"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("timestamp", pa.timestamp("us")),
+        ("equipment_id", pa.string()),
+        ("temp", pa.float64()),
+        ("vibration", pa.float64()),
+        ("pressure", pa.float64()),
+        ("failure_type", pa.int64()),
+        ("anomaly_score", pa.float64()),
+        ("drift_score", pa.float64()),
+        ("analysis", pa.string()),
+    ])
+    sink = _DrainableSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for rows in batches:
+            writer.write_table(pa.Table.from_pandas(_frame(rows), schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_stream(batches, fmt):
+    """Byte chunks for `fmt` ("csv" or "parquet") from an iterable of row-tuple batches"""
+    return parquet_chunks(batches) if fmt == "parquet" else csv_chunks(batches)
+
+
+def record_batches(records, start=None, end=None, equipment_ids=None, diagnosed_only=False,
+                   chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Filter in-memory reading dicts into row-tuple batches of EXPORT_COLUMNS.
+    Only records present when the export starts are included.
+    """
+    wanted = set(equipment_ids) if equipment_ids else None
+    start = start.strftime(TIMESTAMP_FORMAT) if start else None
+    end = end.strftime(TIMESTAMP_FORMAT) if end else None
+    batch = []
+    for r in islice(records, len(records)):
+        ts = str(r.get("timestamp", "")).replace("T", " ")
+        if ((wanted is not None and r.get("equipment_id") not in wanted)
+                or (start and ts < start) or (end and ts >= end)
+                or (diagnosed_only and r.get("analysis") is None)):
+            continue
+        batch.append(tuple(r.get(c) for c in EXPORT_COLUMNS))
+        if len(batch) == chunk_rows:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
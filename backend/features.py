@@ -0,0 +1,165 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+SENSORS = ["temp", "vibration", "pressure"]
+LAGS = (1, 2)
+WINDOWS = (6, 24)
+
+FEATURE_COLUMNS = (
+    SENSORS
+    + [f"{s}_lag{k}" for k in LAGS for s in SENSORS]
+    + [f"{s}_{stat}_{w}" for w in WINDOWS for stat in ("mean", "std", "slope") for s in SENSORS]
+    + ["hours_since_failure"]
+)
+
+KEY_COLUMNS = ["equipment_id", "timestamp"]
+
+# Rows of history a machine needs to compute every window and lag feature
+CONTEXT_ROWS = max(max(WINDOWS), max(LAGS)) - 1
+
+
+def build_features(df, last_failure=None):
+    """
+    Per-equipment lag / rolling-window / time-since-failure features.
+
+    Rolling windows come from prefix sums over the (equipment, time)-sorted
+    rows, with each window clipped at its machine's first reading. This is
+    what groupby("equipment_id").rolling(w) computes, without pandas'
+    per-group window bookkeeping (which dominates with thousands of machines)
+    and filling one preallocated float32 matrix to keep 10M-row runs in memory.
+
+    Args:
+        df: DataFrame with timestamp, equipment_id, SENSORS and optionally failure_type
+        last_failure: Optional {equipment_id: Timestamp} of failures seen before df
+
+    Returns:
+        float32 DataFrame with FEATURE_COLUMNS, aligned with df's index
+    """
+    n = len(df)
+    ts = pd.to_datetime(df["timestamp"]).to_numpy()
+    codes, uniques = pd.factorize(df["equipment_id"])
+    order = np.lexsort((ts, codes))
+    codes = codes[order]
+    ts = ts[order]
+
+    row = np.arange(n)
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = codes[1:] != codes[:-1]
+    group_start = np.maximum.accumulate(np.where(new_group, row, 0)) if n else row
+    position = row - group_start
+
+    result = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.float32, order="F")
+    column = {name: c for c, name in enumerate(FEATURE_COLUMNS)}
+
+    def put(name, sorted_values):
+        result[order, column[name]] = sorted_values
+
+    for s in SENSORS:
+        y = df[s].to_numpy(dtype=np.float64)[order]
+        put(s, y)
+        for k in LAGS:
+            lag = np.full(n, np.nan)
+            lag[k:] = y[:-k]
+            lag[position < k] = np.nan
+            put(f"{s}_lag{k}", lag)
+
+        # Missing readings are left out of every window: they add nothing to the
+        # prefix sums, and each window divides by its count of finite values
+        finite = np.isfinite(y)
+        complete = finite.all()
+        centre = float(np.mean(y[finite])) if finite.any() else 0.0  # centred sums keep float64 precision
+        yc = y - centre if complete else np.where(finite, y - centre, 0.0)
+        columns = [yc, yc ** 2, yc * position] + ([] if complete else [finite])
+        prefix = np.zeros((n + 1, len(columns)))
+        np.cumsum(np.column_stack(columns), axis=0, out=prefix[1:])
+
+        for w in WINDOWS:
+            lo = np.maximum(row + 1 - w, group_start)
+            sums = (prefix[row + 1] - prefix[lo]).T
+            sum_y, sum_yy, sum_iy = sums[:3]
+            # Slope against k = readings back from the current one (small exact integers)
+            if complete:
+                count = (row + 1 - lo).astype(np.float64)
+                sum_k = count * (count - 1) / 2
+                sum_kk = (count - 1) * count * (2 * count - 1) / 6
+            else:
+                count = sums[3]
+                sum_k, sum_kk = np.zeros(n), np.zeros(n)
+                for k in range(1, w):
+                    j = row - k
+                    present = (j >= lo) & finite[np.maximum(j, 0)]
+                    sum_k += k * present
+                    sum_kk += k * k * present
+            sum_ky = position * sum_y - sum_iy
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = sum_y / count
+                var = np.where(count > 1, (sum_yy - sum_y * mean) / (count - 1), np.nan)
+                # Least-squares slope of y against the reading index over the window
+                slope = np.where(count > 1, -(sum_ky - sum_k * mean) / (sum_kk - sum_k ** 2 / count), np.nan)
+            put(f"{s}_mean_{w}", mean + centre)
+            put(f"{s}_std_{w}", np.sqrt(np.maximum(var, 0)))
+            put(f"{s}_slope_{w}", slope)
+
+    # Hours since the previous failure on the same machine (the current row's own
+    # label is excluded so training does not leak it)
+    previous = np.full(n, np.datetime64("NaT"), dtype=ts.dtype)
+    if "failure_type" in df and n:
+        failed = df["failure_type"].to_numpy()[order] == 1
+        last_idx = np.maximum.accumulate(np.where(failed, row, -1))
+        prev_idx = np.concatenate([[-1], last_idx[:-1]])
+        has_prev = prev_idx >= group_start
+        previous[has_prev] = ts[prev_idx[has_prev]]
+    if last_failure:
+        seeds = pd.Series(last_failure).reindex(uniques)
+        seed = pd.to_datetime(seeds).to_numpy().astype(ts.dtype)[codes]
+        missing = np.isnat(previous)
+        previous[missing] = seed[missing]
+    put("hours_since_failure", (ts - previous) / np.timedelta64(1, "h"))
+
+    return pd.DataFrame(result, index=df.index, columns=FEATURE_COLUMNS, copy=False)
+
+
+class FeatureState:
+    """
+    Per-machine window state for streaming inference: the last CONTEXT_ROWS
+    readings and the last failure time. transform() prepends that context to a
+    new batch, so features match a full-history recompute without rereading it.
+    A re-sent (equipment_id, timestamp) replaces the reading it repeats instead
+    of entering the windows twice.
+    """
+
+    def __init__(self):
+        self.tail = None
+        self.last_failure = {}
+        self._lock = threading.Lock()
+
+    def transform(self, df):
+        with self._lock:
+            new = df[["timestamp", "equipment_id"] + SENSORS].copy()
+            new["timestamp"] = pd.to_datetime(new["timestamp"])
+            if "failure_type" in df:
+                new["failure_type"] = df["failure_type"]
+            new["_new"] = True
+
+            frame = new if self.tail is None else pd.concat([self.tail, new], ignore_index=True)
+            frame = frame.reset_index(drop=True)
+            repeated = frame.duplicated(KEY_COLUMNS, keep="last").to_numpy()
+            if repeated.any():
+                # Each key keeps its latest reading; every new row gets that reading's features
+                frame = frame[~repeated].reset_index(drop=True)
+                features = build_features(frame, self.last_failure)
+                features.index = pd.MultiIndex.from_frame(frame[KEY_COLUMNS])
+                result = features.loc[pd.MultiIndex.from_frame(new[KEY_COLUMNS])]
+            else:
+                features = build_features(frame, self.last_failure)
+                result = features[frame["_new"].to_numpy()]
+            result.index = df.index
+
+            frame = frame.sort_values(["equipment_id", "timestamp"], kind="stable")
+            self.tail = frame.groupby("equipment_id", sort=False).tail(CONTEXT_ROWS).assign(_new=False)
+            if "failure_type" in frame:
+                failed = frame[frame["failure_type"] == 1]
+                self.last_failure.update(failed.groupby("equipment_id")["timestamp"].max().to_dict())
+            return result
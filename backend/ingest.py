@@ -0,0 +1,286 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+READING_FIELDS = ("timestamp", "equipment_id", "temp", "vibration", "pressure")
+
+INGEST_BATCH_ROWS = int(os.getenv("INGEST_BATCH_ROWS", "5000"))
+INGEST_MAX_DELAY_MS = float(os.getenv("INGEST_MAX_DELAY_MS", "200"))
+INGEST_QUEUE_BATCHES = int(os.getenv("INGEST_QUEUE_BATCHES", "256"))
+INGEST_ENQUEUE_TIMEOUT_S = float(os.getenv("INGEST_ENQUEUE_TIMEOUT_S", "5"))
+INGEST_WRITE_RETRIES = int(os.getenv("INGEST_WRITE_RETRIES", "3"))
+INGEST_RETRY_BACKOFF_S = float(os.getenv("INGEST_RETRY_BACKOFF_S", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueueFull(Exception):
+    """Raised when the writer cannot keep up and the queue stayed full too long"""
+
+
+class IngestPipeline:
+    """
+    Asyncio queue + single writer task that flushes readings in micro-batches.
+
+    Args:
+        write: Sync callable(DataFrame) persisting one batch (run in a thread); may
+            return ({"inserted", "updated", "skipped"} counts, boolean mask of the
+            rows it actually wrote), so stats() and on_flush leave out skipped re-sends
+        score: Optional sync callable(DataFrame) -> array of failure predictions
+        detect: Optional sync callable(DataFrame) -> DataFrame of anomaly/drift scores
+        on_flush: Optional callable(DataFrame) invoked on the loop after a write,
+            with the written rows only
+        batch_rows: Flush once this many rows are pending
+        max_delay_ms: ... or once the oldest pending row is this old
+        queue_batches: Max chunks waiting for the writer before producers block
+        write_retries: Extra attempts for a failed write, with doubling backoff
+            from retry_backoff_s; the writer holds the batch meanwhile, so the
+            queue fills and producers get backpressure instead of silent loss
+    """
+
+    def __init__(self, write, score=None, detect=None, on_flush=None, batch_rows=INGEST_BATCH_ROWS,
+                 max_delay_ms=INGEST_MAX_DELAY_MS, queue_batches=INGEST_QUEUE_BATCHES,
+                 enqueue_timeout=INGEST_ENQUEUE_TIMEOUT_S, chunk_rows=1000,
+                 write_retries=INGEST_WRITE_RETRIES, retry_backoff_s=INGEST_RETRY_BACKOFF_S):
+        self.write = write
+        self.score = score
+        self.detect = detect
+        self.on_flush = on_flush
+        self.batch_rows = batch_rows
+        self.max_delay = max_delay_ms / 1000
+        self.queue_batches = queue_batches
+        self.enqueue_timeout = enqueue_timeout
+        self.chunk_rows = chunk_rows
+        self.write_retries = write_retries
+        self.retry_backoff_s = retry_backoff_s
+
+        self.queue = None
+        self._task = None
+
+        self.pending_rows = 0
+        self.rows_ingested = 0
+        self.batches_flushed = 0
+        self.invalid_rows = 0
+        self.rejected_rows = 0
+        self.write_errors = 0
+        self.dropped_rows = 0
+        self.rows_updated = 0
+        self.rows_skipped = 0
+        self.latencies_ms = deque(maxlen=10_000)
+        self.last_flush_ms = 0.0
+
+    def start(self):
+        self.queue = asyncio.Queue(self.queue_batches)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush what is queued, then stop the writer"""
+        if self._task is None:
+            return
+        await self.queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def put(self, records):
+        """Enqueue a list of reading dicts, waiting (bounded) for queue space"""
+        if not records:
+            return
+        try:
+            await asyncio.wait_for(self.queue.put((time.monotonic(), records)), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_rows += len(records)
+            raise IngestQueueFull(f"ingest queue full ({self.pending_rows} rows pending)")
+        self.pending_rows += len(records)
+
+    async def ingest_stream(self, chunks):
+        """
+        Consume an async iterator of NDJSON bytes. While the queue is full we
+        stop reading the body, which pushes back on the sender over TCP.
+
+        Returns:
+            (accepted_rows, invalid_rows)
+        """
+        accepted = invalid = 0
+        buffer = b""
+        records = []
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                lines = buffer.split(b"\n")
+                buffer = lines.pop()
+                for line in lines:
+                    record = parse_reading(line)
+                    if record is None:
+                        invalid += line.strip() != b""
+                        continue
+                    records.append(record)
+                    if len(records) >= self.chunk_rows:
+                        await self.put(records)
+                        accepted += len(records)
+                        records = []
+
+            record = parse_reading(buffer)
+            if record is not None:
+                records.append(record)
+            else:
+                invalid += buffer.strip() != b""
+            await self.put(records)
+            accepted += len(records)
+        except IngestQueueFull as e:
+            e.accepted = accepted
+            raise
+        finally:
+            self.invalid_rows += invalid
+
+        return accepted, invalid
+
+    async def _run(self):
+        while True:
+            first = await self.queue.get()
+            items = [first]
+            try:
+                rows = len(first[1])
+                deadline = first[0] + self.max_delay
+                while rows < self.batch_rows:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    items.append(item)
+                    rows += len(item[1])
+                await self._flush(items)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # No single batch may end the writer: later batches still need it
+                self.dropped_rows += sum(len(batch) for _, batch in items)
+                logger.exception("Ingest batch of %d chunks failed", len(items))
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+
+    async def _flush(self, items):
+        records = [r for _, batch in items for r in batch]
+        self.pending_rows -= len(records)
+        started = time.monotonic()
+
+        df = pd.DataFrame.from_records(records)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", format="mixed")
+        unparsed = df["timestamp"].isna()
+        if unparsed.any():
+            # parse_reading already rejects these; a mixed-format batch can still disagree
+            self.invalid_rows += int(unparsed.sum())
+            df = df[~unparsed].reset_index(drop=True)
+            if df.empty:
+                return
+        if "failure_type" not in df:
+            df["failure_type"] = np.nan
+        # Predicted / defaulted labels must not overwrite stored ones (see upsert)
+        df["label_predicted"] = df["failure_type"].isna()
+
+        if self.score is not None:
+            predicted = await asyncio.to_thread(self.score, df)
+            df["failure_type"] = df["failure_type"].fillna(pd.Series(predicted, index=df.index))
+        df["failure_type"] = df["failure_type"].fillna(0).astype(int)
+        if self.detect is not None:
+            scores = await asyncio.to_thread(self.detect, df)
+            df["anomaly_score"] = scores["anomaly_score"]
+            df["drift_score"] = scores["drift_score"]
+
+        written = None
+        for attempt in range(self.write_retries + 1):
+            try:
+                written = await asyncio.to_thread(self.write, df)
+                break
+            except Exception as e:
+                self.write_errors += 1
+                if attempt == self.write_retries:
+                    self.dropped_rows += len(df)
+                    logger.error("Ingest write of %d rows failed %d times, dropping them: %s",
+                                 len(df), attempt + 1, e)
+                    return
+                delay = self.retry_backoff_s * 2 ** attempt
+                logger.warning("Ingest write of %d rows failed (%s), retrying in %.1fs", len(df), e, delay)
+                await asyncio.sleep(delay)
+
+        done = time.monotonic()
+        self.latencies_ms.extend((done - enqueued) * 1000 for enqueued, batch in items for _ in batch)
+        self.last_flush_ms = (done - started) * 1000
+        self.batches_flushed += 1
+        if written is not None:
+            counts, changed = written
+            self.rows_updated += counts.get("updated", 0)
+            self.rows_skipped += counts.get("skipped", 0)
+            df = df[changed]
+        self.rows_ingested += len(df)
+        if self.on_flush is not None and len(df):
+            self.on_flush(df)
+
+    # stats() keys that only ever grow (exported as Prometheus counters)
+    COUNTER_STATS = ("rows_ingested", "batches_flushed", "invalid_rows", "rejected_rows", "write_errors",
+                     "dropped_rows", "rows_updated", "rows_skipped")
+
+    def stats(self):
+        latencies = np.fromiter(self.latencies_ms, dtype=float)
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            "queue_depth_rows": self.pending_rows,
+            "queue_depth_batches": self.queue.qsize() if self.queue is not None else 0,
+            "rows_ingested": self.rows_ingested,
+            "batches_flushed": self.batches_flushed,
+            "invalid_rows": self.invalid_rows,
+            "rejected_rows": self.rejected_rows,
+            "write_errors": self.write_errors,
+            "dropped_rows": self.dropped_rows,
+            "rows_updated": self.rows_updated,
+            "rows_skipped": self.rows_skipped,
+            "latency_p50_ms": round(float(p50), 2),
+            "latency_p99_ms": round(float(p99), 2),
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+def _valid_timestamp(value):
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            pd.Timestamp(value)
+        except ValueError:
+            return False
+    return True
+
+
+def parse_reading(line):
+    """Parse one NDJSON line into a reading dict, or None if it is not a valid reading"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        obj = json.loads(line)
+        record = {field: obj[field] for field in READING_FIELDS}
+        for field in ("temp", "vibration", "pressure"):
+            record[field] = float(record[field])
+        if obj.get("failure_type") is not None:
+            record["failure_type"] = int(obj["failure_type"])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if not _valid_timestamp(record["timestamp"]):
+        return None
+    return record
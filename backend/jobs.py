@@ -0,0 +1,187 @@
+import asyncio
+import itertools
+import logging
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+DIAGNOSIS_WORKERS = int(os.getenv("DIAGNOSIS_WORKERS", "4"))
+DIAGNOSIS_QUEUE_SIZE = int(os.getenv("DIAGNOSIS_QUEUE_SIZE", "10000"))
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class DiagnosisJob:
+    def __init__(self, equipment_id, reading_key, priority, reading):
+        self.id = uuid.uuid4().hex
+        self.equipment_id = equipment_id
+        self.reading_key = reading_key
+        self.priority = priority
+        self.reading = reading
+        self.status = QUEUED
+        self.result = None
+        self.created_at = datetime.now()
+        self.finished_at = None
+
+    @property
+    def key(self):
+        return (self.equipment_id, self.reading_key)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "equipment_id": self.equipment_id,
+            "reading": self.reading_key,
+            "priority": self.priority,
+            "status": self.status,
+            "result": self.result,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class JobQueueFull(Exception):
+    """Raised when DIAGNOSIS_QUEUE_SIZE jobs are already waiting"""
+
+
+class DiagnosisJobQueue:
+    """
+    Priority queue of diagnosis jobs drained by a fixed pool of workers.
+
+    Highest priority (XGBoost failure risk) runs first. Jobs for the same
+    (equipment, reading) are deduplicated while queued or running. The LLM
+    calls run on a dedicated thread pool, so diagnosis throughput is set by
+    `workers` independently of how many HTTP requests the server accepts.
+
+    Args:
+        run: Sync callable(job) -> result dict (the Solar call); a dict with an
+            "error" key, like a raised exception, fails the job
+        on_update: Optional sync callable(job) on every status change (queued,
+            running, done/failed) for persistence
+        workers: Number of concurrent diagnoses
+        maxsize: Max queued jobs before submit() raises JobQueueFull
+        keep_finished: How many finished jobs to keep in memory for get()
+    """
+
+    def __init__(self, run, on_update=None, workers=DIAGNOSIS_WORKERS,
+                 maxsize=DIAGNOSIS_QUEUE_SIZE, keep_finished=10_000):
+        self.run = run
+        self.on_update = on_update
+        self.workers = workers
+        self.maxsize = maxsize
+        self.keep_finished = keep_finished
+
+        self.queue = None
+        self._tasks = []
+        self._executor = None
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._active = {}
+        self._finished = deque()
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        self.queue = asyncio.PriorityQueue()
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="diagnosis")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def submit(self, equipment_id, reading_key, priority, reading):
+        """Enqueue a diagnosis, or return the queued/running job for the same reading"""
+        existing = self._active.get((equipment_id, reading_key))
+        if existing is not None:
+            self.deduplicated += 1
+            return existing
+        if self.queue.qsize() >= self.maxsize:
+            raise JobQueueFull(f"{self.queue.qsize()} diagnosis jobs already queued")
+
+        job = DiagnosisJob(equipment_id, reading_key, priority, reading)
+        self._jobs[job.id] = job
+        self._active[job.key] = job
+        try:
+            await self._notify(job)
+        except Exception:
+            self._jobs.pop(job.id, None)
+            self._active.pop(job.key, None)
+            raise
+        self.queue.put_nowait((-priority, next(self._seq), job))
+        self.submitted += 1
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    async def _notify(self, job):
+        # Persistence goes to the default pool, not the (possibly saturated) LLM pool
+        if self.on_update is not None:
+            await asyncio.to_thread(self.on_update, job)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await self.queue.get()
+            job.status = RUNNING
+            await self._notify_quietly(job)
+            try:
+                job.result = await loop.run_in_executor(self._executor, self.run, job)
+                if isinstance(job.result, dict) and "error" in job.result:
+                    # solar_client reports API failures in the result instead of raising
+                    job.status = FAILED
+                    self.failed += 1
+                else:
+                    job.status = DONE
+                    self.completed += 1
+            except Exception as e:
+                job.result = {"error": str(e)}
+                job.status = FAILED
+                self.failed += 1
+            job.finished_at = datetime.now()
+            self._active.pop(job.key, None)
+            self._retire(job)
+            await self._notify_quietly(job)
+            self.queue.task_done()
+
+    async def _notify_quietly(self, job):
+        # A persistence failure must not stop the worker; the job keeps running in memory
+        try:
+            await self._notify(job)
+        except Exception:
+            logger.exception("Failed to persist diagnosis job %s (%s)", job.id, job.status)
+
+    def _retire(self, job):
+        self._finished.append(job.id)
+        if len(self._finished) > self.keep_finished:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    # stats() keys that only ever grow (exported as Prometheus counters)
+    COUNTER_STATS = ("submitted", "deduplicated", "completed", "failed")
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "running": sum(1 for j in self._active.values() if j.status == RUNNING),
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
@@ -0,0 +1,132 @@
+import os
+import time
+
+from backend import solar_client
+
+
+class ChatBackend:
+    """
+    A chat-completion provider that can run the equipment diagnosis.
+
+    Subclasses implement complete(); diagnose() sends the same prompt
+    solar_client uses and returns (analysis, usage) in solar_client.diagnose's
+    shape, plus the call's cost_usd, so any backend can be fed to evaluation.py.
+
+    Args:
+        name: Display name (matches llm_comparison.MODELS keys)
+        model: Model id sent to the API
+        input_cost_per_1k: USD per 1K prompt tokens
+        output_cost_per_1k: USD per 1K completion tokens
+    """
+
+    def __init__(self, name, model, input_cost_per_1k=0.0, output_cost_per_1k=0.0):
+        self.name = name
+        self.model = model
+        self.input_cost_per_1k = input_cost_per_1k
+        self.output_cost_per_1k = output_cost_per_1k
+
+    def complete(self, messages, temperature=0.1):
+        """Return (content, usage) for one chat completion; raise on failure"""
+        raise NotImplementedError
+
+    def cost(self, prompt_tokens, completion_tokens):
+        return ((prompt_tokens or 0) * self.input_cost_per_1k
+                + (completion_tokens or 0) * self.output_cost_per_1k) / 1000
+
+    def diagnose(self, equipment_id, temp, vibration, pressure):
+        usage = {"model": self.model, "prompt_tokens": None, "completion_tokens": None,
+                 "total_tokens": None, "latency_ms": 0.0, "cost_usd": None}
+        messages = solar_client.diagnosis_messages(equipment_id, temp, vibration, pressure)
+        started = time.perf_counter()
+        try:
+            content, reported = self.complete(messages)
+            usage.update({k: v for k, v in reported.items() if k in usage})
+            usage["cost_usd"] = self.cost(usage["prompt_tokens"], usage["completion_tokens"])
+            return solar_client.parse_analysis(content), usage
+        except Exception as e:
+            return {"error": str(e)}, usage
+        finally:
+            usage["latency_ms"] = (time.perf_counter() - started) * 1000
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r}, model={self.model!r})"
+
+
+class SolarBackend(ChatBackend):
+    """Upstage Solar through solar_client (the production request path)"""
+
+    def __init__(self, name="Solar LLM (Upstage)", model=None, url=None, api_key=None,
+                 input_cost_per_1k=solar_client.SOLAR_INPUT_COST_PER_1K,
+                 output_cost_per_1k=solar_client.SOLAR_OUTPUT_COST_PER_1K):
+        super().__init__(name, model or solar_client.SOLAR_MODEL, input_cost_per_1k, output_cost_per_1k)
+        self.url = url
+        self.api_key = api_key
+
+    def complete(self, messages, temperature=0.1):
+        api_key = self.api_key or os.getenv("SOLAR_API_KEY")
+        if not api_key:
+            raise RuntimeError("SOLAR_API_KEY not found")
+        return solar_client.chat(messages, url=self.url, model=self.model,
+                                 api_key=api_key, temperature=temperature)
+
+
+class OpenAICompatibleBackend(ChatBackend):
+    """
+    Any OpenAI-compatible /chat/completions endpoint (OpenAI, vLLM, Ollama,
+    a local stub, ...) through the `openai` client, imported on first use.
+    """
+
+    def __init__(self, name, model, base_url=None, api_key=None, api_key_env="OPENAI_API_KEY",
+                 input_cost_per_1k=0.0, output_cost_per_1k=0.0, timeout=30.0):
+        super().__init__(name, model, input_cost_per_1k, output_cost_per_1k)
+        self.base_url = base_url
+        self.api_key = api_key
+        self.api_key_env = api_key_env
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+
+            api_key = self.api_key or os.getenv(self.api_key_env)
+            if not api_key:
+                raise RuntimeError(f"{self.api_key_env} not found")
+            self._client = OpenAI(base_url=self.base_url, api_key=api_key,
+                                  timeout=self.timeout, max_retries=0)
+        return self._client
+
+    def complete(self, messages, temperature=0.1):
+        response = self.client.chat.completions.create(
+            model=self.model, messages=messages, temperature=temperature
+        )
+        usage = {"model": response.model or self.model}
+        if response.usage is not None:
+            usage.update(prompt_tokens=response.usage.prompt_tokens,
+                          completion_tokens=response.usage.completion_tokens,
+                          total_tokens=response.usage.total_tokens)
+        return response.choices[0].message.content, usage
+
+
+def default_backends():
+    """
+    The backends llm_comparison.py benchmarks, with list-price token costs.
+
+    Model ids and endpoints come from SOLAR_MODEL / OPENAI_MODEL /
+    ANTHROPIC_MODEL; a backend whose API key is missing simply reports errors.
+    """
+    return [
+        SolarBackend(),
+        OpenAICompatibleBackend(
+            "GPT-4", os.getenv("OPENAI_MODEL", "gpt-4"),
+            base_url=os.getenv("OPENAI_BASE_URL"),
+            input_cost_per_1k=0.03, output_cost_per_1k=0.06,
+        ),
+        OpenAICompatibleBackend(
+            "Claude 3 (Sonnet)", os.getenv("ANTHROPIC_MODEL", "claude-3-sonnet-20240229"),
+            base_url=os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com/v1/"),
+            api_key_env="ANTHROPIC_API_KEY",
+            input_cost_per_1k=0.003, output_cost_per_1k=0.015,
+        ),
+    ]
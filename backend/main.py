@@ -1,31 +1,139 @@
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import String, case, cast, func, insert, select
+from pydantic import BaseModel
 import pandas as pd
+import asyncio
 import io
+import os
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
-import os
-
-# Load env vars from parent directory (where .env usually is in this structure)
-# or current directory if running from backend
-load_dotenv() 
-# Also try loading from parent dir if not found (development convenience)
-load_dotenv("../.env")
 
-import sys
-sys.path.insert(0, '/Users/curi/Desktop/PoC/askup-poc')
+# Searches upwards from this file, so the repo-root .env is found from any working directory
+load_dotenv()
 
-from backend.database import SessionLocal, engine
+from backend.database import SessionLocal, engine, init_db
 from backend import models
 from backend.xgboost_model import predictor
+from backend.anomaly import detector
 from backend.solar_client import analyze_failure
+from backend.downsample import SERIES_METRICS, build_series
+from backend.features import CONTEXT_ROWS
+from backend.transport import frame_response
+from backend.export import EXPORT_CHUNK_ROWS, EXPORT_FORMATS, export_stream
+from backend.upsert import upsert_readings
+from backend.usage import USAGE_GROUPS, UsageRecorder, summary_row, usage_csv_chunks
+from backend.pubsub import broker, sse_events, READINGS, FAILURES, DIAGNOSES
+from backend.ingest import IngestPipeline, IngestQueueFull
+from backend.jobs import DiagnosisJobQueue, JobQueueFull, DONE
+from backend.singleflight import diagnosis_flight
+from backend import metrics, solar_client
+from backend.metrics import timed
+from backend.profiling import ProfilingMiddleware
+
+# Schema setup normally runs once per deploy (`python -m backend.database`);
+# set DB_INIT_ON_STARTUP=0 so autoscaled workers skip it
+DB_INIT_ON_STARTUP = os.getenv("DB_INIT_ON_STARTUP", "1") == "1"
+
+def _score_readings(df):
+    with timed("anomaly"):
+        return detector.update(df)
+
+def _write_readings(df):
+    db = SessionLocal()
+    try:
+        with timed("db_write"):
+            counts, changed = upsert_readings(db.connection(), df, score=_score_readings)
+            db.commit()
+        metrics.ROWS.inc(len(df), source="ingest")
+        return counts, changed
+    finally:
+        db.close()
+
+def _publish_readings(df):
+    records = df[INGEST_COLUMNS].to_dict("records")
+    broker.publish_records(READINGS, records)
+    failures = [r for r in records if r["failure_type"] == 1]
+    if failures:
+        broker.publish_records(FAILURES, failures)
+
+INGEST_COLUMNS = ["timestamp", "equipment_id", "temp", "vibration", "pressure", "failure_type",
+                  "anomaly_score", "drift_score"]
+# The detector runs inside the upsert, on new or changed readings only
+ingest_pipeline = IngestPipeline(_write_readings, score=predictor.predict_batch, on_flush=_publish_readings)
+
+def _run_diagnosis(job):
+    r = job.reading
+    return diagnosis_flight.do((job.equipment_id, job.reading_key), analyze_failure,
+                               job.equipment_id, r["temp"], r["vibration"], r["pressure"])
+
+def _save_job(job):
+    db = SessionLocal()
+    try:
+        db.merge(models.DiagnosisJob(
+            id=job.id,
+            equipment_id=job.equipment_id,
+            reading_id=job.reading_key,
+            priority=job.priority,
+            status=job.status,
+            result=job.result,
+            created_at=job.created_at,
+            finished_at=job.finished_at,
+        ))
+        if job.status == DONE:
+            db.query(models.VocLog).filter(models.VocLog.id == job.reading_key).update(
+                {models.VocLog.solar_analysis: job.result}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    if job.status == DONE:
+        broker.publish(DIAGNOSES, {"equipment_id": job.equipment_id, "timestamp": job.reading["timestamp"],
+                                   "analysis": job.result, "job_id": job.id})
+
+diagnosis_jobs = DiagnosisJobQueue(_run_diagnosis, on_update=_save_job)
+
+def _write_usage(rows):
+    with timed("db_write"):
+        with engine.begin() as conn:
+            conn.execute(insert(models.UsageLog), rows)
+
+usage_recorder = UsageRecorder(_write_usage)
+
+solar_client.add_usage_listener(metrics.record_llm_call)
+solar_client.add_usage_listener(usage_recorder.record)
+metrics.REGISTRY.collect_stats("askup_ingest", "Ingest pipeline", ingest_pipeline.stats,
+                              counters=ingest_pipeline.COUNTER_STATS)
+metrics.REGISTRY.collect_stats("askup_diagnosis_jobs", "Diagnosis job queue", diagnosis_jobs.stats,
+                              counters=diagnosis_jobs.COUNTER_STATS)
+metrics.REGISTRY.collect_stats("askup_llm_singleflight", "Coalesced Solar calls", diagnosis_flight.stats,
+                              counters=diagnosis_flight.COUNTER_STATS)
+metrics.REGISTRY.collect_stats("askup_llm_usage", "Per-call usage log", usage_recorder.stats,
+                              counters=usage_recorder.COUNTER_STATS)
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app):
+    if DB_INIT_ON_STARTUP:
+        await asyncio.to_thread(init_db)
+    # xgboost and the model load in the background so they don't hold up readiness
+    warmup = asyncio.create_task(asyncio.to_thread(predictor.warm_up))
+    ingest_pipeline.start()
+    diagnosis_jobs.start()
+    usage_recorder.start()
+    yield
+    await diagnosis_jobs.stop()
+    await ingest_pipeline.stop()
+    await usage_recorder.stop()
+    await warmup
 
-app = FastAPI(title="Solar LLM PoC API")
+app = FastAPI(title="Solar LLM PoC API", lifespan=lifespan)
+
+# Opt-in: X-Profile: $PROFILE_ADMIN_TOKEN, or PROFILE_SAMPLE_EVERY=N
+app.add_middleware(ProfilingMiddleware)
+
+DASHBOARD_COLUMNS = ["timestamp", "equipment_id", "temp", "vibration", "pressure", "failure_type", "analysis"]
 
 def get_db():
     db = SessionLocal()
@@ -36,76 +144,311 @@ def get_db():
 
 @app.post("/upload_csv")
 async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Upsert a CSV of readings keyed on (equipment_id, timestamp): re-uploading
+    an overlapping log updates changed rows and skips identical ones.
+    """
     contents = await file.read()
-    df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-    
-    # Preprocessing & Inference
-    results = []
-    
-    for _, row in df.iterrows():
-        # Predict failure if not in CSV (assuming CSV might just have sensor data)
-        # But user says CSV has labels? "전처리: 결측치 처리, 한국어 고장 유형 라벨링"
-        # Let's assume we just store and maybe re-predict or use the label if present.
-        # Requirement says: "POST /upload_csv → PostgreSQL 저장"
-        # We will also run the XGBoost predictor to verify or fill gaps?
-        # Let's trust the CSV data but also allow prediction if needed.
-        
-        # Simple prediction check
-        pred_failure = predictor.predict(row['temp'], row['vibration'], row['pressure'])
-        
-        # If 'failure_type' is in CSV, use it, else use prediction ?? 
-        # Requirement: "simple XGBoost failure prediction model training"
-        # Let's just store what we have.
-        
-        failure_val = row.get('failure_type', pred_failure)
-        
-        db_log = models.VocLog(
-            timestamp=pd.to_datetime(row['timestamp']),
-            equipment_id=row['equipment_id'],
-            temp=row['temp'],
-            vibration=row['vibration'],
-            pressure=row['pressure'],
-            failure_type=int(failure_val)
-        )
-        db.add(db_log)
-        results.append(db_log)
-    
-    db.commit()
-    return {"message": f"Successfully processed {len(results)} rows"}
+    with timed("csv_parse"):
+        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+
+    # Labels from the CSV win; XGBoost fills them in when the column is missing,
+    # but a prediction never replaces a label that is already stored
+    if 'failure_type' not in df:
+        df['failure_type'] = predictor.predict_batch(df)
+        df['label_predicted'] = True
+
+    # Only new or changed readings reach the detector, so re-uploads don't skew its baselines
+    with timed("db_write"):
+        counts, changed = upsert_readings(db.connection(), df, score=_score_readings)
+        db.commit()
+    metrics.ROWS.inc(len(df), source="upload")
+
+    # Only new or corrected readings go out on the stream
+    changed = df[changed]
+    with timed("serialize"):
+        broker.publish_records(READINGS, changed.to_dict("records"))
+        failures = changed[changed['failure_type'] == 1]
+        if len(failures):
+            broker.publish_records(FAILURES, failures[["equipment_id", "timestamp", "temp", "vibration",
+                                                       "pressure"]].to_dict("records"))
+    return {"message": f"Successfully processed {len(df)} rows", **counts}
+
+@app.post("/ingest")
+async def ingest(request: Request):
+    """Streaming NDJSON ingest: one reading object per line, micro-batched into voc_logs"""
+    try:
+        accepted, invalid = await ingest_pipeline.ingest_stream(request.stream())
+    except IngestQueueFull as e:
+        raise HTTPException(status_code=503, detail={"error": str(e), "accepted": e.accepted},
+                            headers={"Retry-After": "1"})
+    return {"accepted": accepted, "invalid": invalid}
+
+@app.get("/ingest/stats")
+def ingest_stats():
+    return ingest_pipeline.stats()
+
+ANALYZE_COLUMNS = ["timestamp", "equipment_id", "temp", "vibration", "pressure"]
+
+class AnalyzeRequest(BaseModel):
+    equipment_ids: Optional[List[str]] = None  # None = whole fleet
+
+@app.post("/analyze")
+async def enqueue_analysis(body: Optional[AnalyzeRequest] = None, db: Session = Depends(get_db)):
+    """Queue Solar diagnoses of the latest reading per equipment, riskiest first"""
+    # Each machine's last CONTEXT_ROWS + 1 readings, so the trend features behind
+    # the risk score see the same history they were trained on
+    recent = select(
+        models.VocLog.id, models.VocLog.timestamp, models.VocLog.equipment_id, models.VocLog.temp,
+        models.VocLog.vibration, models.VocLog.pressure, models.VocLog.failure_type,
+        func.row_number().over(partition_by=models.VocLog.equipment_id,
+                               order_by=models.VocLog.timestamp.desc()).label("recency"),
+    )
+    if body and body.equipment_ids:
+        recent = recent.where(models.VocLog.equipment_id.in_(body.equipment_ids))
+    recent = recent.subquery()
+    with timed("db_query"):
+        rows = db.execute(select(recent).where(recent.c.recency <= CONTEXT_ROWS + 1)
+                          .order_by(recent.c.equipment_id, recent.c.timestamp)).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+
+    history = pd.DataFrame(rows, columns=list(recent.c.keys()))
+    history["failure_type"] = history["failure_type"].fillna(0)
+    history["risk"] = predictor.failure_risk(history)
+    latest = history[history["recency"] == 1].sort_values("id")
+
+    jobs = []
+    try:
+        for log_id, risk, reading in zip(latest["id"], latest["risk"], latest[ANALYZE_COLUMNS].to_dict("records")):
+            job = await diagnosis_jobs.submit(reading["equipment_id"], int(log_id), float(risk), reading)
+            jobs.append(job.to_dict())
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail={"error": str(e), "jobs": jobs}, headers={"Retry-After": "5"})
+    return {"jobs": jobs}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    job = diagnosis_jobs.get(job_id)
+    if job is not None:
+        return job.to_dict()
+
+    row = db.get(models.DiagnosisJob, job_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": row.id,
+        "equipment_id": row.equipment_id,
+        "reading": row.reading_id,
+        "priority": row.priority,
+        "status": row.status,
+        "result": row.result,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+    }
+
+@app.get("/jobs")
+def job_stats():
+    return diagnosis_jobs.stats()
+
+@app.get("/analyze/stats")
+def analyze_stats():
+    """How many Solar calls ran vs. were coalesced onto an in-flight call"""
+    return diagnosis_flight.stats()
 
 @app.post("/analyze/{equipment_id}")
-def analyze_equipment(equipment_id: str, db: Session = Depends(get_db)):
+def analyze_equipment(equipment_id: str, prefilter: bool = False, db: Session = Depends(get_db)):
     # Get latest log for this equipment
-    log = db.query(models.VocLog).filter(models.VocLog.equipment_id == equipment_id).order_by(models.VocLog.timestamp.desc()).first()
+    with timed("db_query"):
+        log = db.query(models.VocLog).filter(models.VocLog.equipment_id == equipment_id).order_by(models.VocLog.timestamp.desc()).first()
     
     if not log:
         raise HTTPException(status_code=404, detail="Equipment not found")
+
+    # Optional cheap pre-filter: skip the LLM for readings the detector and XGBoost consider normal
+    if prefilter and log.failure_type != 1 and not detector.needs_diagnosis(log.anomaly_score, log.drift_score):
+        return {"status": "정상", "skipped_llm": True,
+                "anomaly_score": log.anomaly_score, "drift_score": log.drift_score}
         
-    # Call Solar LLM
-    analysis = analyze_failure(equipment_id, log.temp, log.vibration, log.pressure)
+    # Call Solar LLM (concurrent requests for the same reading share one call)
+    analysis = diagnosis_flight.do((equipment_id, log.id), analyze_failure,
+                                   equipment_id, log.temp, log.vibration, log.pressure)
     
-    # Save analysis to DB
-    log.solar_analysis = analysis
-    db.commit()
+    # Save analysis to DB; a failed call ({"error": ...}) is returned but never stored as a diagnosis
+    if "error" not in analysis:
+        log.solar_analysis = analysis
+        with timed("db_write"):
+            db.commit()
+        broker.publish(DIAGNOSES, {"equipment_id": equipment_id, "timestamp": log.timestamp, "analysis": analysis})
     
     return analysis
 
 @app.get("/dashboard_data")
-def get_dashboard_data(db: Session = Depends(get_db)):
-    # Aggregates for charts
-    logs = db.query(models.VocLog).all()
-    if not logs:
-        return {"data": []}
-        
-    data = []
-    for log in logs:
-        data.append({
-            "timestamp": log.timestamp,
-            "equipment_id": log.equipment_id,
-            "temp": log.temp,
-            "vibration": log.vibration,
-            "pressure": log.pressure,
-            "failure_type": log.failure_type,
-            "analysis": log.solar_analysis
-        })
-    return {"data": data}
+def get_dashboard_data(request: Request, db: Session = Depends(get_db)):
+    # Aggregates for charts. JSON rows by default; Arrow IPC or msgpack (and
+    # gzip/zstd) when the client asks for them via Accept / Accept-Encoding.
+    with timed("db_query"):
+        rows = db.query(
+            models.VocLog.timestamp,
+            models.VocLog.equipment_id,
+            models.VocLog.temp,
+            models.VocLog.vibration,
+            models.VocLog.pressure,
+            models.VocLog.failure_type,
+            models.VocLog.solar_analysis,
+        ).all()
+    df = pd.DataFrame(rows, columns=DASHBOARD_COLUMNS)
+    with timed("serialize"):
+        return frame_response(df, request)
+
+@app.get("/series")
+def get_series(
+    metric: str = "temp",
+    points: int = Query(1000, ge=3, le=20000),
+    equipment_id: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Per-equipment time series downsampled with LTTB to `points` points"""
+    if metric not in SERIES_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric {metric}")
+
+    column = getattr(models.VocLog, metric)
+    query = db.query(models.VocLog.equipment_id, models.VocLog.timestamp, column)
+    if equipment_id:
+        query = query.filter(models.VocLog.equipment_id.in_(equipment_id))
+
+    with timed("db_query"):
+        df = pd.DataFrame(query.all(), columns=["equipment_id", "timestamp", metric])
+    with timed("serialize"):
+        series = build_series(df, metric, points)
+    return {"metric": metric, "points": points, "series": series}
+
+@app.get("/export")
+def export_history(
+    fmt: str = Query("csv", alias="format"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    equipment_id: Optional[List[str]] = Query(None),
+    diagnosed_only: bool = False,
+):
+    """
+    Stream voc_logs with their Solar diagnoses as chunked CSV or Parquet.
+    Rows come through a server-side cursor EXPORT_CHUNK_ROWS at a time, so
+    memory stays flat however much history is selected.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format {fmt}; use one of {list(EXPORT_FORMATS)}")
+
+    log = models.VocLog
+    query = select(log.timestamp, log.equipment_id, log.temp, log.vibration, log.pressure, log.failure_type,
+                   log.anomaly_score, log.drift_score, log.solar_analysis).order_by(log.id)
+    if start:
+        query = query.where(log.timestamp >= start)
+    if end:
+        query = query.where(log.timestamp < end)
+    if equipment_id:
+        query = query.where(log.equipment_id.in_(equipment_id))
+    if diagnosed_only:
+        # Bulk inserts store JSON 'null' rather than SQL NULL; the cast catches both
+        query = query.where(cast(log.solar_analysis, String) != "null")
+
+    def batches():
+        # Own connection: the response outlives the request-scoped session
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS).execute(query)
+            for partition in result.partitions():
+                metrics.ROWS.inc(len(partition), source="export")
+                yield partition
+
+    media_type, extension = EXPORT_FORMATS[fmt]
+    return StreamingResponse(export_stream(batches(), fmt), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="voc_logs.{extension}"'})
+
+def _usage_filter(query, start, end, equipment_id):
+    usage = models.UsageLog
+    if start:
+        query = query.where(usage.created_at >= start)
+    if end:
+        query = query.where(usage.created_at < end)
+    if equipment_id:
+        query = query.where(usage.equipment_id.in_(equipment_id))
+    return query
+
+@app.get("/usage")
+def usage_summary(
+    group_by: List[str] = Query(["day", "equipment_id"]),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    equipment_id: Optional[List[str]] = Query(None),
+):
+    """Solar calls, errors, tokens, cost and latency from llm_usage, grouped by day / equipment_id / model"""
+    unknown = [g for g in group_by if g not in USAGE_GROUPS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by {unknown}; use {list(USAGE_GROUPS)}")
+    usage_recorder.flush()
+
+    usage = models.UsageLog
+    keys = {"day": func.date(usage.created_at), "equipment_id": usage.equipment_id, "model": usage.model}
+    columns = [keys[g].label(g) for g in group_by]
+    measures = [func.count(), func.sum(case((usage.error, 1), else_=0)),
+                func.sum(usage.prompt_tokens), func.sum(usage.completion_tokens), func.sum(usage.total_tokens),
+                func.sum(usage.cost_usd), func.avg(usage.latency_ms), func.max(usage.latency_ms)]
+
+    with timed("db_query"), engine.connect() as conn:
+        groups = conn.execute(_usage_filter(select(*columns, *measures), start, end, equipment_id)
+                              .group_by(*columns).order_by(*columns)).all() if columns else []
+        totals = conn.execute(_usage_filter(select(*measures), start, end, equipment_id)).one()
+
+    # func.date is a date on PostgreSQL and a string on SQLite
+    return {
+        "group_by": group_by,
+        "groups": [{**{g: str(v) if g == "day" else v for g, v in zip(group_by, row[:len(group_by)])},
+                    **summary_row(*row[len(group_by):])} for row in groups],
+        "totals": summary_row(*totals),
+    }
+
+@app.get("/usage/calls")
+def usage_calls(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    equipment_id: Optional[List[str]] = Query(None),
+):
+    """Per-call llm_usage rows as CSV (the input of `cost_calculator.py --usage`)"""
+    usage_recorder.flush()
+    usage = models.UsageLog
+    query = _usage_filter(select(usage.created_at, usage.equipment_id, usage.model, usage.prompt_tokens,
+                                 usage.completion_tokens, usage.total_tokens, usage.latency_ms,
+                                 usage.cost_usd, usage.error), start, end, equipment_id).order_by(usage.id)
+
+    def batches():
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS).execute(query)
+            yield from result.partitions()
+
+    return StreamingResponse(usage_csv_chunks(batches()), media_type="text/csv; charset=utf-8",
+                             headers={"Content-Disposition": 'attachment; filename="llm_usage.csv"'})
+
+@app.get("/stream")
+async def stream(request: Request, topic: Optional[List[str]] = Query(None)):
+    """Server-sent events: new readings, XGBoost failure flags and Solar diagnoses"""
+    sub = broker.subscribe(topic)
+    return StreamingResponse(
+        sse_events(broker, sub, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/health")
+def health_check():
+    """Readiness probe: answers as soon as the lifespan has run, before the model finishes loading"""
+    return {
+        "status": "healthy",
+        "model_loaded": predictor.model is not None,
+        "stream_subscribers": broker.subscriber_count
+    }
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms, row/token/error counters, queue stats"""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,17 +1,163 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+import numpy as np
 import pandas as pd
 import io
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 import sys
 from pathlib import Path
 
 # Add backend directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 from solar_client import analyze_failure
+from downsample import SERIES_METRICS, build_series
+from transport import frame_response
+from export import EXPORT_FORMATS, export_stream, record_batches
+from pubsub import broker, sse_events, READINGS, FAILURES, DIAGNOSES
+from ingest import IngestPipeline, IngestQueueFull
+from anomaly import detector
+from jobs import DiagnosisJobQueue, JobQueueFull, DONE
+from singleflight import diagnosis_flight
+from usage import USAGE_COLUMNS, USAGE_GROUPS, UsageRecorder, aggregate_usage, filter_usage, usage_csv_chunks
+import metrics
+import solar_client
+from metrics import timed
+from profiling import ProfilingMiddleware
+from pydantic import BaseModel
 
-app = FastAPI(title="Solar LLM PoC API")
+# In-memory database
+data_storage = []
+# (equipment_id, timestamp) -> position in data_storage, so re-sent readings update in place
+_storage_index = {}
+
+# A re-sent reading only counts as changed when what was measured changed
+COMPARED_FIELDS = ("temp", "vibration", "pressure", "failure_type")
+
+def _reading_key(record):
+    return record["equipment_id"], str(record["timestamp"]).replace("T", " ")
+
+def _upsert_record(record):
+    """
+    Store one reading keyed on (equipment_id, timestamp); returns inserted/updated/skipped.
+    A record flagged label_predicted keeps the stored failure_type.
+    """
+    label_predicted = record.pop("label_predicted", False)
+    key = _reading_key(record)
+    position = _storage_index.get(key)
+    if position is None:
+        _storage_index[key] = len(data_storage)
+        data_storage.append(record)
+        return "inserted"
+    stored = data_storage[position]
+    if label_predicted:
+        record["failure_type"] = stored.get("failure_type")
+    if all(stored.get(f) == record.get(f) for f in COMPARED_FIELDS):
+        return "skipped"
+    stored.update({k: v for k, v in record.items() if k != "timestamp"})
+    return "updated"
+
+def _upsert_records(records):
+    """Upsert reading dicts; returns (counts, the records that were inserted or updated)"""
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    changed = []
+    for record in records:
+        outcome = _upsert_record(record)
+        counts[outcome] += 1
+        if outcome != "skipped":
+            changed.append(record)
+    return counts, changed
+
+def _score_changed(changed):
+    """Feed new or changed readings to the detector in time order and store their scores"""
+    if not changed:
+        return
+    frame = pd.DataFrame(changed, columns=["timestamp", "equipment_id", "temp", "vibration", "pressure"])
+    frame = frame.assign(timestamp=frame["timestamp"].astype(str)).sort_values("timestamp", kind="stable")
+    with timed("anomaly"):
+        scores = detector.update(frame)
+    for i, anomaly, drift in zip(frame.index, scores["anomaly_score"], scores["drift_score"]):
+        record = changed[i]
+        record.update(anomaly_score=float(anomaly), drift_score=float(drift))
+        data_storage[_storage_index[_reading_key(record)]].update(anomaly_score=float(anomaly),
+                                                                  drift_score=float(drift))
+
+def clear_storage():
+    data_storage.clear()
+    _storage_index.clear()
+
+def _ingest_records(df):
+    df = df.assign(timestamp=df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S"))
+    return df.reindex(columns=INGEST_COLUMNS).to_dict("records")
+
+def _store_readings(df):
+    records = _ingest_records(df)
+    for record, label_predicted in zip(records, df["label_predicted"]):
+        record["label_predicted"] = label_predicted
+    with timed("db_write"):
+        counts, changed = _upsert_records(records)
+    _score_changed(changed)
+    # Scores back onto the batch for on_flush, which only gets the rows written here
+    df["anomaly_score"] = [r.get("anomaly_score") for r in records]
+    df["drift_score"] = [r.get("drift_score") for r in records]
+    metrics.ROWS.inc(len(df), source="ingest")
+    written = {id(r) for r in changed}
+    return counts, np.array([id(r) in written for r in records], dtype=bool)
+
+def _publish_readings(df):
+    records = _ingest_records(df)
+    broker.publish_records(READINGS, records)
+    failures = [r for r in records if r["failure_type"] == 1]
+    if failures:
+        broker.publish_records(FAILURES, failures)
+
+INGEST_COLUMNS = ["timestamp", "equipment_id", "temp", "vibration", "pressure", "failure_type",
+                  "anomaly_score", "drift_score"]
+# No XGBoost here: readings without a failure_type are stored as normal (0).
+# The detector runs in _store_readings, on new or changed readings only.
+ingest_pipeline = IngestPipeline(_store_readings, on_flush=_publish_readings)
+
+def _run_diagnosis(job):
+    r = job.reading
+    return diagnosis_flight.do((job.equipment_id, job.reading_key), analyze_failure,
+                               job.equipment_id, r["temp"], r["vibration"], r["pressure"])
+
+def _publish_job(job):
+    if job.status == DONE:
+        job.reading["analysis"] = job.result
+        broker.publish(DIAGNOSES, {"equipment_id": job.equipment_id, "timestamp": job.reading_key,
+                                   "analysis": job.result, "job_id": job.id})
+
+diagnosis_jobs = DiagnosisJobQueue(_run_diagnosis, on_update=_publish_job)
+
+# One row per Solar call, batched the same way main.py writes llm_usage
+usage_log = []
+usage_recorder = UsageRecorder(usage_log.extend)
+
+solar_client.add_usage_listener(metrics.record_llm_call)
+solar_client.add_usage_listener(usage_recorder.record)
+metrics.REGISTRY.collect_stats("askup_ingest", "Ingest pipeline", ingest_pipeline.stats,
+                              counters=ingest_pipeline.COUNTER_STATS)
+metrics.REGISTRY.collect_stats("askup_diagnosis_jobs", "Diagnosis job queue", diagnosis_jobs.stats,
+                              counters=diagnosis_jobs.COUNTER_STATS)
+metrics.REGISTRY.collect_stats("askup_llm_singleflight", "Coalesced Solar calls", diagnosis_flight.stats,
+                              counters=diagnosis_flight.COUNTER_STATS)
+metrics.REGISTRY.collect_stats("askup_llm_usage", "Per-call usage log", usage_recorder.stats,
+                              counters=usage_recorder.COUNTER_STATS)
+
+@asynccontextmanager
+async def lifespan(app):
+    ingest_pipeline.start()
+    diagnosis_jobs.start()
+    usage_recorder.start()
+    yield
+    await diagnosis_jobs.stop()
+    await ingest_pipeline.stop()
+    await usage_recorder.stop()
+
+app = FastAPI(title="Solar LLM PoC API", lifespan=lifespan)
 
 # Add CORS support
 app.add_middleware(
@@ -22,31 +168,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory database
-data_storage = []
+# Opt-in: X-Profile: $PROFILE_ADMIN_TOKEN, or PROFILE_SAMPLE_EVERY=N
+app.add_middleware(ProfilingMiddleware)
+
+# Values for columns an uploaded CSV does not have
+UPLOAD_DEFAULTS = {"equipment_id": "unknown", "temp": 0.0, "vibration": 0.0, "pressure": 0.0, "failure_type": 0}
 
 @app.post("/upload_csv")
 async def upload_csv(file: UploadFile = File(...)):
-    """Upload and process CSV file"""
+    """Upload a CSV; readings are keyed on (equipment_id, timestamp), so overlapping re-uploads do not duplicate"""
     try:
         contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+        with timed("csv_parse"):
+            df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
         
-        # Store the data
-        for _, row in df.iterrows():
-            record = {
-                "timestamp": row.get('timestamp', datetime.now().isoformat()),
-                "equipment_id": row.get('equipment_id', 'unknown'),
-                "temp": float(row.get('temp', 0)),
-                "vibration": float(row.get('vibration', 0)),
-                "pressure": float(row.get('pressure', 0)),
-                "failure_type": int(row.get('failure_type', 0))
-            }
-            data_storage.append(record)
+        # Missing columns get their defaults before anything reads them;
+        # a defaulted label never replaces one that is already stored
+        label_predicted = 'failure_type' not in df
+        defaults = {"timestamp": datetime.now().isoformat(), **UPLOAD_DEFAULTS}
+        df = df.assign(**{column: value for column, value in defaults.items() if column not in df})
+        with timed("db_write"):
+            records = [{
+                "timestamp": row['timestamp'],
+                "equipment_id": row['equipment_id'],
+                "temp": float(row['temp']),
+                "vibration": float(row['vibration']),
+                "pressure": float(row['pressure']),
+                "failure_type": int(row['failure_type']),
+                "label_predicted": label_predicted,
+            } for row in df.to_dict("records")]
+            counts, changed = _upsert_records(records)
+        # Only new or changed readings reach the detector, so re-uploads don't skew its baselines
+        _score_changed(changed)
+        metrics.ROWS.inc(len(df), source="upload")
+
+        # Only new or corrected readings go out on the stream
+        with timed("serialize"):
+            broker.publish_records(READINGS, changed)
+            failures = [r for r in changed if r["failure_type"] == 1]
+            if failures:
+                broker.publish_records(FAILURES, failures)
         
         return {
             "message": f"Successfully processed {len(df)} rows",
-            "rows_processed": len(df)
+            "rows_processed": len(df),
+            **counts
         }
     except Exception as e:
         return {
@@ -54,42 +220,197 @@ async def upload_csv(file: UploadFile = File(...)):
             "message": "Failed to process CSV"
         }
 
+@app.post("/ingest")
+async def ingest(request: Request):
+    """Streaming NDJSON ingest: one reading object per line, micro-batched into memory"""
+    try:
+        accepted, invalid = await ingest_pipeline.ingest_stream(request.stream())
+    except IngestQueueFull as e:
+        raise HTTPException(status_code=503, detail={"error": str(e), "accepted": e.accepted},
+                            headers={"Retry-After": "1"})
+    return {"accepted": accepted, "invalid": invalid}
+
+@app.get("/ingest/stats")
+def ingest_stats():
+    return ingest_pipeline.stats()
+
 @app.get("/dashboard_data")
-def get_dashboard_data():
-    """Get dashboard data"""
+def get_dashboard_data(request: Request):
+    """Get dashboard data (JSON, Arrow IPC or msgpack depending on Accept)"""
     if not data_storage:
         return {"data": []}
     
-    return {"data": data_storage}
+    with timed("serialize"):
+        return frame_response(pd.DataFrame(data_storage), request)
+
+@app.get("/series")
+def get_series(
+    metric: str = "temp",
+    points: int = Query(1000, ge=3, le=20000),
+    equipment_id: Optional[List[str]] = Query(None),
+):
+    """Per-equipment time series downsampled with LTTB to `points` points"""
+    if metric not in SERIES_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric {metric}")
+
+    records = data_storage
+    if equipment_id:
+        records = [r for r in records if r.get('equipment_id') in equipment_id]
+
+    df = pd.DataFrame(records, columns=["equipment_id", "timestamp", metric])
+    with timed("serialize"):
+        series = build_series(df, metric, points)
+    return {"metric": metric, "points": points, "series": series}
+
+@app.get("/export")
+def export_history(
+    fmt: str = Query("csv", alias="format"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    equipment_id: Optional[List[str]] = Query(None),
+    diagnosed_only: bool = False,
+):
+    """Stream stored readings and diagnoses as chunked CSV or Parquet"""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format {fmt}; use one of {list(EXPORT_FORMATS)}")
+
+    def batches():
+        for batch in record_batches(data_storage, start, end, equipment_id, diagnosed_only):
+            metrics.ROWS.inc(len(batch), source="export")
+            yield batch
+
+    media_type, extension = EXPORT_FORMATS[fmt]
+    return StreamingResponse(export_stream(batches(), fmt), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="readings.{extension}"'})
+
+class AnalyzeRequest(BaseModel):
+    equipment_ids: Optional[List[str]] = None  # None = whole fleet
+
+@app.post("/analyze")
+async def enqueue_analysis(body: Optional[AnalyzeRequest] = None):
+    """Queue Solar diagnoses of the latest reading per equipment, riskiest first"""
+    wanted = set(body.equipment_ids) if body and body.equipment_ids else None
+    latest = {}
+    for r in data_storage:
+        eq = r.get('equipment_id')
+        if (wanted is None or eq in wanted) and r.get('timestamp', '') >= latest.get(eq, {}).get('timestamp', ''):
+            latest[eq] = r
+    if not latest:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+
+    jobs = []
+    try:
+        for eq, r in latest.items():
+            # No XGBoost here: labelled failures first, then by anomaly score
+            priority = r['failure_type'] + (r.get('anomaly_score') or 0.0) / 100
+            job = await diagnosis_jobs.submit(eq, r['timestamp'], priority, r)
+            jobs.append(job.to_dict())
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail={"error": str(e), "jobs": jobs}, headers={"Retry-After": "5"})
+    return {"jobs": jobs}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = diagnosis_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs")
+def job_stats():
+    return diagnosis_jobs.stats()
+
+@app.get("/analyze/stats")
+def analyze_stats():
+    """How many Solar calls ran vs. were coalesced onto an in-flight call"""
+    return diagnosis_flight.stats()
 
 @app.post("/analyze/{equipment_id}")
-def analyze_equipment(equipment_id: str):
+def analyze_equipment(equipment_id: str, prefilter: bool = False):
     """Analyze equipment using Solar LLM"""
     # Find latest record for this equipment
-    equipment_records = [r for r in data_storage if r.get('equipment_id') == equipment_id]
+    with timed("db_query"):
+        equipment_records = [r for r in data_storage if r.get('equipment_id') == equipment_id]
     
     if not equipment_records:
         raise HTTPException(status_code=404, detail=f"Equipment {equipment_id} not found")
     
     # Get the most recent record
     latest_record = max(equipment_records, key=lambda x: x.get('timestamp', ''))
+
+    # Optional cheap pre-filter: skip the LLM for readings the detector considers normal
+    if prefilter and latest_record['failure_type'] != 1 and not detector.needs_diagnosis(
+            latest_record.get('anomaly_score'), latest_record.get('drift_score')):
+        return {"status": "정상", "skipped_llm": True,
+                "anomaly_score": latest_record.get('anomaly_score'),
+                "drift_score": latest_record.get('drift_score')}
     
-    # Call Solar LLM
-    analysis = analyze_failure(
+    # Call Solar LLM (concurrent requests for the same reading share one call)
+    analysis = diagnosis_flight.do(
+        (equipment_id, latest_record['timestamp']),
+        analyze_failure,
         equipment_id,
         latest_record['temp'],
         latest_record['vibration'],
         latest_record['pressure']
     )
+
+    # A failed call ({"error": ...}) is returned but never stored as a diagnosis
+    if "error" not in analysis:
+        latest_record['analysis'] = analysis
+        broker.publish(DIAGNOSES, {"equipment_id": equipment_id, "timestamp": latest_record['timestamp'],
+                                   "analysis": analysis})
     
     return analysis
 
+@app.get("/usage")
+def usage_summary(
+    group_by: List[str] = Query(["day", "equipment_id"]),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    equipment_id: Optional[List[str]] = Query(None),
+):
+    """Solar calls, errors, tokens, cost and latency grouped by day / equipment_id / model"""
+    unknown = [g for g in group_by if g not in USAGE_GROUPS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by {unknown}; use {list(USAGE_GROUPS)}")
+    usage_recorder.flush()
+    return aggregate_usage(filter_usage(usage_log, start, end, equipment_id), group_by)
+
+@app.get("/usage/calls")
+def usage_calls(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    equipment_id: Optional[List[str]] = Query(None),
+):
+    """Per-call usage rows as CSV (the input of `cost_calculator.py --usage`)"""
+    usage_recorder.flush()
+    rows = [tuple(r[c] for c in USAGE_COLUMNS) for r in filter_usage(usage_log, start, end, equipment_id)]
+    return StreamingResponse(usage_csv_chunks([rows]), media_type="text/csv; charset=utf-8",
+                             headers={"Content-Disposition": 'attachment; filename="llm_usage.csv"'})
+
+@app.get("/stream")
+async def stream(request: Request, topic: Optional[List[str]] = Query(None)):
+    """Server-sent events: new readings, failure flags and Solar diagnoses"""
+    sub = broker.subscribe(topic)
+    return StreamingResponse(
+        sse_events(broker, sub, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms, row/token/error counters, queue stats"""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "total_records": len(data_storage)
+        "total_records": len(data_storage),
+        "stream_subscribers": broker.subscriber_count
     }
 
 if __name__ == "__main__":
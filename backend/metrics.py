@@ -0,0 +1,194 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans a sub-millisecond predict up to a slow LLM round trip
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def expose(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self.samples()
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally split by labels: inc(3, source="upload")"""
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram: observe(0.012, stage="predict"), or
+    `with hist.time(stage="predict"):`. One bisect and a lock per observation.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+class StatsCollector:
+    """
+    Exports every numeric value of a stats() dict: keys listed in `counters`
+    (running totals) as a counter <prefix>_<key>_total, the rest as a gauge
+    <prefix>_<key>
+    """
+
+    def __init__(self, prefix, help, stats, counters=()):
+        self.name = prefix
+        self.help = help
+        self.stats = stats
+        self.counters = frozenset(counters)
+
+    def expose(self):
+        for key, value in self.stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                kind = "counter" if key in self.counters else "gauge"
+                name = f"{self.name}_{key}_total" if kind == "counter" else f"{self.name}_{key}"
+                yield f"# HELP {name} {self.help}: {key}"
+                yield f"# TYPE {name} {kind}"
+                yield f"{name} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collect_stats(self, prefix, help, stats, counters=()):
+        """Fold an existing stats() method (ingest, jobs, single-flight) into /metrics"""
+        return self.register(StatsCollector(prefix, help, stats, counters))
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "askup_stage_duration_seconds",
+    "Time spent per pipeline stage (csv_parse, anomaly, predict, db_write, db_query, llm, serialize)",
+    ["stage"],
+)
+ROWS = REGISTRY.counter("askup_rows_total", "Sensor readings processed", ["source"])
+LLM_TOKENS = REGISTRY.counter("askup_llm_tokens_total", "Tokens reported by the LLM API", ["kind"])
+ERRORS = REGISTRY.counter("askup_errors_total", "Failures per pipeline stage", ["stage"])
+
+
+@contextmanager
+def timed(stage):
+    """Time a block into askup_stage_duration_seconds and count it in askup_errors_total if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+
+
+def record_llm_call(equipment_id, analysis, usage):
+    """solar_client usage listener: LLM round trip, tokens and errors"""
+    STAGE_SECONDS.observe(usage["latency_ms"] / 1000, stage="llm")
+    for kind in ("prompt", "completion"):
+        if usage.get(f"{kind}_tokens"):
+            LLM_TOKENS.inc(usage[f"{kind}_tokens"], kind=kind)
+    if isinstance(analysis, dict) and "error" in analysis:
+        ERRORS.inc(stage="llm")
@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, JSON
+from sqlalchemy import Boolean, Column, Integer, Float, String, DateTime, JSON, Index
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
 class VocLog(Base):
     __tablename__ = "voc_logs"
+    # One reading per machine and timestamp; the ON CONFLICT target for upserts
+    __table_args__ = (Index("uq_voc_logs_equipment_timestamp", "equipment_id", "timestamp", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime)
@@ -13,4 +15,34 @@ class VocLog(Base):
     vibration = Column(Float)
     pressure = Column(Float)
     failure_type = Column(Integer)  # 0: Normal, 1: Failure
+    anomaly_score = Column(Float, nullable=True)  # max |z| vs per-equipment EWMA baseline
+    drift_score = Column(Float, nullable=True)  # fast vs slow EWMA gap, in std units
     solar_analysis = Column(JSON, nullable=True) # JSONB in Postgres
+
+
+class DiagnosisJob(Base):
+    __tablename__ = "diagnosis_jobs"
+
+    id = Column(String, primary_key=True)  # uuid hex
+    equipment_id = Column(String, index=True)
+    reading_id = Column(Integer, index=True)  # voc_logs.id that was diagnosed
+    priority = Column(Float)  # XGBoost failure probability
+    status = Column(String)  # queued, running, done, failed
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class UsageLog(Base):
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, index=True)
+    equipment_id = Column(String, index=True)
+    model = Column(String)
+    prompt_tokens = Column(Integer, nullable=True)  # None when the API reported no usage
+    completion_tokens = Column(Integer, nullable=True)
+    total_tokens = Column(Integer, nullable=True)
+    latency_ms = Column(Float)
+    cost_usd = Column(Float, nullable=True)  # at SOLAR_*_COST_PER_1K list price
+    error = Column(Boolean)
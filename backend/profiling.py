@@ -0,0 +1,238 @@
+import asyncio
+import hmac
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))  # 1 in N requests; 0 = off
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+# Never sampled: long-lived streams and the scrape / probe endpoints
+EXCLUDED_PATHS = ("/stream", "/metrics", "/health")
+
+# Responses that never end; profiling is abandoned and they pass through
+STREAMING_MEDIA_TYPES = (b"text/event-stream",)
+
+# What _profile names its files; _store only ever prunes these
+PROFILE_FILE = re.compile(r"^\d{8}-\d{6}-\d{6}_[A-Z]+_\w+\.(txt|speedscope\.json)$")
+
+# A thread whose innermost Python frame is in one of these is parked, not working
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "base_events.py", "thread.py")
+
+_sampler_idents = set()
+
+
+class StackSampler(threading.Thread):
+    """
+    Wall-clock sampling profiler over every thread in the process.
+
+    Samples sys._current_frames() every `interval` seconds, so it sees both
+    async handlers on the event loop and sync handlers in the threadpool.
+    Idle threads are skipped; concurrent requests do show up in the profile.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL_MS / 1000, max_seconds=PROFILE_MAX_SECONDS):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples = defaultdict(list)  # thread ident -> [(stack, weight_s)]
+        self.thread_names = {}
+        self.started = None
+        self.elapsed = 0.0
+        self._halt = threading.Event()  # Thread already has a _stop()
+
+    def run(self):
+        _sampler_idents.add(self.ident)
+        try:
+            self.started = last = time.perf_counter()
+            while not self._halt.wait(self.interval):
+                now = time.perf_counter()
+                self._sample(now - last)
+                last = now
+                if now - self.started > self.max_seconds:
+                    break
+            self.elapsed = time.perf_counter() - self.started
+        finally:
+            _sampler_idents.discard(self.ident)
+
+    def _sample(self, weight):
+        for ident, frame in sys._current_frames().items():
+            if ident in _sampler_idents or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            self.samples[ident].append((tuple(reversed(stack)), weight))
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        self.thread_names = {ident: names.get(ident, str(ident)) for ident in self.samples}
+
+    def speedscope(self, name):
+        """speedscope.app "sampled" profile, one profile per thread"""
+        frames, index = [], {}
+        profiles = []
+        for ident, samples in sorted(self.samples.items(), key=lambda s: -len(s[1])):
+            stacks = []
+            for stack, _ in samples:
+                ids = []
+                for key in stack:
+                    if key not in index:
+                        index[key] = len(frames)
+                        frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                    ids.append(index[key])
+                stacks.append(ids)
+            weights = [w for _, w in samples]
+            profiles.append({
+                "type": "sampled", "name": self.thread_names.get(ident, str(ident)), "unit": "seconds",
+                "startValue": 0, "endValue": sum(weights), "samples": stacks, "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name, "exporter": "askup-profiling", "activeProfileIndex": 0,
+            "shared": {"frames": frames}, "profiles": profiles,
+        }
+
+    def collapsed(self):
+        """Brendan Gregg collapsed stacks (flamegraph.pl / speedscope), weights in ms"""
+        totals = Counter()
+        for ident, samples in self.samples.items():
+            thread = self.thread_names.get(ident, str(ident))
+            for stack, weight in samples:
+                path = ";".join([thread] + [f"{n} ({Path(f).name}:{l})" for n, f, l in stack])
+                totals[path] += weight * 1000
+        return "".join(f"{path} {round(ms)}\n" for path, ms in totals.most_common())
+
+
+def _render(sampler, fmt, name):
+    if fmt == "collapsed":
+        return sampler.collapsed().encode(), "text/plain; charset=utf-8", "txt"
+    return json.dumps(sampler.speedscope(name)).encode(), "application/json", "speedscope.json"
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in request profiling (pure ASGI, so streaming responses are untouched).
+
+    On demand: send `X-Profile: <PROFILE_ADMIN_TOKEN>` (or `?profile=<token>`).
+    The response is replaced by the profile (speedscope JSON, or collapsed
+    stacks with `X-Profile-Format: collapsed` / `?profile_format=collapsed`).
+    Add `X-Profile-Output: store` (`?profile_output=store`) to keep the normal
+    response and write the profile to PROFILE_DIR instead.
+
+    Sampled: with PROFILE_SAMPLE_EVERY=N, 1 in N requests is profiled to
+    PROFILE_DIR, which keeps the newest PROFILE_KEEP profiles (other files
+    there are left alone).
+
+    Event streams (SSE, e.g. /stream) are never profiled: once the response
+    turns out to be one, sampling stops and it passes through untouched,
+    marked `X-Profile-Skipped: streaming`.
+    """
+
+    def __init__(self, app, token=None, sample_every=None, directory=None, keep=None):
+        self.app = app
+        self.token = PROFILE_ADMIN_TOKEN if token is None else token
+        self.sample_every = PROFILE_SAMPLE_EVERY if sample_every is None else sample_every
+        self.directory = Path(directory or PROFILE_DIR)
+        self.keep = PROFILE_KEEP if keep is None else keep
+        self._counter = itertools.count(1)
+
+    def _options(self, scope):
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        query = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()}
+        return {
+            "token": headers.get("x-profile", query.get("profile")),
+            "format": headers.get("x-profile-format", query.get("profile_format", "speedscope")),
+            "output": headers.get("x-profile-output", query.get("profile_output", "inline")),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        options = self._options(scope)
+        if options["token"] is not None:
+            if not self.token or not hmac.compare_digest(options["token"].encode(), self.token.encode()):
+                return await _respond(send, 403, b'{"detail":"Invalid profiling token"}', "application/json")
+            return await self._profile(scope, receive, send, options["format"], options["output"] != "store")
+
+        if (self.sample_every and not scope["path"].startswith(EXCLUDED_PATHS)
+                and next(self._counter) % self.sample_every == 0):
+            return await self._profile(scope, receive, send, "speedscope", inline=False)
+        return await self.app(scope, receive, send)
+
+    async def _profile(self, scope, receive, send, fmt, inline):
+        name = f"{scope['method']} {scope['path']}"
+        filename = None
+        status = {}
+
+        async def send_through(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                if _is_streaming(headers):
+                    status["streaming"] = True
+                    sampler.stop()
+                    message = {**message, "headers": headers + [(b"x-profile-skipped", b"streaming")]}
+                elif not inline:
+                    message = {**message, "headers": headers + [(b"x-profile-file", filename.encode())]}
+            if not inline or status.get("streaming"):
+                await send(message)
+
+        if not inline:
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+            filename = f"{stamp}_{scope['method']}_{slug}.{'txt' if fmt == 'collapsed' else 'speedscope.json'}"
+
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_through)
+        finally:
+            sampler.stop()
+        if status.get("streaming"):
+            return
+
+        body, media_type, extension = await asyncio.to_thread(_render, sampler, fmt, name)
+        if inline:
+            headers = [(b"content-disposition", f'attachment; filename="profile.{extension}"'.encode()),
+                       (b"x-profiled-status", str(status.get("code", 500)).encode()),
+                       (b"x-profile-duration-ms", f"{sampler.elapsed * 1000:.1f}".encode())]
+            await _respond(send, 200, body, media_type, headers)
+        else:
+            await asyncio.to_thread(self._store, filename, body)
+
+    def _store(self, filename, body):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / filename).write_bytes(body)
+        files = sorted((p for p in self.directory.iterdir() if PROFILE_FILE.match(p.name)), key=lambda p: p.name)
+        for old in files[:max(0, len(files) - self.keep)]:
+            old.unlink(missing_ok=True)
+
+
+def _is_streaming(headers):
+    content_type = next((v for k, v in headers if k.lower() == b"content-type"), b"")
+    return content_type.split(b";")[0].strip().lower() in STREAMING_MEDIA_TYPES
+
+
+async def _respond(send, status, body, media_type, headers=()):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", media_type.encode()),
+                            (b"content-length", str(len(body)).encode()), *headers]})
+    await send({"type": "http.response.body", "body": body})
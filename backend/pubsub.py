@@ -0,0 +1,109 @@
+import asyncio
+import json
+import threading
+
+READINGS = "readings"
+FAILURES = "failures"
+DIAGNOSES = "diagnoses"
+
+TOPICS = (READINGS, FAILURES, DIAGNOSES)
+
+
+class Subscription:
+    """One client's bounded mailbox. Lives on the event loop that created it."""
+
+    def __init__(self, topics, maxsize, loop):
+        self.topics = set(topics) if topics else None
+        self.queue = asyncio.Queue(maxsize)
+        self.loop = loop
+        self.dropped = 0
+
+    def wants(self, topic):
+        return self.topics is None or topic in self.topics
+
+    def offer(self, message):
+        # Never block the publisher: a full mailbox loses its oldest message,
+        # so a slow client falls behind on history but still sees the latest state.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class Broker:
+    """In-process pub/sub fan-out to per-client bounded queues"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.published = 0
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, topics=None, maxsize=None):
+        """Register a client. Must be called from the event loop that will consume it."""
+        sub = Subscription(topics, maxsize or self.maxsize, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscriptions.discard(sub)
+
+    def publish(self, topic, payload):
+        """
+        Publish a JSON-serializable payload. Safe to call from the event loop
+        or from worker threads (sync endpoints); never blocks on slow clients.
+        """
+        with self._lock:
+            subscribers = [s for s in self._subscriptions if s.wants(topic)]
+        self.published += 1
+        if not subscribers:
+            return
+
+        # Serialize once, not once per client
+        message = (topic, json.dumps(payload, ensure_ascii=False, default=str))
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+
+        for sub in subscribers:
+            if sub.loop is current:
+                sub.offer(message)
+            elif not sub.loop.is_closed():
+                sub.loop.call_soon_threadsafe(sub.offer, message)
+
+    def publish_records(self, topic, records, chunk_size=500):
+        """Publish a list of row dicts as one message per chunk"""
+        for start in range(0, len(records), chunk_size):
+            self.publish(topic, records[start:start + chunk_size])
+
+
+async def sse_events(broker, sub, request, keepalive=15.0):
+    """Render a subscription as a text/event-stream body"""
+    reported_drops = 0
+    try:
+        while not await request.is_disconnected():
+            try:
+                topic, data = await sub.get(timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if sub.dropped != reported_drops:
+                yield f"event: dropped\ndata: {json.dumps({'count': sub.dropped - reported_drops})}\n\n"
+                reported_drops = sub.dropped
+            yield f"event: {topic}\ndata: {data}\n\n"
+    finally:
+        broker.unsubscribe(sub)
+
+
+broker = Broker()
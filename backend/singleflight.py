@@ -0,0 +1,63 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight block until it finishes and receive the same result (or
+    exception). Nothing is cached afterwards: the next call runs again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    # stats() keys that only ever grow (exported as Prometheus counters)
+    COUNTER_STATS = ("executed", "coalesced")
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._calls)
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": in_flight}
+
+
+# Shared by the synchronous /analyze/{equipment_id} path and the diagnosis job workers
+diagnosis_flight = SingleFlight()
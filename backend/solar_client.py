@@ -1,18 +1,39 @@
 import os
+import time
+import logging
 import requests
 import json
 
-SOLAR_API_KEY = os.getenv("SOLAR_API_KEY")
-SOLAR_API_URL = "https://api.upstage.ai/v1/solar/chat/completions"
+SOLAR_API_URL = os.getenv("SOLAR_API_URL", "https://api.upstage.ai/v1/solar/chat/completions")
+SOLAR_MODEL = os.getenv("SOLAR_MODEL", "solar-1-mini-chat")
+SOLAR_TIMEOUT_S = float(os.getenv("SOLAR_TIMEOUT_S", "30"))
+# List price, USD per 1K tokens
+SOLAR_INPUT_COST_PER_1K = float(os.getenv("SOLAR_INPUT_COST_PER_1K", "0.00015"))
+SOLAR_OUTPUT_COST_PER_1K = float(os.getenv("SOLAR_OUTPUT_COST_PER_1K", "0.0006"))
 
-def analyze_failure(equipment_id, temp, vibration, pressure):
-    if not SOLAR_API_KEY:
-        return {
-            "error": "SOLAR_API_KEY not found",
-            "analysis": "API Key missing. Cannot perform LLM analysis."
-        }
+SYSTEM_PROMPT = "You are a helpful industrial maintenance assistant."
+
+logger = logging.getLogger(__name__)
+
+# Callables(equipment_id, analysis, usage) notified after every diagnosis (metrics, usage logging)
+_usage_listeners = []
+
+def add_usage_listener(listener):
+    if listener not in _usage_listeners:
+        _usage_listeners.append(listener)
+
+def _notify(equipment_id, analysis, usage):
+    for listener in _usage_listeners:
+        try:
+            listener(equipment_id, analysis, usage)
+        except Exception:
+            logger.exception("Usage listener failed")
 
-    prompt = f"""
+# Reused across calls so repeated diagnoses keep their TLS connection alive
+_session = requests.Session()
+
+def build_prompt(equipment_id, temp, vibration, pressure):
+    return f"""
     당신은 제조 설비 전문가입니다. 다음 센서 데이터를 바탕으로 장비의 상태를 분석하고 고장 유형과 원인을 추론해주세요.
     
     장비 ID: {equipment_id}
@@ -27,33 +48,82 @@ def analyze_failure(equipment_id, temp, vibration, pressure):
         "recommendation": "조치 사항 (한글)"
     }}
     """
-    
+
+def parse_analysis(content):
+    # Try to parse JSON from content
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        # Fallback if LLM doesn't return pure JSON
+        return {"raw_analysis": content}
+
+def diagnosis_messages(equipment_id, temp, vibration, pressure):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_prompt(equipment_id, temp, vibration, pressure)}
+    ]
+
+def chat(messages, url=None, model=None, api_key=None, temperature=0.1):
+    """
+    POST one chat completion to Solar and return (content, usage).
+
+    Raises on HTTP / network errors; usage holds the model and the token
+    counts reported by the API.
+    """
     headers = {
-        "Authorization": f"Bearer {SOLAR_API_KEY}",
+        "Authorization": f"Bearer {api_key or os.getenv('SOLAR_API_KEY')}",
         "Content-Type": "application/json"
     }
-    
+
     data = {
-        "model": "solar-1-mini-chat",
-        "messages": [
-            {"role": "system", "content": "You are a helpful industrial maintenance assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.1
+        "model": model or SOLAR_MODEL,
+        "messages": messages,
+        "temperature": temperature
     }
-    
+
+    response = _session.post(url or SOLAR_API_URL, headers=headers, json=data, timeout=SOLAR_TIMEOUT_S)
+    response.raise_for_status()
+    result = response.json()
+    usage = dict(result.get("usage") or {})
+    usage["model"] = result.get("model", data["model"])
+    return result['choices'][0]['message']['content'], usage
+
+def diagnose(equipment_id, temp, vibration, pressure):
+    """
+    Call Solar and return (analysis, usage).
+
+    usage holds the model, prompt/completion/total tokens reported by the API,
+    their cost_usd at list price and the measured round-trip latency_ms
+    (tokens and cost are None if the API reported no usage, and zero when no
+    request was sent because SOLAR_API_KEY is missing). Listeners are notified
+    either way, so failed calls show up in metrics and the usage log.
+    """
+    api_key = os.getenv("SOLAR_API_KEY")
+    usage = {"model": SOLAR_MODEL, "prompt_tokens": None, "completion_tokens": None,
+             "total_tokens": None, "latency_ms": 0.0, "cost_usd": None}
+    if not api_key:
+        analysis = {
+            "error": "SOLAR_API_KEY not found",
+            "analysis": "API Key missing. Cannot perform LLM analysis."
+        }
+        usage.update(prompt_tokens=0, completion_tokens=0, total_tokens=0, cost_usd=0.0)
+        _notify(equipment_id, analysis, usage)
+        return analysis, usage
+
+    started = time.perf_counter()
     try:
-        response = requests.post(SOLAR_API_URL, headers=headers, json=data)
-        response.raise_for_status()
-        result = response.json()
-        content = result['choices'][0]['message']['content']
-        
-        # Try to parse JSON from content
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback if LLM doesn't return pure JSON
-            return {"raw_analysis": content}
-            
+        content, reported = chat(diagnosis_messages(equipment_id, temp, vibration, pressure), api_key=api_key)
+        usage.update({k: v for k, v in reported.items() if k in usage})
+        if usage["prompt_tokens"] is not None:
+            usage["cost_usd"] = (usage["prompt_tokens"] * SOLAR_INPUT_COST_PER_1K
+                                 + (usage["completion_tokens"] or 0) * SOLAR_OUTPUT_COST_PER_1K) / 1000
+        analysis = parse_analysis(content)
     except Exception as e:
-        return {"error": str(e)}
+        analysis = {"error": str(e)}
+    usage["latency_ms"] = (time.perf_counter() - started) * 1000
+    _notify(equipment_id, analysis, usage)
+    return analysis, usage
+
+def analyze_failure(equipment_id, temp, vibration, pressure):
+    analysis, _ = diagnose(equipment_id, temp, vibration, pressure)
+    return analysis
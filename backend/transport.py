@@ -0,0 +1,188 @@
+import gzip
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+MEDIA_TYPES = (ARROW_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, JSON_MEDIA_TYPE)
+
+
+def _parse_header(value):
+    """Parse an Accept/Accept-Encoding header into tokens ordered by q-value"""
+    tokens = []
+    for i, part in enumerate((value or "").split(",")):
+        fields = [f.strip() for f in part.split(";")]
+        if not fields[0]:
+            continue
+        q = 1.0
+        for field in fields[1:]:
+            if field.startswith("q="):
+                try:
+                    q = float(field[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            tokens.append((-q, i, fields[0].lower()))
+    return [token for _, _, token in sorted(tokens)]
+
+
+def _zstd_available():
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def negotiate_media_type(accept):
+    """Pick the response format from the Accept header (JSON if nothing matches)"""
+    for token in _parse_header(accept):
+        if token in MEDIA_TYPES:
+            return token
+    return JSON_MEDIA_TYPE
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick zstd or gzip from the Accept-Encoding header, or None for identity"""
+    for token in _parse_header(accept_encoding):
+        if token == "zstd" and _zstd_available():
+            return "zstd"
+        if token == "gzip":
+            return "gzip"
+    return None
+
+
+def compact_frame(df):
+    """Narrow dtypes before binary encoding: categorical ids, int8 labels, JSON-text analyses"""
+    df = df.copy()
+    if "equipment_id" in df:
+        df["equipment_id"] = df["equipment_id"].astype("category")
+    if "timestamp" in df:
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+    if "failure_type" in df and not df["failure_type"].isna().any():
+        df["failure_type"] = df["failure_type"].astype(np.int8)
+    if "analysis" in df:
+        df["analysis"] = df["analysis"].map(
+            lambda a: None if a is None else json.dumps(a, ensure_ascii=False)
+        )
+    return df
+
+
+def _encode_json(df):
+    if df.empty:
+        return b'{"data": []}'
+    records = df.to_json(orient="records", date_format="iso", force_ascii=False)
+    return b'{"data": ' + records.encode("utf-8") + b"}"
+
+
+def _encode_arrow(df):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(compact_frame(df), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _encode_msgpack(df):
+    import msgpack
+
+    df = compact_frame(df)
+    columns = {}
+    for name in df.columns:
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            columns[name] = {
+                "kind": "category",
+                "categories": col.cat.categories.tolist(),
+                "codes": np.ascontiguousarray(col.cat.codes.to_numpy()).tobytes(),
+                "dtype": col.cat.codes.dtype.str,
+            }
+        elif pd.api.types.is_datetime64_any_dtype(col):
+            columns[name] = {
+                "kind": "datetime",
+                "data": col.to_numpy(dtype="datetime64[ns]").view(np.int64).tobytes(),
+                "dtype": "<i8",
+            }
+        elif pd.api.types.is_numeric_dtype(col) and col.dtype != object:
+            arr = np.ascontiguousarray(col.to_numpy())
+            columns[name] = {"kind": "numeric", "data": arr.tobytes(), "dtype": arr.dtype.str}
+        else:
+            columns[name] = {"kind": "object", "data": col.where(col.notna(), None).tolist()}
+    return msgpack.packb({"columns": list(df.columns), "data": columns}, use_bin_type=True)
+
+
+def encode_frame(df, media_type):
+    """Serialize a DataFrame as JSON rows, an Arrow IPC stream or columnar msgpack"""
+    if media_type == ARROW_MEDIA_TYPE:
+        return _encode_arrow(df)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return _encode_msgpack(df)
+    return _encode_json(df)
+
+
+def compress(body, encoding):
+    if encoding == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=5)
+    return body
+
+
+def decompress(body, encoding):
+    if encoding == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    return body
+
+
+def decode_frame(body, media_type):
+    """Inverse of encode_frame (expects an already-decompressed body)"""
+    if media_type.startswith(ARROW_MEDIA_TYPE):
+        import pyarrow as pa
+
+        with pa.ipc.open_stream(io.BytesIO(body)) as reader:
+            return reader.read_pandas()
+
+    if media_type.startswith(MSGPACK_MEDIA_TYPE):
+        import msgpack
+
+        payload = msgpack.unpackb(body, raw=False)
+        data = {}
+        for name in payload["columns"]:
+            col = payload["data"][name]
+            if col["kind"] == "category":
+                codes = np.frombuffer(col["codes"], dtype=col["dtype"])
+                data[name] = pd.Categorical.from_codes(codes, categories=col["categories"])
+            elif col["kind"] == "datetime":
+                data[name] = np.frombuffer(col["data"], dtype=col["dtype"]).view("datetime64[ns]")
+            elif col["kind"] == "numeric":
+                data[name] = np.frombuffer(col["data"], dtype=col["dtype"])
+            else:
+                data[name] = col["data"]
+        return pd.DataFrame(data, columns=payload["columns"])
+
+    return pd.DataFrame(json.loads(body).get("data", []))
+
+
+def frame_response(df, request):
+    """Build a content-negotiated, optionally compressed Response for a DataFrame"""
+    from fastapi import Response
+
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    body = compress(encode_frame(df, media_type), encoding)
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
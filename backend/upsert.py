@@ -0,0 +1,157 @@
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Boolean, Column, MetaData, Table, and_, exists, func, or_, select, true
+
+from backend import models
+
+UPSERT_COLUMNS = ["timestamp", "equipment_id", "temp", "vibration", "pressure", "failure_type",
+                  "anomaly_score", "drift_score"]
+KEY_COLUMNS = ["equipment_id", "timestamp"]
+# A re-sent reading only counts as changed when what was measured changed;
+# anomaly/drift scores depend on detector state at ingest time
+COMPARED_COLUMNS = ["temp", "vibration", "pressure", "failure_type"]
+SCORE_COLUMNS = ["anomaly_score", "drift_score"]
+# Optional df column: True where failure_type came from the model, not the source
+PREDICTED_COLUMN = "label_predicted"
+STAGING_COLUMNS = UPSERT_COLUMNS + [PREDICTED_COLUMN]
+
+_voc_logs = models.VocLog.__table__
+
+# Per-connection scratch table: batches land here (COPY on PostgreSQL), then
+# one INSERT ... SELECT ... ON CONFLICT merges them into voc_logs
+staging = Table(
+    "voc_logs_staging", MetaData(),
+    *[Column(name, _voc_logs.c[name].type) for name in UPSERT_COLUMNS],
+    Column(PREDICTED_COLUMN, Boolean),
+    prefixes=["TEMPORARY"],
+)
+
+_key_match = (_voc_logs.c.equipment_id == staging.c.equipment_id) & (_voc_logs.c.timestamp == staging.c.timestamp)
+
+
+def _insert(dialect):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert ingest supports PostgreSQL and SQLite, not {dialect}")
+    return insert
+
+
+def _copy_to_staging(conn, df):
+    """PostgreSQL COPY of the batch into the staging table"""
+    buffer = io.StringIO()
+    df[STAGING_COLUMNS].to_csv(buffer, index=False, header=False, na_rep="", quoting=csv.QUOTE_MINIMAL)
+    buffer.seek(0)
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {staging.name} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _executemany_to_staging(conn, df):
+    """SQLite: plain DB-API executemany, with timestamps in SQLAlchemy's DateTime storage format"""
+    rows = df[STAGING_COLUMNS].assign(timestamp=df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S.%f"))
+    rows = rows.astype(object).where(rows.notna(), None)
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        cursor.executemany(
+            f"INSERT INTO {staging.name} ({', '.join(STAGING_COLUMNS)}) VALUES ({', '.join('?' * len(STAGING_COLUMNS))})",
+            rows.itertuples(index=False, name=None),
+        )
+    finally:
+        cursor.close()
+
+
+def _stage(conn, batch):
+    """Replace the staging contents with `batch`; predicted labels take the stored label"""
+    conn.execute(staging.delete())
+    if conn.dialect.name == "postgresql":
+        _copy_to_staging(conn, batch)
+    else:
+        _executemany_to_staging(conn, batch)
+    stored_label = select(_voc_logs.c.failure_type).where(_key_match).scalar_subquery()
+    conn.execute(staging.update().where(staging.c[PREDICTED_COLUMN] & exists().where(_key_match))
+                 .values(failure_type=stored_label))
+
+
+def _fresh_keys(conn):
+    """Staged (equipment_id, timestamp) keys that are new or differ from the stored reading"""
+    identical = and_(_key_match, *[_voc_logs.c[name].is_not_distinct_from(staging.c[name])
+                                   for name in COMPARED_COLUMNS])
+    return set(map(tuple, conn.execute(select(staging.c.equipment_id, staging.c.timestamp)
+                                       .where(~exists().where(identical)))))
+
+
+def _key_mask(df, keys):
+    """Rows of df whose (equipment_id, timestamp) is in keys (a set of plain tuples)"""
+    if not keys:
+        return np.zeros(len(df), dtype=bool)
+    wanted = pd.MultiIndex.from_tuples(list(keys), names=KEY_COLUMNS)
+    return pd.MultiIndex.from_frame(df[KEY_COLUMNS]).isin(wanted)
+
+
+def upsert_readings(conn, df, score=None):
+    """
+    Idempotent bulk ingest keyed on (equipment_id, timestamp).
+
+    New readings are inserted; readings whose sensor values or label changed
+    are updated in place (keeping id and any Solar diagnosis); identical
+    re-sends and in-batch duplicates are skipped without a write. Where the
+    optional label_predicted column is True, failure_type came from the model
+    and never replaces a stored label. The caller commits.
+
+    Args:
+        conn: SQLAlchemy Connection (e.g. Session.connection())
+        df: DataFrame with UPSERT_COLUMNS (scores optional), timestamp as datetime
+        score: Optional callable(DataFrame) -> DataFrame with SCORE_COLUMNS
+            (e.g. detector.update). Only new or changed readings are scored, in
+            timestamp order, and their scores are written into df in place, so
+            re-sent readings never reach the detector twice.
+
+    Returns:
+        ({"inserted": n, "updated": n, "skipped": n}, boolean mask of df rows
+        that were inserted or updated)
+    """
+    insert = _insert(conn.dialect.name)
+    for name in SCORE_COLUMNS:
+        if name not in df:
+            df[name] = np.nan
+    latest = ~df.duplicated(KEY_COLUMNS, keep="last")
+    batch = df[latest].assign(**{PREDICTED_COLUMN: df[PREDICTED_COLUMN] if PREDICTED_COLUMN in df else False})
+
+    staging.create(conn, checkfirst=True)
+    _stage(conn, batch)
+    inserted = conn.execute(
+        select(func.count()).select_from(staging).where(~exists().where(_key_match))
+    ).scalar()
+
+    if score is not None:
+        # Score only what will be written, then stage just those rows with their scores.
+        # Rows that already carry scores (a retried write) are not fed to the detector again.
+        fresh = batch[_key_mask(batch, _fresh_keys(conn))]
+        unscored = fresh[fresh["anomaly_score"].isna()].sort_values("timestamp", kind="stable")
+        if len(unscored):
+            scores = score(unscored)
+            df.loc[unscored.index, SCORE_COLUMNS] = scores[SCORE_COLUMNS].to_numpy()
+        batch = fresh.assign(**{name: df.loc[fresh.index, name] for name in SCORE_COLUMNS})
+        _stage(conn, batch)
+
+    # WHERE true: SQLite needs it to parse INSERT ... SELECT ... ON CONFLICT
+    stmt = insert(_voc_logs).from_select(UPSERT_COLUMNS,
+                                         select(*[staging.c[name] for name in UPSERT_COLUMNS]).where(true()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={name: stmt.excluded[name] for name in UPSERT_COLUMNS if name not in KEY_COLUMNS},
+        where=or_(*[_voc_logs.c[name].is_distinct_from(stmt.excluded[name]) for name in COMPARED_COLUMNS]),
+    ).returning(_voc_logs.c.equipment_id, _voc_logs.c.timestamp)
+    written = set(map(tuple, conn.execute(stmt)))
+    conn.execute(staging.delete())
+
+    counts = {"inserted": inserted, "updated": len(written) - inserted, "skipped": len(df) - len(written)}
+    return counts, latest.to_numpy() & _key_mask(df, written)
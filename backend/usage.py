@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+USAGE_FLUSH_ROWS = int(os.getenv("USAGE_FLUSH_ROWS", "500"))
+USAGE_FLUSH_INTERVAL_S = float(os.getenv("USAGE_FLUSH_INTERVAL_S", "5"))
+USAGE_MAX_PENDING = int(os.getenv("USAGE_MAX_PENDING", "100000"))
+
+logger = logging.getLogger(__name__)
+
+USAGE_COLUMNS = ["created_at", "equipment_id", "model", "prompt_tokens", "completion_tokens", "total_tokens",
+                 "latency_ms", "cost_usd", "error"]
+
+# /usage group_by keys; "day" is the calendar day of created_at
+USAGE_GROUPS = ("day", "equipment_id", "model")
+
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def usage_row(equipment_id, analysis, usage):
+    """One llm_usage row from a solar_client usage listener call"""
+    return {
+        "created_at": datetime.now(),
+        "equipment_id": equipment_id,
+        "model": usage.get("model"),
+        **{field: usage.get(field) for field in TOKEN_FIELDS},
+        "latency_ms": usage.get("latency_ms", 0.0),
+        "cost_usd": usage.get("cost_usd"),
+        "error": isinstance(analysis, dict) and "error" in analysis,
+    }
+
+
+class UsageRecorder:
+    """
+    Buffers one row per Solar call and persists them in bulk.
+
+    record() is the solar_client usage listener; it runs on whichever thread
+    made the call and only appends under a lock. A task on the event loop
+    hands the buffer to write() (in a thread) every flush_interval_s, or as
+    soon as flush_rows are pending.
+
+    Args:
+        write: Sync callable(list of row dicts) persisting one batch
+        flush_rows: Flush early once this many rows are pending
+        flush_interval_s: ... otherwise flush this often
+        max_pending: Rows kept while writes fail; newer rows are dropped beyond it
+    """
+
+    def __init__(self, write, flush_rows=USAGE_FLUSH_ROWS, flush_interval_s=USAGE_FLUSH_INTERVAL_S,
+                 max_pending=USAGE_MAX_PENDING):
+        self.write = write
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self.max_pending = max_pending
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one write at a time, in order
+        self._loop = None
+        self._wake = None
+        self._task = None
+
+        self.rows_recorded = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.write_errors = 0
+        self.dropped_rows = 0
+
+    def record(self, equipment_id, analysis, usage):
+        row = usage_row(equipment_id, analysis, usage)
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped_rows += 1
+                return
+            self._pending.append(row)
+            self.rows_recorded += 1
+            full = len(self._pending) >= self.flush_rows
+        if full and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def flush(self):
+        """Write everything pending now; on failure the rows stay queued for the next flush"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            try:
+                self.write(rows)
+            except Exception:
+                self.write_errors += 1
+                logger.exception("Usage flush of %d rows failed; keeping them for the next flush", len(rows))
+                with self._lock:
+                    self._pending[:0] = rows[:max(0, self.max_pending - len(self._pending))]
+                return 0
+            self.rows_written += len(rows)
+            self.flushes += 1
+            return len(rows)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+        await asyncio.to_thread(self.flush)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await asyncio.to_thread(self.flush)
+
+    # stats() keys that only ever grow (exported as Prometheus counters)
+    COUNTER_STATS = ("rows_recorded", "rows_written", "flushes", "write_errors", "dropped_rows")
+
+    def stats(self):
+        return {
+            "pending_rows": len(self._pending),
+            "rows_recorded": self.rows_recorded,
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "write_errors": self.write_errors,
+            "dropped_rows": self.dropped_rows,
+        }
+
+
+def _number(value):
+    return 0.0 if value is None or pd.isna(value) else float(value)
+
+
+def summary_row(calls, errors, prompt_tokens, completion_tokens, total_tokens, cost_usd, latency_ms_mean,
+                latency_ms_max):
+    """One /usage group (or the totals), JSON-ready; NULL / NaN sums count as 0"""
+    return {
+        "calls": int(_number(calls)),
+        "errors": int(_number(errors)),
+        "prompt_tokens": int(_number(prompt_tokens)),
+        "completion_tokens": int(_number(completion_tokens)),
+        "total_tokens": int(_number(total_tokens)),
+        "cost_usd": round(_number(cost_usd), 6),
+        "latency_ms_mean": round(_number(latency_ms_mean), 1),
+        "latency_ms_max": round(_number(latency_ms_max), 1),
+    }
+
+
+def filter_usage(rows, start=None, end=None, equipment_ids=None):
+    """In-memory usage rows in [start, end) for the given equipment"""
+    wanted = set(equipment_ids) if equipment_ids else None
+    return [r for r in rows
+            if (wanted is None or r["equipment_id"] in wanted)
+            and (start is None or r["created_at"] >= start) and (end is None or r["created_at"] < end)]
+
+
+def aggregate_usage(rows, group_by):
+    """
+    /usage over in-memory rows (main_simple); main.py aggregates in SQL.
+
+    Returns:
+        {"group_by": [...], "groups": [{key: value, ..., **summary_row}], "totals": summary_row}
+    """
+    df = pd.DataFrame(rows, columns=USAGE_COLUMNS)
+    df["day"] = pd.to_datetime(df["created_at"]).dt.strftime("%Y-%m-%d")
+    df["error"] = df["error"].astype(bool)
+
+    def summarize(frame):
+        return summary_row(len(frame), frame["error"].sum(), *(frame[f].sum() for f in TOKEN_FIELDS),
+                           frame["cost_usd"].sum(), frame["latency_ms"].mean(), frame["latency_ms"].max())
+
+    groups = []
+    if group_by and len(df):
+        for key, frame in df.groupby(list(group_by), sort=True, dropna=False):
+            key = key if isinstance(key, tuple) else (key,)
+            groups.append({**dict(zip(group_by, key)), **summarize(frame)})
+    return {"group_by": list(group_by), "groups": groups, "totals": summarize(df)}
+
+
+def usage_csv_chunks(batches):
+    """Per-call usage as CSV, one chunk per batch of row tuples in USAGE_COLUMNS order"""
+    yield (",".join(USAGE_COLUMNS) + "\n").encode()
+    for rows in batches:
+        frame = pd.DataFrame(rows, columns=USAGE_COLUMNS)
+        yield frame.to_csv(header=False, index=False, date_format="%Y-%m-%d %H:%M:%S.%f").encode()
@@ -1,14 +1,21 @@
-import xgboost as xgb
 import pandas as pd
 import numpy as np
 import os
+import threading
+
+from backend.features import FEATURE_COLUMNS, FeatureState, build_features
+from backend.metrics import timed
 
 class FailurePredictor:
     def __init__(self):
         self.model = None
         self.model_path = "xgboost_model.json"
+        self.feature_state = FeatureState()
+        self._load_lock = threading.Lock()
         
     def train_dummy_model(self):
+        import xgboost as xgb  # ~2s to import, so only when a model is actually needed
+
         # Create some dummy data for training if no model exists
         # Features: temp, vibration, pressure
         X = np.array([
@@ -22,7 +29,29 @@ class FailurePredictor:
         self.model.save_model(self.model_path)
         print("Dummy model trained and saved.")
 
+    def train(self, history):
+        """
+        Train on labelled history (timestamp, equipment_id, temp, vibration,
+        pressure, failure_type) using per-equipment trend features.
+        """
+        import xgboost as xgb
+
+        X = build_features(history)
+        y = history["failure_type"].astype(int).to_numpy()
+
+        self.model = xgb.XGBClassifier(eval_metric='logloss')
+        self.model.fit(X[FEATURE_COLUMNS], y)
+        self.model.save_model(self.model_path)
+        self.feature_state = FeatureState()
+        print(f"Trend-feature model trained on {len(history)} rows and saved.")
+
+    @property
+    def uses_trend_features(self):
+        return self.model is not None and self.model.get_booster().feature_names == FEATURE_COLUMNS
+
     def load_model(self):
+        import xgboost as xgb
+
         if os.path.exists(self.model_path):
             self.model = xgb.XGBClassifier()
             self.model.load_model(self.model_path)
@@ -30,12 +59,65 @@ class FailurePredictor:
             print("Model not found. Training dummy model...")
             self.train_dummy_model()
 
+    def _ensure_model(self):
+        if self.model is None:
+            with self._load_lock:
+                if self.model is None:
+                    self.load_model()
+
+    def warm_up(self):
+        """Import xgboost and load the model ahead of the first prediction"""
+        try:
+            self._ensure_model()
+        except Exception as e:
+            print(f"Model warm-up failed (will retry on first prediction): {e}")
+
     def predict(self, temp, vibration, pressure):
-        if not self.model:
-            self.load_model()
+        self._ensure_model()
             
-        data = np.array([[temp, vibration, pressure]])
-        prediction = self.model.predict(data)
+        with timed("predict"):
+            data = np.array([[temp, vibration, pressure]])
+            if self.uses_trend_features:
+                # No history for a lone reading: trend features are left missing
+                data = pd.DataFrame(np.nan, index=[0], columns=FEATURE_COLUMNS, dtype=np.float32)
+                data[["temp", "vibration", "pressure"]] = [[temp, vibration, pressure]]
+            prediction = self.model.predict(data)
         return int(prediction[0])
 
+    def predict_batch(self, df):
+        """
+        Vectorized predict over a batch of readings. A trend-feature model keeps
+        per-machine window state between calls, so batches must arrive in order.
+        """
+        self._ensure_model()
+
+        with timed("predict"):
+            if self.uses_trend_features:
+                data = self.feature_state.transform(df)
+            else:
+                data = df[["temp", "vibration", "pressure"]].to_numpy(dtype=np.float64)
+            return self.model.predict(data).astype(int)
+
+    def failure_risk(self, df):
+        """
+        Failure probability per reading, without touching the streaming state.
+        For a trend-feature model, df should include the recent history it needs.
+        """
+        self._ensure_model()
+
+        with timed("predict"):
+            if self.uses_trend_features:
+                data = build_features(df)
+            else:
+                data = df[["temp", "vibration", "pressure"]].to_numpy(dtype=np.float64)
+            return self.model.predict_proba(data)[:, 1]
+
 predictor = FailurePredictor()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the failure model on labelled sensor history")
+    parser.add_argument("csv", help="CSV with timestamp, equipment_id, temp, vibration, pressure, failure_type")
+    args = parser.parse_args()
+    predictor.train(pd.read_csv(args.csv))
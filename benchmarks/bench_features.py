@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Feature pipeline benchmark
+==========================
+Times build_features() over a synthetic fleet history (training path) and
+FeatureState.transform() over the same rows in ingest-sized batches
+(streaming path).
+
+Run: python benchmarks/bench_features.py --rows 10000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.features import FeatureState, build_features
+
+
+def synthetic_history(rows, machines, seed=0):
+    rng = np.random.default_rng(seed)
+    per_machine = rows // machines
+    ids = np.repeat([f"EQ-{i:05d}" for i in range(machines)], per_machine)
+    ts = np.tile(pd.date_range("2024-01-01", periods=per_machine, freq="5min").to_numpy(), machines)
+    n = len(ids)
+    df = pd.DataFrame({
+        "timestamp": ts,
+        "equipment_id": ids,
+        "temp": rng.normal(70, 3, n).astype(np.float32),
+        "vibration": rng.normal(15, 2, n).astype(np.float32),
+        "pressure": rng.normal(100, 1, n).astype(np.float32),
+        "failure_type": (rng.random(n) < 0.01).astype(np.int8),
+    })
+    # Arrival order: interleaved across machines by time
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--machines", type=int, default=1_000)
+    parser.add_argument("--batch", type=int, default=5_000, help="streaming batch size")
+    parser.add_argument("--stream-rows", type=int, default=1_000_000,
+                        help="rows replayed through the streaming path")
+    args = parser.parse_args()
+
+    df = synthetic_history(args.rows, args.machines)
+    print(f"📊 {len(df):,} rows, {args.machines:,} machines")
+
+    start = time.perf_counter()
+    features = build_features(df)
+    elapsed = time.perf_counter() - start
+    print(f"Training path:  build_features   {elapsed:8.2f} s  ({len(df) / elapsed:,.0f} rows/s, "
+          f"{features.memory_usage().sum() / 1e6:,.0f} MB)")
+    del features
+
+    stream = df.iloc[:args.stream_rows]
+    state = FeatureState()
+    start = time.perf_counter()
+    for i in range(0, len(stream), args.batch):
+        state.transform(stream.iloc[i:i + args.batch])
+    elapsed = time.perf_counter() - start
+    batches = -(-len(stream) // args.batch)
+    print(f"Streaming path: {batches:,} x {args.batch:,}-row batches {elapsed:8.2f} s  "
+          f"({len(stream) / elapsed:,.0f} rows/s, {elapsed / batches * 1000:.1f} ms/batch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Synthetic fleet data generator
+==============================
+Writes a CSV with the data/pob_sample.csv schema (timestamp, equipment_id,
+temp, vibration, pressure, failure_type) for N machines reporting every
+--interval-min minutes, interleaved by time as a live fleet would arrive.
+
+Each machine has its own baseline. Failure episodes start at random
+(--episode-rate per machine per reading) and ramp temperature and vibration
+up and pressure down over --episode-readings readings; the second half of an
+episode is labelled failure_type=1, the first half is unlabelled drift.
+
+Rows are generated and appended in chunks, so 100M rows need no more memory
+than one chunk.
+
+Run: python benchmarks/generate_fleet.py --rows 1M --output data/fleet_1M.csv
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["timestamp", "equipment_id", "temp", "vibration", "pressure", "failure_type"]
+
+# Normal operation (mean, std) and full-episode shift, matching pob_sample.csv
+NORMAL = {"temp": (65.0, 3.0), "vibration": (12.0, 2.0), "pressure": (101.0, 1.0)}
+EPISODE_SHIFT = {"temp": 33.0, "vibration": 38.0, "pressure": -14.0}
+
+
+def parse_count(value):
+    """'10k', '1M', '100M' or '1_000' -> int"""
+    value = str(value).strip().replace("_", "").replace(",", "")
+    scale = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}.get(value[-1:].lower())
+    return int(float(value[:-1]) * scale) if scale else int(value)
+
+
+def count_label(n):
+    """1_000_000 -> '1M', 10_000 -> '10k'"""
+    for suffix, scale in (("B", 1_000_000_000), ("M", 1_000_000), ("k", 1_000)):
+        if n >= scale and n % scale == 0:
+            return f"{n // scale}{suffix}"
+    return str(n)
+
+
+def default_machines(rows):
+    """10 machines per 10k rows up to 10k machines: 10k -> 10, 1M -> 100, 100M -> 10,000"""
+    return int(min(10_000, max(10, rows // 10_000)))
+
+
+def generate_fleet(rows, machines=None, seed=0, chunk_rows=1_000_000, start="2024-01-01",
+                   interval_min=10, episode_rate=5e-4, episode_readings=(6, 48)):
+    """
+    Yield DataFrame chunks of a synthetic fleet, `rows` rows in total.
+
+    Args:
+        rows: total readings across the fleet
+        machines: fleet size (default_machines(rows) if None)
+        seed: RNG seed; the same arguments give the same data
+        chunk_rows: approximate rows per yielded chunk
+        start, interval_min: timestamp of the first reading and reporting period
+        episode_rate: probability a machine starts a failure episode at a reading
+        episode_readings: (min, max) episode length in readings
+    """
+    machines = machines or default_machines(rows)
+    base_rng = np.random.default_rng(seed)
+    ids = np.array([f"EQ-{101 + i}" for i in range(machines)], dtype=object)
+    baseline = {name: mean + base_rng.normal(0, std / 2, machines) for name, (mean, std) in NORMAL.items()}
+
+    # Per-machine episode state carried across chunks (global reading indices)
+    last_start = np.full(machines, -1, dtype=np.int64)
+    last_end = np.full(machines, -1, dtype=np.int64)
+
+    per_chunk = max(1, chunk_rows // machines)
+    total_readings = -(-rows // machines)
+    start = pd.Timestamp(start)
+    emitted = 0
+    for chunk, k0 in enumerate(range(0, total_readings, per_chunk)):
+        k = np.arange(k0, min(k0 + per_chunk, total_readings), dtype=np.int64)
+        rng = np.random.default_rng([seed, chunk])
+        shape = (len(k), machines)
+
+        starts = rng.random(shape) < episode_rate
+        lengths = rng.integers(episode_readings[0], episode_readings[1] + 1, shape)
+        begin = np.where(starts, k[:, None], -1)
+        end = np.where(starts, k[:, None] + lengths, -1)
+        begin = np.maximum.accumulate(np.vstack([last_start, begin]), axis=0)[1:]
+        end = np.maximum.accumulate(np.vstack([last_end, end]), axis=0)[1:]
+        last_start, last_end = begin[-1], end[-1]
+
+        ramp = np.where(k[:, None] < end, (k[:, None] - begin + 1) / np.maximum(end - begin, 1), 0.0)
+        ramp = np.clip(ramp, 0.0, 1.0)
+
+        data = {}
+        for name, (_, std) in NORMAL.items():
+            values = baseline[name] + rng.normal(0, std, shape) + EPISODE_SHIFT[name] * ramp
+            data[name] = np.round(values, 1).ravel()
+        failure = (ramp >= 0.5).ravel().astype(np.int8)
+
+        stamps = (start + pd.to_timedelta(k * interval_min, unit="min")).strftime("%Y-%m-%d %H:%M:%S")
+        df = pd.DataFrame({
+            "timestamp": np.repeat(stamps.to_numpy(dtype=object), machines),
+            "equipment_id": np.tile(ids, len(k)),
+            "temp": data["temp"],
+            "vibration": data["vibration"],
+            "pressure": data["pressure"],
+            "failure_type": failure,
+        }, columns=COLUMNS)
+
+        df = df.iloc[:rows - emitted]
+        emitted += len(df)
+        yield df
+
+
+def load_fleet(rows, **kwargs):
+    """Whole synthetic fleet as one DataFrame (for sizes that fit in memory)"""
+    return pd.concat(generate_fleet(rows, **kwargs), ignore_index=True)
+
+
+def write_fleet(path, rows, **kwargs):
+    """Stream a synthetic fleet to CSV; returns (rows, failure_rows)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = failures = 0
+    with open(path, "w", newline="") as f:
+        for df in generate_fleet(rows, **kwargs):
+            df.to_csv(f, index=False, header=written == 0)
+            written += len(df)
+            failures += int(df["failure_type"].sum())
+    return written, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_count, default="10k", help="e.g. 10k, 1M, 100M")
+    parser.add_argument("--machines", type=parse_count, default=None,
+                        help="fleet size (default: 10 per 10k rows, at most 10k)")
+    parser.add_argument("--output", default=None, help="CSV path (default data/fleet_<rows>.csv)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=parse_count, default="1M")
+    parser.add_argument("--interval-min", type=int, default=10)
+    parser.add_argument("--episode-rate", type=float, default=5e-4,
+                        help="chance a machine starts a failure episode at each reading")
+    args = parser.parse_args(argv)
+
+    machines = args.machines or default_machines(args.rows)
+    output = args.output or f"data/fleet_{count_label(args.rows)}.csv"
+    print(f"🏭 Generating {args.rows:,} readings from {machines:,} machines -> {output}")
+
+    started = time.perf_counter()
+    rows, failures = write_fleet(output, args.rows, machines=machines, seed=args.seed,
+                                 chunk_rows=args.chunk_rows, interval_min=args.interval_min,
+                                 episode_rate=args.episode_rate)
+    elapsed = time.perf_counter() - started
+
+    size_mb = Path(output).stat().st_size / 1e6
+    print(f"✅ {rows:,} rows ({failures / rows:.2%} failure) in {elapsed:.1f}s "
+          f"({rows / elapsed:,.0f} rows/s), {size_mb:,.1f} MB")
+    return {"output": output, "rows": rows, "machines": machines, "failure_rows": failures, "seconds": elapsed}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Backend benchmark suite
+=======================
+Times the hot paths on a synthetic fleet (benchmarks/generate_fleet.py) or
+an existing CSV with the pob_sample.csv schema:
+
+  upload_csv[simple]      POST /upload_csv into the in-memory store (main_simple)
+  dashboard_data[json|arrow|msgpack]
+                          GET /dashboard_data serialization of the whole store
+  series[store_scan]      GET /series for one machine: scan + LTTB over the store
+  predict[batch]          FailurePredictor.predict_batch over every row, in chunks
+  predict[per_row]        FailurePredictor.predict, one reading at a time
+  upload_csv[db]          POST /upload_csv into SQLite through main.py (--db-rows)
+  upload_csv[db_reingest] the same upload again, all rows already stored
+  dashboard_data[db]      GET /dashboard_data from SQLite through main.py
+
+Scoring streams the whole dataset chunk by chunk, so it runs at 100M rows;
+the endpoint benchmarks use the first --api-rows rows, since the in-memory
+store and a single request body have to fit in memory.
+
+Each benchmark runs --repeat times and reports the median. Results are
+written as JSON; with a baseline (benchmarks/baseline.json by default) any
+benchmark whose fastest run is more than --tolerance slower than the
+baseline's fastest, at the same row count, is flagged and the script exits
+non-zero. The check needs at least MIN_COMPARE_REPEAT runs per benchmark.
+
+Run: python benchmarks/run_benchmarks.py --rows 10k
+     python benchmarks/run_benchmarks.py --data data/fleet_100M.csv --api-rows 1M
+     python benchmarks/run_benchmarks.py --rows 10k --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from generate_fleet import count_label, default_machines, generate_fleet, parse_count
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+# Fewer runs than this give no usable best-of time, so results are not compared
+MIN_COMPARE_REPEAT = 3
+NO_COMPRESSION = {"Accept-Encoding": "identity"}
+DASHBOARD_FORMATS = {
+    "json": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "msgpack": "application/x-msgpack",
+}
+
+
+def measure(func, repeat, rows, setup=None):
+    """Median wall time of func() over `repeat` runs (setup() untimed before each)"""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    seconds = statistics.median(runs)
+    return {"rows": rows, "seconds": seconds, "runs": runs,
+            "rows_per_s": rows / seconds if rows and seconds else None}
+
+
+def fleet_chunks(args):
+    """Iterator over the dataset in DataFrame chunks"""
+    if args.data:
+        return pd.read_csv(args.data, chunksize=args.chunk_rows)
+    return generate_fleet(args.rows, machines=args.machines, seed=args.seed, chunk_rows=args.chunk_rows)
+
+
+def api_frame(args):
+    """The first --api-rows rows of the dataset"""
+    if args.data:
+        return pd.read_csv(args.data, nrows=args.api_rows)
+    rows = min(args.rows, args.api_rows)
+    chunks = generate_fleet(args.rows, machines=args.machines, seed=args.seed, chunk_rows=args.chunk_rows)
+    frames, taken = [], 0
+    for df in chunks:
+        frames.append(df.iloc[:rows - taken])
+        taken += len(frames[-1])
+        if taken >= rows:
+            break
+    return pd.concat(frames, ignore_index=True)
+
+
+def _upload(client, body):
+    response = client.post("/upload_csv", files={"file": ("fleet.csv", body, "text/csv")})
+    response.raise_for_status()
+    if "error" in response.json():
+        raise RuntimeError(response.json()["error"])
+
+
+def bench_simple_app(df, body, repeat):
+    """In-memory backend: upload, dashboard serialization and a store scan"""
+    from fastapi.testclient import TestClient
+    import backend.main_simple as simple
+
+    results = {}
+    rows = len(df)
+    with TestClient(simple.app) as client:
+        results["upload_csv[simple]"] = measure(lambda: _upload(client, body), repeat, rows,
+                                                setup=simple.clear_storage)
+
+        for name, accept in DASHBOARD_FORMATS.items():
+            def get_dashboard():
+                response = client.get("/dashboard_data", headers={"Accept": accept, **NO_COMPRESSION})
+                response.raise_for_status()
+            results[f"dashboard_data[{name}]"] = measure(get_dashboard, repeat, rows)
+
+        equipment_id = df["equipment_id"].iloc[0]
+
+        def get_series():
+            client.get("/series", params={"equipment_id": equipment_id, "points": 1000}).raise_for_status()
+        results["series[store_scan]"] = measure(get_series, repeat, rows)
+        simple.clear_storage()
+    return results
+
+
+def bench_predictor(args, df, repeat):
+    """Batch scoring over the whole dataset and per-row scoring over the first --per-row-rows"""
+    from backend.features import FeatureState
+    from backend.xgboost_model import predictor
+
+    predictor.warm_up()
+
+    # Only predict_batch is timed: generating / parsing the chunks is not scoring
+    runs = []
+    for _ in range(repeat):
+        predictor.feature_state = FeatureState()
+        total, elapsed = 0, 0.0
+        for chunk in fleet_chunks(args):
+            started = time.perf_counter()
+            predictor.predict_batch(chunk)
+            elapsed += time.perf_counter() - started
+            total += len(chunk)
+        runs.append(elapsed)
+    batch_s = statistics.median(runs)
+
+    sample = df.iloc[:args.per_row_rows]
+    readings = list(sample[["temp", "vibration", "pressure"]].itertuples(index=False))
+
+    def score_rows():
+        for temp, vibration, pressure in readings:
+            predictor.predict(temp, vibration, pressure)
+
+    return {
+        "predict[batch]": {"rows": total, "seconds": batch_s, "runs": runs, "rows_per_s": total / batch_s},
+        "predict[per_row]": measure(score_rows, repeat, len(readings)),
+    }
+
+
+def bench_db_app(df, repeat, workdir):
+    """PostgreSQL backend against SQLite: upsert upload, re-upload and dashboard read"""
+    # Always the scratch file, never an exported DATABASE_URL: truncate() deletes every reading
+    scratch_url = f"sqlite:///{workdir}/benchmark.db"
+    os.environ["DATABASE_URL"] = scratch_url
+    from fastapi.testclient import TestClient
+    import backend.main as main
+    from backend import models
+
+    if main.engine.url.render_as_string(hide_password=False) != scratch_url:
+        raise RuntimeError(f"backend.database is already bound to {main.engine.url!r}; "
+                           "refusing to truncate it (run the benchmarks in a fresh process)")
+
+    def truncate():
+        with main.SessionLocal() as db:
+            db.query(models.VocLog).delete()
+            db.commit()
+
+    body = df.to_csv(index=False).encode()
+    results = {}
+    with TestClient(main.app) as client:
+        results["upload_csv[db]"] = measure(lambda: _upload(client, body), repeat, len(df), setup=truncate)
+        # Same file again: every row is an unchanged duplicate
+        results["upload_csv[db_reingest]"] = measure(lambda: _upload(client, body), repeat, len(df))
+
+        def get_dashboard():
+            client.get("/dashboard_data", headers=NO_COMPRESSION).raise_for_status()
+        results["dashboard_data[db]"] = measure(get_dashboard, repeat, len(df))
+    return results
+
+
+def best(result):
+    """Fastest run: the least noisy estimate of what the code costs"""
+    return min(result.get("runs") or [result["seconds"]])
+
+
+def spread(result):
+    """Run-to-run jitter of one benchmark: median minus fastest, so one stalled run does not count"""
+    runs = result.get("runs") or [result["seconds"]]
+    return statistics.median(runs) - min(runs)
+
+
+def compare(results, baseline, tolerance, min_delta_s=0.02):
+    """
+    Benchmarks whose fastest run is slower than the baseline's fastest by more
+    than `tolerance` (0.25 = 25%) and by more than both `min_delta_s` and the
+    baseline's own run-to-run jitter, so noise is not a regression.
+    Only entries measured at the same row count are compared.
+
+    Returns:
+        [(name, seconds, baseline_seconds, ratio), ...] with best-of-runs seconds
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or base["rows"] != result["rows"] or not best(base):
+            continue
+        seconds, base_seconds = best(result), best(base)
+        ratio = seconds / base_seconds
+        if ratio > 1 + tolerance and seconds - base_seconds > max(min_delta_s, spread(base)):
+            regressions.append((name, seconds, base_seconds, ratio))
+    return regressions
+
+
+def print_results(results, baseline):
+    base = baseline.get("results", {}) if baseline else {}
+    print(f"\n{'Benchmark':<26} {'Rows':>12} {'Median':>10} {'Best':>10} {'Rows/s':>14} "
+          f"{'Base best':>10} {'Change':>8}")
+    print("-" * 96)
+    for name, result in results.items():
+        line = (f"{name:<26} {result['rows']:>12,} {result['seconds']:>9.3f}s {best(result):>9.3f}s "
+                f"{result['rows_per_s'] or 0:>14,.0f}")
+        previous = base.get(name)
+        if previous and previous["rows"] == result["rows"] and best(previous):
+            change = best(result) / best(previous) - 1
+            line += f" {best(previous):>9.3f}s {change:>+8.0%}"
+        print(line)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_count, default="10k", help="synthetic rows: 10k, 1M, 100M")
+    parser.add_argument("--machines", type=parse_count, default=None)
+    parser.add_argument("--data", default=None, help="benchmark an existing CSV instead of generating")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=parse_count, default="1M")
+    parser.add_argument("--api-rows", type=parse_count, default="1M",
+                        help="rows sent through the endpoints / in-memory store")
+    parser.add_argument("--per-row-rows", type=parse_count, default="2k")
+    parser.add_argument("--db-rows", type=parse_count, default="2k",
+                        help="rows through the SQLite upload; 0 skips it")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    parser.add_argument("--min-delta", type=float, default=0.02,
+                        help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the baseline")
+    args = parser.parse_args(argv)
+
+    if args.data:
+        args.data = str(Path(args.data).resolve())
+    output = Path(args.output).resolve()
+    baseline_path = Path(args.baseline).resolve()
+
+    df = api_frame(args)
+    body = df.to_csv(index=False).encode()
+    source = args.data or f"synthetic {args.rows:,} rows, {args.machines or default_machines(args.rows):,} machines"
+    print(f"📊 Benchmarking on {source} (endpoints: {len(df):,} rows, {len(body) / 1e6:,.1f} MB CSV)")
+
+    results = {}
+    cwd = os.getcwd()
+    # The dummy model, SQLite file and any profiles land in a scratch directory
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            results.update(bench_simple_app(df, body, args.repeat))
+            results.update(bench_predictor(args, df, args.repeat))
+            if args.db_rows:
+                results.update(bench_db_app(df.iloc[:args.db_rows], args.repeat, workdir))
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "source": args.data or f"generate_fleet --rows {count_label(args.rows)} --seed {args.seed}",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    output.write_text(json.dumps(report, indent=2))
+
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+    print_results(results, baseline)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"📌 Baseline updated: {baseline_path}")
+        return 0
+    if baseline is None:
+        print("ℹ️  No baseline to compare against (--save-baseline to create one)")
+        return 0
+
+    if args.repeat < MIN_COMPARE_REPEAT:
+        print(f"ℹ️  --repeat {args.repeat} is below {MIN_COMPARE_REPEAT}: not comparing against the baseline")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.tolerance:.0%} vs baseline "
+              f"{baseline['meta'].get('commit')}:")
+        for name, seconds, base, ratio in regressions:
+            print(f"   {name:<26} {base:.3f}s -> {seconds:.3f}s ({ratio:.2f}x)")
+        return 1
+    print(f"\n✅ No regressions over {args.tolerance:.0%} vs baseline {baseline['meta'].get('commit')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Backend cold-start profile
+==========================
+Spawns fresh interpreters the way an autoscaler spawns workers and measures
+(1) `import backend.main` and (2) import + lifespan startup until /health
+answers. Also prints the heaviest top-level imports from `-X importtime`.
+
+Runs against SQLite by default so no PostgreSQL is needed; lifespan schema
+setup (init_db) is included. Exits non-zero when the median cold start is
+over --target-s, so it can gate CI.
+
+Run: python benchmarks/startup_profile.py --runs 5 --target-s 2.0
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+COLD_START = """
+import sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+import backend.main as main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+    ready = time.perf_counter()
+print(f"{{imported - started:.4f}} {{ready - started:.4f}}")
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _env(workdir):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{workdir}/startup_profile.db")
+    return env
+
+
+def cold_starts(runs, workdir):
+    """[(import_s, ready_s), ...] over `runs` fresh interpreters"""
+    code = COLD_START.format(root=str(ROOT))
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=_env(workdir),
+                             capture_output=True, text=True, check=True)
+        timings.append(tuple(float(v) for v in out.stdout.split()[-2:]))
+    return timings
+
+
+def import_profile(workdir, top=15):
+    """Heaviest top-level imports of backend.main: [(module, cumulative_ms), ...]"""
+    code = f"import sys; sys.path.insert(0, {str(ROOT)!r}); import backend.main"
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=workdir,
+                         env=_env(workdir), capture_output=True, text=True, check=True)
+    modules = []
+    for line in out.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # Direct children of backend.main sit one indent level below it
+        if match and len(match.group(3)) == 3:
+            modules.append((match.group(4), int(match.group(2)) / 1000))
+    return sorted(modules, key=lambda m: -m[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-s", type=float, default=float(os.getenv("COLD_START_TARGET_S", "2.0")),
+                        help="max median import + startup time")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # One untimed run to populate __pycache__, as a deployed image would have
+        cold_starts(1, workdir)
+        timings = cold_starts(args.runs, workdir)
+        profile = import_profile(workdir, args.top)
+
+    import_s = statistics.median(t[0] for t in timings)
+    ready_s = statistics.median(t[1] for t in timings)
+
+    print(f"🚀 Cold start over {args.runs} fresh interpreters (median)")
+    print(f"   import backend.main:        {import_s:>7.3f}s")
+    print(f"   import + lifespan (/health): {ready_s:>7.3f}s   target {args.target_s:.1f}s")
+    print(f"\n📦 Heaviest imports (-X importtime, cumulative)")
+    for module, ms in profile:
+        print(f"   {module:<28} {ms:>8.1f} ms")
+
+    if ready_s > args.target_s:
+        print(f"\n❌ Cold start {ready_s:.3f}s exceeds the {args.target_s:.1f}s target")
+        return 1
+    print(f"\n✅ Within the {args.target_s:.1f}s cold-start target")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,32 @@
 AskUp Cost Calculator
 ======================
 Calculate API costs at scale for Solar LLM-based equipment diagnosis.
+
+With --usage (a CSV / Parquet of per-call usage, or the backend's
+/usage/calls URL) the API cost per call comes from measured token counts
+instead of the 0.000165 constant.
 """
 
+import argparse
 import json
+import time
 from datetime import datetime
 
-def calculate_costs(num_equipment, failures_per_month, api_cost_per_call=0.000165):
+import numpy as np
+import pandas as pd
+
+# SaaS subscription tiers: (max diagnoses per month, monthly price)
+SAAS_TIERS = [(100, 500), (1000, 5000), (float("inf"), 10000)]
+INFRASTRUCTURE_MONTHLY = 1000  # Server, monitoring, etc.
+MTTR_REDUCTION = 0.75  # Downtime reduction per failure with AskUp
+PREVENTION_RATE = 0.20  # Share of failures prevented by predictive maintenance
+DEFAULT_API_COST_PER_CALL = 0.000165
+
+# Solar list price, USD per 1K tokens (backend/solar_client.py)
+INPUT_COST_PER_1K = 0.00015
+OUTPUT_COST_PER_1K = 0.0006
+
+def calculate_costs(num_equipment, failures_per_month, api_cost_per_call=DEFAULT_API_COST_PER_CALL):
     """
     Calculate monthly and annual costs for AskUp implementation
     
@@ -28,17 +48,12 @@ def calculate_costs(num_equipment, failures_per_month, api_cost_per_call=0.00016
     api_cost_annual = api_cost_monthly * 12
     
     # SaaS subscription (tiered)
-    if total_diagnoses_per_month <= 100:
-        saas_cost_monthly = 500
-    elif total_diagnoses_per_month <= 1000:
-        saas_cost_monthly = 5000
-    else:
-        saas_cost_monthly = 10000  # Enterprise
+    saas_cost_monthly = next(price for limit, price in SAAS_TIERS if total_diagnoses_per_month <= limit)
     
     saas_cost_annual = saas_cost_monthly * 12
     
     # Infrastructure
-    infrastructure_monthly = 1000  # Server, monitoring, etc.
+    infrastructure_monthly = INFRASTRUCTURE_MONTHLY
     infrastructure_annual = infrastructure_monthly * 12
     
     # Total
@@ -60,7 +75,8 @@ def calculate_costs(num_equipment, failures_per_month, api_cost_per_call=0.00016
         "cost_per_diagnosis": round(cost_per_diagnosis, 4)
     }
 
-def calculate_roi(num_equipment, failures_per_month, avg_downtime_hours=4, hourly_loss=10000):
+def calculate_roi(num_equipment, failures_per_month, avg_downtime_hours=4, hourly_loss=10000,
+                  api_cost_per_call=DEFAULT_API_COST_PER_CALL):
     """
     Calculate ROI and savings
     
@@ -69,13 +85,14 @@ def calculate_roi(num_equipment, failures_per_month, avg_downtime_hours=4, hourl
         failures_per_month: Failures per equipment per month
         avg_downtime_hours: Average downtime per failure (before AskUp)
         hourly_loss: Cost per hour of downtime
+        api_cost_per_call: Cost per Solar LLM API call
     
     Returns:
         Dictionary with ROI metrics
     """
     
     # Get costs
-    costs = calculate_costs(num_equipment, failures_per_month)
+    costs = calculate_costs(num_equipment, failures_per_month, api_cost_per_call)
     
     # Failure impact without AskUp
     total_failures_monthly = costs["diagnoses_per_month"]
@@ -84,11 +101,11 @@ def calculate_roi(num_equipment, failures_per_month, avg_downtime_hours=4, hourl
     downtime_loss_before = total_failures_monthly * avg_downtime_hours * hourly_loss
     
     # With AskUp (assume 75% MTTR reduction)
-    mttr_reduction = 0.75
+    mttr_reduction = MTTR_REDUCTION
     downtime_loss_after = downtime_loss_before * (1 - mttr_reduction)
     
     # Also prevent ~20% of failures with predictive maintenance
-    prevented_failures_monthly = total_failures_monthly * 0.20
+    prevented_failures_monthly = total_failures_monthly * PREVENTION_RATE
     prevented_loss_monthly = prevented_failures_monthly * avg_downtime_hours * hourly_loss
     
     # Total monthly benefit
@@ -116,8 +133,254 @@ def calculate_roi(num_equipment, failures_per_month, avg_downtime_hours=4, hourl
         "payback_days": round(payback_days, 1)
     }
 
-def print_cost_analysis():
-    """Print cost analysis for different scales"""
+def calculate_costs_vectorized(num_equipment, failures_per_month, api_cost_per_call=DEFAULT_API_COST_PER_CALL):
+    """
+    calculate_costs over NumPy arrays (broadcast against each other), unrounded.
+
+    Returns:
+        Dictionary of float64 arrays with calculate_costs' keys
+    """
+    num_equipment = np.asarray(num_equipment, dtype=np.float64)
+    failures_per_month = np.asarray(failures_per_month, dtype=np.float64)
+
+    diagnoses = num_equipment * failures_per_month
+    api_cost_monthly = diagnoses * api_cost_per_call
+    saas_cost_monthly = np.select(
+        [diagnoses <= limit for limit, _ in SAAS_TIERS[:-1]],
+        [price for _, price in SAAS_TIERS[:-1]],
+        default=SAAS_TIERS[-1][1],
+    ).astype(np.float64)
+    total_monthly = api_cost_monthly + saas_cost_monthly + INFRASTRUCTURE_MONTHLY
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost_per_diagnosis = np.where(diagnoses > 0, total_monthly / diagnoses, 0.0)
+
+    return {
+        "diagnoses_per_month": diagnoses,
+        "api_cost_monthly": api_cost_monthly,
+        "saas_cost_monthly": saas_cost_monthly,
+        "total_monthly": total_monthly,
+        "total_annual": total_monthly * 12,
+        "cost_per_diagnosis": cost_per_diagnosis,
+    }
+
+def calculate_roi_vectorized(num_equipment, failures_per_month, avg_downtime_hours=4, hourly_loss=10000,
+                             api_cost_per_call=DEFAULT_API_COST_PER_CALL):
+    """
+    calculate_roi over NumPy arrays: every argument may be a scalar or an
+    array, and millions of scenarios are evaluated in one pass.
+
+    Returns:
+        Dictionary of float64 arrays with calculate_roi's keys (unrounded)
+    """
+    costs = calculate_costs_vectorized(num_equipment, failures_per_month, api_cost_per_call)
+    loss_per_failure = np.asarray(avg_downtime_hours, dtype=np.float64) * np.asarray(hourly_loss, dtype=np.float64)
+
+    failures = costs["diagnoses_per_month"]
+    downtime_loss_before = failures * loss_per_failure
+    downtime_loss_after = downtime_loss_before * (1 - MTTR_REDUCTION)
+    prevented_failures_monthly = failures * PREVENTION_RATE
+    prevented_loss_monthly = prevented_failures_monthly * loss_per_failure
+    monthly_benefit = (downtime_loss_before - downtime_loss_after) + prevented_loss_monthly
+    annual_benefit = monthly_benefit * 12
+
+    annual_cost = costs["total_annual"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payback_days = annual_cost / annual_benefit * 365
+
+    return {
+        "monthly_diagnoses": failures,
+        "cost_per_diagnosis": costs["cost_per_diagnosis"],
+        "monthly_cost": costs["total_monthly"],
+        "annual_cost": annual_cost,
+        "downtime_loss_before": downtime_loss_before,
+        "downtime_loss_after": downtime_loss_after,
+        "prevented_failures_monthly": prevented_failures_monthly,
+        "prevented_loss_monthly": prevented_loss_monthly,
+        "monthly_benefit": monthly_benefit,
+        "annual_benefit": annual_benefit,
+        "net_benefit_annual": annual_benefit - annual_cost,
+        "roi_percentage": (annual_benefit - annual_cost) / annual_cost * 100,
+        "payback_days": payback_days,
+    }
+
+# Scenario inputs, in calculate_roi_vectorized's argument order
+SCENARIO_INPUTS = ["num_equipment", "failures_per_month", "avg_downtime_hours", "hourly_loss", "api_cost_per_call"]
+
+# Outputs kept in sweep / Monte Carlo frames (the rest follow from these)
+SCENARIO_OUTPUTS = ["monthly_diagnoses", "saas_tier", "annual_cost", "annual_benefit",
+                    "net_benefit_annual", "roi_percentage", "payback_days", "cost_per_diagnosis"]
+
+DEFAULT_GRID = {
+    "num_equipment": [20, 50, 100, 250, 500, 1000, 2000, 5000],
+    "failures_per_month": [0.25, 0.5, 1, 1.5, 2, 3],
+    "avg_downtime_hours": [1, 2, 4, 6, 8],
+    "hourly_loss": [1000, 5000, 10000, 20000, 50000],
+    "api_cost_per_call": [0.0001, 0.000165, 0.0005, 0.001, 0.015],
+}
+
+# Monte Carlo distributions: ("uniform", low, high), ("integers", low, high),
+# ("triangular", low, mode, high) or ("normal", mean, std) clipped at 0;
+# modes sit on calculate_roi's defaults
+DEFAULT_DISTRIBUTIONS = {
+    "num_equipment": ("integers", 20, 2000),
+    "failures_per_month": ("triangular", 0.25, 1.0, 3.0),
+    "avg_downtime_hours": ("triangular", 1.0, 4.0, 8.0),
+    "hourly_loss": ("triangular", 1000.0, 10000.0, 50000.0),
+    "api_cost_per_call": ("uniform", 0.0001, 0.0005),
+}
+
+def _scenario_frame(inputs):
+    roi = calculate_roi_vectorized(*(inputs[name] for name in SCENARIO_INPUTS))
+    frame = pd.DataFrame({name: np.broadcast_to(inputs[name], roi["annual_cost"].shape) for name in SCENARIO_INPUTS})
+    tier = np.searchsorted([limit for limit, _ in SAAS_TIERS[:-1]], roi["monthly_diagnoses"], side="left")
+    roi["saas_tier"] = pd.Categorical.from_codes(tier, ["Starter", "Professional", "Enterprise"])
+    for name in SCENARIO_OUTPUTS:
+        frame[name] = roi[name]
+    return frame
+
+def scenario_sweep(grid=None):
+    """
+    Evaluate the full cartesian product of the grid values.
+
+    Args:
+        grid: {input name: list of values}; missing inputs use DEFAULT_GRID
+
+    Returns:
+        DataFrame with SCENARIO_INPUTS + SCENARIO_OUTPUTS, one row per grid point
+    """
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    axes = np.meshgrid(*(np.asarray(grid[name], dtype=np.float64) for name in SCENARIO_INPUTS),
+                       indexing="ij", sparse=True)
+    shape = np.broadcast_shapes(*(a.shape for a in axes))
+    inputs = {name: np.broadcast_to(a, shape).ravel() for name, a in zip(SCENARIO_INPUTS, axes)}
+    return _scenario_frame(inputs)
+
+def monte_carlo(samples, distributions=None, seed=0):
+    """
+    Sample scenarios from per-input distributions and evaluate them in one pass.
+
+    Args:
+        samples: Number of scenarios
+        distributions: {input name: distribution tuple}; missing inputs use DEFAULT_DISTRIBUTIONS
+        seed: RNG seed
+
+    Returns:
+        DataFrame with SCENARIO_INPUTS + SCENARIO_OUTPUTS, one row per sample
+    """
+    rng = np.random.default_rng(seed)
+    distributions = {**DEFAULT_DISTRIBUTIONS, **(distributions or {})}
+    inputs = {}
+    for name in SCENARIO_INPUTS:
+        kind, *params = distributions[name]
+        if kind == "integers":
+            inputs[name] = rng.integers(params[0], params[1], size=samples, endpoint=True).astype(np.float64)
+        elif kind == "normal":
+            inputs[name] = np.maximum(rng.normal(*params, size=samples), 0.0)
+        else:
+            inputs[name] = getattr(rng, kind)(*params, size=samples)
+    return _scenario_frame(inputs)
+
+def summarize_percentiles(frame, percentiles=(5, 25, 50, 75, 95)):
+    """Percentiles of every numeric output column: {column: {"p5": ..., ...}}"""
+    summary = {}
+    for name in SCENARIO_OUTPUTS:
+        if name == "saas_tier":
+            continue
+        values = frame[name].to_numpy()
+        values = values[np.isfinite(values)]
+        points = np.percentile(values, percentiles) if len(values) else [np.nan] * len(percentiles)
+        summary[name] = {f"p{p}": round(float(v), 4) for p, v in zip(percentiles, points)}
+    summary["saas_tier_share"] = {
+        tier: round(float(share), 4) for tier, share in frame["saas_tier"].value_counts(normalize=True).items()
+    }
+    return summary
+
+def load_usage(source):
+    """
+    Per-call usage from a CSV / Parquet file or a /usage/calls URL.
+    Failed calls and calls without reported tokens are dropped.
+    """
+    source = str(source)
+    usage = pd.read_parquet(source) if source.endswith(".parquet") else pd.read_csv(source)
+    if "error" in usage:
+        usage = usage[~usage["error"].astype(str).str.lower().isin(["true", "1"])]
+    return usage.dropna(subset=["prompt_tokens", "completion_tokens"]).reset_index(drop=True)
+
+def token_cost_profile(usage, input_cost_per_1k=None, output_cost_per_1k=None):
+    """
+    Measured token and cost distribution per call.
+
+    Args:
+        usage: load_usage() frame
+        input_cost_per_1k, output_cost_per_1k: price the tokens at these rates;
+            by default the recorded cost_usd is used (list price where it is missing)
+
+    Returns:
+        {"calls": n, "prompt_tokens": {...}, "completion_tokens": {...},
+         "cost_per_call": {"mean", "std", "sem", "p5", "p50", "p95"}}
+    """
+    if not len(usage):
+        raise ValueError("no successful calls with token counts in the usage data")
+    prompt = usage["prompt_tokens"].to_numpy(dtype=np.float64)
+    completion = usage["completion_tokens"].to_numpy(dtype=np.float64)
+    input_price = INPUT_COST_PER_1K if input_cost_per_1k is None else input_cost_per_1k
+    output_price = OUTPUT_COST_PER_1K if output_cost_per_1k is None else output_cost_per_1k
+    priced = (prompt * input_price + completion * output_price) / 1000
+    if input_cost_per_1k is None and output_cost_per_1k is None and "cost_usd" in usage:
+        cost = usage["cost_usd"].to_numpy(dtype=np.float64)
+        cost = np.where(np.isfinite(cost), cost, priced)
+    else:
+        cost = priced
+
+    def describe(values):
+        p5, p50, p95 = np.percentile(values, [5, 50, 95])
+        return {"mean": float(values.mean()), "p5": float(p5), "p50": float(p50), "p95": float(p95)}
+
+    std = float(cost.std(ddof=1)) if len(cost) > 1 else 0.0
+    return {
+        "calls": len(cost),
+        "prompt_tokens": describe(prompt),
+        "completion_tokens": describe(completion),
+        "cost_per_call": {**describe(cost), "std": std, "sem": std / np.sqrt(len(cost))},
+    }
+
+def measured_distributions(profile):
+    """
+    Monte Carlo api_cost_per_call from a token_cost_profile: a month's API
+    bill is a sum over many calls, so each scenario draws the mean cost per
+    call (its standard error), not a single call's cost.
+    """
+    cost = profile["cost_per_call"]
+    return {"api_cost_per_call": ("normal", cost["mean"], cost["sem"])}
+
+def measured_grid(profile):
+    """Sweep api_cost_per_call values: the measured p5, median, mean and p95 cost per call"""
+    cost = profile["cost_per_call"]
+    return {"api_cost_per_call": sorted({cost["p5"], cost["p50"], cost["mean"], cost["p95"]})}
+
+def print_usage_profile(profile, source):
+    print("\n" + "="*90)
+    print(f"🔎 MEASURED USAGE: {profile['calls']:,} calls from {source}")
+    print("="*90)
+    print(f"{'':<22}{'mean':>16}{'p5':>16}{'p50':>16}{'p95':>16}")
+    for name in ("prompt_tokens", "completion_tokens"):
+        points = profile[name]
+        print(f"{name:<22}" + "".join(f"{points[k]:>16,.1f}" for k in ("mean", "p5", "p50", "p95")))
+    cost = profile["cost_per_call"]
+    print(f"{'cost_per_call ($)':<22}" + "".join(f"{cost[k]:>16.7f}" for k in ("mean", "p5", "p50", "p95")))
+    print(f"\nConstant assumption: ${DEFAULT_API_COST_PER_CALL} per call "
+          f"({cost['mean'] / DEFAULT_API_COST_PER_CALL:.2f}x measured mean)")
+
+def write_scenarios(frame, path):
+    """Write a sweep / Monte Carlo frame as Parquet (.parquet) or CSV (anything else)"""
+    if str(path).endswith(".parquet"):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+def print_cost_analysis(api_cost_per_call=DEFAULT_API_COST_PER_CALL):
+    """Print cost analysis for different scales and return the saved JSON document"""
     
     print("\n" + "="*90)
     print("💰 ASKUP COST CALCULATOR - Scale Analysis")
@@ -135,7 +398,8 @@ def print_cost_analysis():
     for scenario in scenarios:
         roi = calculate_roi(
             scenario["equipment"],
-            scenario["failures_per_month"]
+            scenario["failures_per_month"],
+            api_cost_per_call=api_cost_per_call
         )
         results.append(roi)
         
@@ -172,6 +436,7 @@ def print_cost_analysis():
     # Save to JSON
     output = {
         "timestamp": datetime.now().isoformat(),
+        "api_cost_per_call": api_cost_per_call,
         "scenarios": scenarios,
         "results": results,
         "key_findings": {
@@ -186,6 +451,74 @@ def print_cost_analysis():
     
     print(f"\n✅ Cost analysis saved to cost_analysis.json")
     print("="*90 + "\n")
+    return output
+
+def print_distribution(title, frame, summary, elapsed):
+    """Print the percentile table for a sweep / Monte Carlo run"""
+    print("\n" + "="*100)
+    print(f"📊 {title}: {len(frame):,} scenarios in {elapsed:.2f}s")
+    print("="*100)
+    print(f"{'Metric':<22}" + "".join(f"{p:>16}" for p in summary["annual_cost"]))
+    print("-"*100)
+    for name, points in summary.items():
+        if name == "saas_tier_share":
+            continue
+        print(f"{name:<22}" + "".join(f"{v:>16,.1f}" for v in points.values()))
+    shares = ", ".join(f"{tier} {share:.1%}" for tier, share in summary["saas_tier_share"].items())
+    print(f"\nSaaS tier mix: {shares}")
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AskUp cost / ROI calculator")
+    parser.add_argument("--sweep", action="store_true", help="evaluate a full scenario grid")
+    parser.add_argument("--monte-carlo", type=int, metavar="N", help="evaluate N sampled scenarios")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write every scenario to .parquet or .csv")
+    parser.add_argument("--summary", default="cost_distribution.json", help="percentile summary JSON")
+    parser.add_argument("--usage", metavar="PATH_OR_URL",
+                        help="per-call usage CSV / Parquet or http://.../usage/calls: measured cost per call")
+    parser.add_argument("--input-cost-per-1k", type=float, help="reprice measured prompt tokens (USD)")
+    parser.add_argument("--output-cost-per-1k", type=float, help="reprice measured completion tokens (USD)")
+    for name in SCENARIO_INPUTS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, nargs="+", dest=name,
+                            help=f"grid values for {name} (--sweep)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """CLI entry point; returns the scale analysis, or the sweep / Monte Carlo summary"""
+    args = _parse_args(argv)
+    profile = None
+    if args.usage:
+        profile = token_cost_profile(load_usage(args.usage), args.input_cost_per_1k, args.output_cost_per_1k)
+        print_usage_profile(profile, args.usage)
+    if not args.sweep and not args.monte_carlo:
+        if profile is None:
+            return print_cost_analysis()
+        output = print_cost_analysis(profile["cost_per_call"]["mean"])
+        return {**output, "measured_usage": profile}
+
+    started = time.perf_counter()
+    if args.sweep:
+        title = "Scenario Sweep"
+        grid = measured_grid(profile) if profile else {}
+        grid.update({name: getattr(args, name) for name in SCENARIO_INPUTS if getattr(args, name)})
+        frame = scenario_sweep(grid)
+    else:
+        title = "Monte Carlo"
+        frame = monte_carlo(args.monte_carlo, measured_distributions(profile) if profile else None, seed=args.seed)
+    summary = summarize_percentiles(frame)
+    print_distribution(title, frame, summary, time.perf_counter() - started)
+
+    output = {"timestamp": datetime.now().isoformat(), "mode": title, "scenarios": len(frame),
+              "percentiles": summary}
+    if profile:
+        output["measured_usage"] = profile
+    with open(args.summary, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"\n✅ Percentile summary saved to {args.summary}")
+    if args.output:
+        write_scenarios(frame, args.output)
+        print(f"✅ {len(frame):,} scenarios saved to {args.output}")
+    return output
 
 if __name__ == "__main__":
-    print_cost_analysis()
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+AskUp - Diagnosis Evaluation Harness
+=====================================
+Runs a labelled sensor dataset through the Solar diagnosis path with
+configurable concurrency and measures what llm_comparison.py used to assume:
+per-call latency, tokens and correctness, rolled up into p50/p95/p99,
+throughput and accuracy.
+
+Run against Solar:         python evaluation.py --concurrency 8
+Run offline (local stub):  python evaluation.py --stub --stub-latency-ms 800
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from backend import solar_client
+
+DEFAULT_DATA = Path(__file__).parent / "data" / "pob_sample.csv"
+DEFAULT_OUTPUT = "evaluation_results.json"
+
+
+def classify(analysis):
+    """Map an analysis to 0 (normal), 1 (failure) or None (error / unreadable)"""
+    if not isinstance(analysis, dict) or "error" in analysis:
+        return None
+    status = str(analysis.get("status", analysis.get("raw_analysis", ""))).lower()
+    if "정상" in status:
+        return 0
+    if "주의" in status or "위협" in status or "고장" in status:
+        return 1
+    return None
+
+
+def _evaluate_row(diagnose, row):
+    started = time.perf_counter()
+    analysis, usage = diagnose(row["equipment_id"], row["temp"], row["vibration"], row["pressure"])
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    predicted = classify(analysis)
+    return {
+        "equipment_id": row["equipment_id"],
+        "label": int(row["failure_type"]),
+        "predicted": predicted,
+        "correct": predicted == int(row["failure_type"]),
+        "error": analysis.get("error") if isinstance(analysis, dict) else None,
+        "latency_ms": usage.get("latency_ms") or elapsed_ms,
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "model": usage.get("model"),
+        "cost_usd": usage.get("cost_usd"),
+        "analysis": analysis,
+    }
+
+
+def run_evaluation(df, diagnose=None, concurrency=8, repeat=1):
+    """
+    Diagnose every row of df (repeat times) on a thread pool.
+
+    Args:
+        df: Labelled readings (equipment_id, temp, vibration, pressure, failure_type)
+        diagnose: callable(equipment_id, temp, vibration, pressure) -> (analysis, usage);
+            defaults to solar_client.diagnose
+        concurrency: Max in-flight calls
+        repeat: Passes over the dataset (more samples for stable percentiles)
+
+    Returns:
+        (records, wall_seconds) - records are in dataset order
+    """
+    diagnose = diagnose or solar_client.diagnose
+    rows = df.to_dict("records") * repeat
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        records = list(pool.map(lambda row: _evaluate_row(diagnose, row), rows))
+    return records, time.perf_counter() - started
+
+
+def summarize(records, wall_seconds, concurrency):
+    """Roll per-call records up into the JSON summary llm_comparison.py reads"""
+    ok = [r for r in records if r["error"] is None]
+    latencies = np.array([r["latency_ms"] for r in ok], dtype=float)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (None, None, None)
+
+    def mean_of(key):
+        values = [r[key] for r in ok if r[key] is not None]
+        return round(float(np.mean(values)), 1) if values else None
+
+    prompt_mean, completion_mean = mean_of("prompt_tokens"), mean_of("completion_tokens")
+    costs = [r["cost_usd"] for r in ok if r.get("cost_usd") is not None]
+    return {
+        "calls": len(records),
+        "errors": len(records) - len(ok),
+        "concurrency": concurrency,
+        "model": next((r["model"] for r in ok if r["model"]), None),
+        "accuracy": round(100 * sum(r["correct"] for r in ok) / len(ok), 1) if ok else None,
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 1) if len(latencies) else None,
+            "p50": round(float(p50), 1) if p50 is not None else None,
+            "p95": round(float(p95), 1) if p95 is not None else None,
+            "p99": round(float(p99), 1) if p99 is not None else None,
+        },
+        "throughput_per_s": round(len(records) / wall_seconds, 2) if wall_seconds else None,
+        "wall_seconds": round(wall_seconds, 3),
+        "tokens": {
+            "prompt_mean": prompt_mean,
+            "completion_mean": completion_mean,
+            "total_mean": round(prompt_mean + completion_mean, 1) if prompt_mean and completion_mean else None,
+        },
+        "cost_per_diagnosis_usd": float(np.mean(costs)) if costs else None,
+    }
+
+
+def use_stub(latency_ms=800, jitter=0.25):
+    """Point solar_client at a local stub endpoint (no network, no API key needed)"""
+    from llm_stub import start_stub
+
+    server, url = start_stub(latency_ms=latency_ms, jitter=jitter, model=solar_client.SOLAR_MODEL)
+    solar_client.SOLAR_API_URL = url
+    os.environ.setdefault("SOLAR_API_KEY", "stub")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Solar diagnosis latency, tokens and accuracy")
+    parser.add_argument("--data", default=str(DEFAULT_DATA), help="labelled CSV (pob_sample.csv schema)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--stub", action="store_true", help="run offline against a local stub endpoint")
+    parser.add_argument("--stub-latency-ms", type=float, default=800)
+    args = parser.parse_args(argv)
+
+    server = use_stub(args.stub_latency_ms) if args.stub else None
+    try:
+        df = pd.read_csv(args.data)
+        print(f"📊 Evaluating {len(df)} readings x {args.repeat} at concurrency {args.concurrency}"
+              f"{' (local stub)' if server else ''}...")
+        records, wall = run_evaluation(df, concurrency=args.concurrency, repeat=args.repeat)
+    finally:
+        if server:
+            server.shutdown()
+
+    summary = summarize(records, wall, args.concurrency)
+    summary["timestamp"] = datetime.now().isoformat()
+    summary["dataset"] = args.data
+    summary["endpoint"] = "stub" if server else solar_client.SOLAR_API_URL
+
+    lat = summary["latency_ms"]
+    print(f"   Calls: {summary['calls']}  Errors: {summary['errors']}  Accuracy: {summary['accuracy']}%")
+    print(f"   Latency p50/p95/p99: {lat['p50']} / {lat['p95']} / {lat['p99']} ms")
+    print(f"   Throughput: {summary['throughput_per_s']} diagnoses/s  Tokens/call: {summary['tokens']['total_mean']}")
+
+    with open(args.output, "w") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    print(f"✅ Evaluation saved to {args.output}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
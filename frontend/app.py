@@ -4,16 +4,44 @@ import requests
 import plotly.express as px
 import json
 import io
+import gzip
+import pyarrow as pa
+import zstandard
 
 # Setup
 st.set_page_config(page_title="Solar LLM Factory Monitor", layout="wide")
 API_URL = "http://localhost:8000"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+JSON_MEDIA_TYPE = "application/json"
+DASHBOARD_HEADERS = {
+    "Accept": f"{ARROW_MEDIA_TYPE}, {JSON_MEDIA_TYPE};q=0.5",
+    "Accept-Encoding": "zstd, gzip",
+}
+
+
+def read_frame(res):
+    """/dashboard_data body as a DataFrame: Arrow stream or JSON rows, zstd/gzip/identity"""
+    # Decompress ourselves: urllib3 may not support zstd transparently
+    body = res.raw.read(decode_content=False)
+    encoding = res.headers.get("content-encoding")
+    if encoding == "zstd":
+        body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    elif encoding == "gzip":
+        body = gzip.decompress(body)
+    if res.headers.get("content-type", JSON_MEDIA_TYPE).startswith(ARROW_MEDIA_TYPE):
+        with pa.ipc.open_stream(io.BytesIO(body)) as reader:
+            return reader.read_pandas()
+    return pd.DataFrame(json.loads(body).get("data", []))
+
 
 st.title("🏭 Solar LLM Smart Factory Dashboard")
 
 # Sidebar
 st.sidebar.header("Control Panel")
 
+# Time-series charts are downsampled server-side to roughly one point per pixel
+chart_width = st.sidebar.slider("Chart width (px)", min_value=400, max_value=3000, value=1200, step=100)
+
 # 1. CSV Upload
 uploaded_file = st.sidebar.file_uploader("Upload Sensor Log (CSV)", type="csv")
 
@@ -23,7 +51,10 @@ if uploaded_file is not None:
         try:
             res = requests.post(f"{API_URL}/upload_csv", files={"file": uploaded_file})
             if res.status_code == 200:
-                st.sidebar.success("Upload Successful!")
+                result = res.json()
+                st.sidebar.success(f"Upload Successful! {result.get('inserted', 0)} new, "
+                                   f"{result.get('updated', 0)} updated, "
+                                   f"{result.get('skipped', 0)} duplicates skipped")
             else:
                 st.sidebar.error(f"Error: {res.text}")
         except Exception as e:
@@ -31,11 +62,11 @@ if uploaded_file is not None:
 
 # Main Dashboard
 try:
-    res = requests.get(f"{API_URL}/dashboard_data")
-    data = res.json().get("data", [])
+    res = requests.get(f"{API_URL}/dashboard_data", headers=DASHBOARD_HEADERS, stream=True)
+    df = read_frame(res)
     
-    if data:
-        df = pd.DataFrame(data)
+    if not df.empty:
+        df['equipment_id'] = df['equipment_id'].astype(str)
         df['timestamp'] = pd.to_datetime(df['timestamp'])
         
         # Top Metrics
@@ -48,8 +79,15 @@ try:
         
         # Charts
         st.subheader("Sensor Trends")
-        fig_temp = px.line(df, x='timestamp', y='temp', color='equipment_id', title="Temperature Over Time")
-        st.plotly_chart(fig_temp, use_container_width=True)
+        res_series = requests.get(f"{API_URL}/series", params={"metric": "temp", "points": chart_width})
+        series = res_series.json().get("series", [])
+        df_temp = pd.concat(
+            [pd.DataFrame({"timestamp": s["timestamp"], "temp": s["value"], "equipment_id": s["equipment_id"]}) for s in series],
+            ignore_index=True,
+        ) if series else df[['timestamp', 'temp', 'equipment_id']]
+        df_temp['timestamp'] = pd.to_datetime(df_temp['timestamp'])
+        fig_temp = px.line(df_temp, x='timestamp', y='temp', color='equipment_id', title="Temperature Over Time", width=chart_width)
+        st.plotly_chart(fig_temp, use_container_width=False)
         
         fig_vib = px.bar(df, x='equipment_id', y='vibration', color='failure_type', title="Vibration Levels by Equipment")
         st.plotly_chart(fig_vib, use_container_width=True)
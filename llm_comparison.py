@@ -6,8 +6,14 @@ Compares Solar LLM vs GPT-4 vs Claude 3 for equipment failure diagnosis.
 Helps evaluate cost, accuracy, and performance trade-offs.
 """
 
+import argparse
 import json
 from datetime import datetime
+from pathlib import Path
+
+# Written by evaluation.py; when present its measurements replace the Solar estimates below
+EVALUATION_RESULTS = Path("evaluation_results.json")
+SOLAR = "Solar LLM (Upstage)"
 
 # Comparison data
 MODELS = {
@@ -43,21 +49,136 @@ MODELS = {
     },
 }
 
-def calculate_annual_cost(model_name, monthly_calls=1000):
-    """Calculate annual API cost for a model"""
-    model = MODELS[model_name]
+def load_measurements(path=EVALUATION_RESULTS):
+    """Override Solar's latency / accuracy / cost with the latest evaluation.py run, if any"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        results = json.load(f)
+    latency = results.get("latency_ms") or {}
+    measured = {
+        "response_time_ms": latency.get("p50"),
+        "latency_p99_ms": latency.get("p99"),
+        "accuracy_score": results.get("accuracy"),
+    }
+    MODELS[SOLAR].update({k: round(v) for k, v in measured.items() if v is not None})
+    # Measured cost per call, else the measured token count at list price, as in run_benchmark
+    total_tokens = (results.get("tokens") or {}).get("total_mean")
+    call_cost = results.get("cost_per_diagnosis_usd")
+    if call_cost is not None:
+        MODELS[SOLAR]["cost_per_diagnosis"] = call_cost
+        if total_tokens:
+            MODELS[SOLAR]["cost_per_1k_tokens"] = call_cost / total_tokens * 1000
+    elif total_tokens:
+        MODELS[SOLAR]["cost_per_diagnosis"] = total_tokens / 1000 * MODELS[SOLAR]["cost_per_1k_tokens"]
+    MODELS[SOLAR]["measured"] = True
+    return results
+
+def cost_per_call(model):
+    """Measured cost per diagnosis when benchmarked, else the ~500 token estimate"""
+    if model.get("cost_per_diagnosis") is not None:
+        return model["cost_per_diagnosis"]
     avg_tokens_per_call = 500  # Equipment analysis typically ~500 tokens
-    cost_per_call = (avg_tokens_per_call / 1000) * model["cost_per_1k_tokens"]
-    monthly_cost = cost_per_call * monthly_calls
+    return (avg_tokens_per_call / 1000) * model["cost_per_1k_tokens"]
+
+def calculate_annual_cost(model_name, monthly_calls=1000, models=None):
+    """Calculate annual API cost for a model"""
+    model = (models or MODELS)[model_name]
+    monthly_cost = cost_per_call(model) * monthly_calls
     return monthly_cost * 12
 
+def annual_savings_vs_gpt4(models=None, monthly_calls=1000):
+    """What Solar saves per year against GPT-4 at monthly_calls diagnoses a month"""
+    return (calculate_annual_cost("GPT-4", monthly_calls, models)
+            - calculate_annual_cost(SOLAR, monthly_calls, models))
+
+def cost_ratio(cost, solar_cost, digits=0):
+    """"12x"-style multiple of the Solar cost; "n/a" when Solar costs nothing"""
+    return f"{cost / solar_cost:.{digits}f}x" if solar_cost > 0 else "n/a"
+
+def run_benchmark(backends, df, concurrency=8, repeat=1):
+    """
+    Replay the same diagnosis workload against each backend.
+
+    Args:
+        backends: llm_backends.ChatBackend instances
+        df: Labelled readings (pob_sample.csv schema)
+        concurrency: In-flight calls per backend
+        repeat: Passes over df per backend
+
+    Returns:
+        MODELS-shaped dict keyed by backend name: measured numbers (marked
+        "measured") for every backend that answered, MODELS' estimates for the
+        rest; the qualitative columns are carried over from MODELS
+    """
+    from evaluation import run_evaluation, summarize
+
+    measured = {name: dict(model) for name, model in MODELS.items()}
+    for backend in backends:
+        print(f"⏱️  Benchmarking {backend.name} ({backend.model}), {len(df) * repeat} calls...")
+        # Untimed warm-up: client import, TLS handshake, connection pool
+        row = df.iloc[0]
+        backend.diagnose(row["equipment_id"], row["temp"], row["vibration"], row["pressure"])
+        records, wall = run_evaluation(df, diagnose=backend.diagnose, concurrency=concurrency, repeat=repeat)
+        summary = summarize(records, wall, concurrency)
+        if summary["errors"]:
+            print(f"   ⚠️  {summary['errors']} failed calls (first: {next(r['error'] for r in records if r['error'])})")
+        if summary["errors"] == summary["calls"]:
+            print(f"   ↩️  No successful calls, keeping the estimates for {backend.name}")
+            continue
+        latency, tokens = summary["latency_ms"], summary["tokens"]
+        call_cost = summary["cost_per_diagnosis_usd"]
+
+        model = dict(MODELS.get(backend.name, {
+            "cost_per_1k_tokens": 0.0, "korean_support": "Unknown", "local_deployment": False,
+            "manufacturing_domain": "General",
+        }))
+        if call_cost is not None and tokens["total_mean"]:
+            model["cost_per_1k_tokens"] = call_cost / tokens["total_mean"] * 1000
+        model.update({
+            # None (the backend reported no cost) falls back to the token estimate in cost_per_call
+            "cost_per_diagnosis": call_cost,
+            "response_time_ms": round(latency["p50"]) if latency["p50"] is not None else None,
+            "latency_p99_ms": round(latency["p99"]) if latency["p99"] is not None else None,
+            "accuracy_score": summary["accuracy"],
+            "throughput_per_s": summary["throughput_per_s"],
+            "errors": summary["errors"],
+            "measured": True,
+        })
+        measured[backend.name] = model
+    return measured
+
+def stub_backends(backends, latency_scale=1.0):
+    """
+    Point every backend at its own local stub whose latency is the claimed
+    response_time_ms from MODELS (times latency_scale), for offline runs.
+
+    Returns:
+        The stub servers; call shutdown() on each when done
+    """
+    from llm_stub import start_stub
+
+    servers = []
+    for backend in backends:
+        claimed = MODELS.get(backend.name, {}).get("response_time_ms", 800)
+        server, url = start_stub(latency_ms=claimed * latency_scale, model=backend.model)
+        servers.append(server)
+        backend.api_key = "stub"
+        if hasattr(backend, "base_url"):
+            backend.base_url = url.rsplit("/chat/completions", 1)[0]
+        else:
+            backend.url = url
+    return servers
+
 def calculate_speed_score(model_name):
     """Calculate speed score (lower is better)"""
     model = MODELS[model_name]
     return model["response_time_ms"]
 
-def print_comparison():
-    """Print detailed comparison"""
+def print_comparison(models=None):
+    """Print detailed comparison (of MODELS, or of run_benchmark()'s measured table)"""
+    models = models or MODELS
     print("\n" + "="*80)
     print("🤖 LLM Model Comparison for Manufacturing Diagnostics")
     print("="*80)
@@ -68,12 +189,11 @@ def print_comparison():
     print(f"{'Model':<25} {'Cost/Call':<15} {'Monthly':<15} {'Annual':<15}")
     print("-"*80)
     
-    for model_name in MODELS.keys():
-        model = MODELS[model_name]
-        cost_per_call = (500 / 1000) * model["cost_per_1k_tokens"]
-        monthly = cost_per_call * 1000
+    for model_name in models.keys():
+        call_cost = cost_per_call(models[model_name])
+        monthly = call_cost * 1000
         annual = monthly * 12
-        print(f"{model_name:<25} ${cost_per_call:.4f}          ${monthly:>8,.0f}      ${annual:>10,.0f}")
+        print(f"{model_name:<25} ${call_cost:.4f}          ${monthly:>8,.0f}      ${annual:>10,.0f}")
     
     # Performance comparison
     print("\n⚡ PERFORMANCE METRICS")
@@ -81,9 +201,13 @@ def print_comparison():
     print(f"{'Model':<25} {'Response (ms)':<15} {'P99 (ms)':<15} {'Accuracy':<15}")
     print("-"*80)
     
-    for model_name in MODELS.keys():
-        model = MODELS[model_name]
-        print(f"{model_name:<25} {model['response_time_ms']:<15} {model['latency_p99_ms']:<15} {model['accuracy_score']}%")
+    for model_name in models.keys():
+        model = models[model_name]
+        source = ""
+        if model.get("measured"):
+            throughput = model.get("throughput_per_s")
+            source = f"  (measured, {throughput}/s)" if throughput else "  (measured)"
+        print(f"{model_name:<25} {model['response_time_ms']:<15} {model['latency_p99_ms']:<15} {model['accuracy_score']}%{source}")
     
     # Features comparison
     print("\n✨ FEATURES & CAPABILITIES")
@@ -91,8 +215,8 @@ def print_comparison():
     print(f"{'Model':<25} {'Korean':<15} {'Domain':<20} {'Local Deploy':<15}")
     print("-"*80)
     
-    for model_name in MODELS.keys():
-        model = MODELS[model_name]
+    for model_name in models.keys():
+        model = models[model_name]
         deploy = "✅ Yes" if model["local_deployment"] else "❌ Cloud Only"
         print(f"{model_name:<25} {model['korean_support']:<15} {model['manufacturing_domain']:<20} {deploy:<15}")
     
@@ -100,14 +224,15 @@ def print_comparison():
     print("\n💡 COST SAVINGS: Solar vs Competitors (Annual, 12,000 diagnoses/year)")
     print("-"*80)
     
-    solar_cost = calculate_annual_cost("Solar LLM (Upstage)", monthly_calls=1000)
-    gpt4_cost = calculate_annual_cost("GPT-4", monthly_calls=1000)
-    claude_cost = calculate_annual_cost("Claude 3 (Sonnet)", monthly_calls=1000)
+    solar_cost = calculate_annual_cost(SOLAR, monthly_calls=1000, models=models)
+    gpt4_cost = calculate_annual_cost("GPT-4", monthly_calls=1000, models=models)
+    claude_cost = calculate_annual_cost("Claude 3 (Sonnet)", monthly_calls=1000, models=models)
+    savings = annual_savings_vs_gpt4(models)
     
     print(f"Solar LLM:              ${solar_cost:>10,.2f}")
-    print(f"GPT-4:                  ${gpt4_cost:>10,.2f}  (📈 {gpt4_cost/solar_cost:.0f}x more expensive)")
-    print(f"Claude 3:               ${claude_cost:>10,.2f}  (📈 {claude_cost/solar_cost:.1f}x more expensive)")
-    print(f"\n{'Annual Savings with Solar LLM:':<40} ${(gpt4_cost - solar_cost):>10,.2f} vs GPT-4")
+    print(f"GPT-4:                  ${gpt4_cost:>10,.2f}  (📈 {cost_ratio(gpt4_cost, solar_cost)} more expensive)")
+    print(f"Claude 3:               ${claude_cost:>10,.2f}  (📈 {cost_ratio(claude_cost, solar_cost, 1)} more expensive)")
+    print(f"\n{'Annual Savings with Solar LLM:':<40} ${savings:>10,.2f} vs GPT-4")
     
     # Verdict
     print("\n🏆 RECOMMENDATION FOR MANUFACTURING USE CASE")
@@ -116,20 +241,26 @@ def print_comparison():
     ✅ SOLAR LLM IS THE CLEAR WINNER
     
     Reasons:
-    1. Cost: 10-100x cheaper per API call
-    2. Speed: Faster response time (800ms vs 2500ms)
+    1. Cost: {gpt4_ratio} cheaper per API call than GPT-4
+    2. Speed: Faster response time ({solar_ms}ms vs {gpt4_ms}ms)
     3. Korean Support: Native optimization (important for Korean manufacturers)
     4. Domain Knowledge: Optimized for manufacturing diagnostics
     5. Local Deployment: Can run on-premises for sensitive data
-    6. Proven Accuracy: 100% on our PoC validation
+    6. Proven Accuracy: {solar_accuracy}% on our PoC validation
     
-    Total Annual Savings (vs GPT-4): $233,400 for 12,000 API calls/year
+    Total Annual Savings (vs GPT-4): ${savings:,.2f} for 12,000 API calls/year
     
     For Upstage Partnership:
     - Positioning: "Most cost-effective LLM for manufacturing in Korea"
     - Market: Korean SMEs, automotive, semiconductor, heavy machinery
     - Advantage: Only LLM optimized for Korean manufacturing domain
-    """)
+    """.format(
+        gpt4_ratio=cost_ratio(gpt4_cost, solar_cost),
+        savings=savings,
+        solar_ms=models[SOLAR]["response_time_ms"],
+        gpt4_ms=models["GPT-4"]["response_time_ms"],
+        solar_accuracy=models[SOLAR]["accuracy_score"],
+    ))
     print("="*80 + "\n")
 
 def generate_proposal():
@@ -181,19 +312,58 @@ def generate_proposal():
     """)
     print("="*80 + "\n")
 
-if __name__ == "__main__":
-    print_comparison()
+def main(argv=None):
+    """CLI entry point; returns the comparison document written to comparison_output.json"""
+    parser = argparse.ArgumentParser(description="Compare LLMs for equipment failure diagnosis")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="measure every configured backend instead of printing MODELS")
+    parser.add_argument("--stub", action="store_true", help="benchmark against local stubs (offline)")
+    parser.add_argument("--stub-scale", type=float, default=1.0, help="multiply the stubs' claimed latencies")
+    parser.add_argument("--data", default=str(Path(__file__).parent / "data" / "pob_sample.csv"))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    evaluation = None
+    if args.benchmark:
+        import pandas as pd
+        from dotenv import load_dotenv
+        from backend.llm_backends import default_backends
+
+        load_dotenv()
+        backends = default_backends()
+        servers = stub_backends(backends, args.stub_scale) if args.stub else []
+        try:
+            models = run_benchmark(backends, pd.read_csv(args.data), args.concurrency, args.repeat)
+        finally:
+            for server in servers:
+                server.shutdown()
+    else:
+        evaluation = load_measurements()
+        if evaluation:
+            print(f"📏 Using measured Solar metrics from {EVALUATION_RESULTS} ({evaluation.get('timestamp')})")
+        else:
+            print(f"ℹ️  {EVALUATION_RESULTS} not found - showing estimates (run evaluation.py to measure)")
+        models = MODELS
+
+    print_comparison(models)
     generate_proposal()
     
     # Generate JSON comparison for presentations
     comparison_json = {
         "timestamp": datetime.now().isoformat(),
-        "comparison": MODELS,
-        "winner": "Solar LLM (Upstage)",
-        "annual_savings_vs_gpt4": 233400,
-        "accuracy": "100% on PoC validation"
+        "comparison": models,
+        "winner": SOLAR,
+        "annual_savings_vs_gpt4": round(annual_savings_vs_gpt4(models), 2),
+        "accuracy": f"{models[SOLAR]['accuracy_score']}% on PoC validation",
+        "evaluation": evaluation,
+        "benchmark": {"stub": args.stub, "concurrency": args.concurrency, "repeat": args.repeat} if args.benchmark else None,
     }
     
     print("📄 JSON comparison saved to comparison_output.json")
     with open("comparison_output.json", "w") as f:
         json.dump(comparison_json, f, indent=2)
+    return comparison_json
+
+if __name__ == "__main__":
+    main()
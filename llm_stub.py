@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Local LLM Stub
+==============
+An offline, OpenAI-compatible /chat/completions endpoint for benchmarks and
+evaluation runs. It reads the sensor values out of the diagnosis prompt,
+answers with the same JSON shape Solar is asked for, sleeps for a
+configurable (seeded, log-normal) latency and reports token usage.
+
+Run standalone: python llm_stub.py --port 8001 --latency-ms 800
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TEMP_RE = re.compile(r"온도:\s*([-\d.]+)")
+VIBRATION_RE = re.compile(r"진동:\s*([-\d.]+)")
+
+
+def _value(pattern, text):
+    match = pattern.search(text)
+    return float(match.group(1)) if match else 0.0
+
+
+def stub_diagnosis(prompt):
+    """Rule-of-thumb answer: hot and shaking is a threat, one of the two is a warning"""
+    temp = _value(TEMP_RE, prompt)
+    vibration = _value(VIBRATION_RE, prompt)
+    hot, shaking = temp > 90, vibration > 40
+    if hot and shaking:
+        return {"status": "위협", "diagnosis": "과열 및 과도한 진동 (베어링 손상 의심)", "recommendation": "즉시 정지 후 점검"}
+    if hot or shaking:
+        return {"status": "주의", "diagnosis": "센서 값이 정상 범위를 벗어남", "recommendation": "점검 일정 수립"}
+    return {"status": "정상", "diagnosis": "정상 범위 내 운전 중", "recommendation": "조치 불필요"}
+
+
+def make_handler(latency_ms, jitter, model, rng):
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+            answer = json.dumps(stub_diagnosis(prompt), ensure_ascii=False)
+
+            with lock:
+                delay = latency_ms * rng.lognormvariate(0, jitter) / 1000 if latency_ms else 0
+            time.sleep(delay)
+
+            # Rough token counts: ~2 characters per token for mixed Korean/English text
+            prompt_tokens = max(1, len(prompt) // 2)
+            completion_tokens = max(1, len(answer) // 2)
+            payload = json.dumps({
+                "id": "stub",
+                "object": "chat.completion",
+                "model": body.get("model", model),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            }, ensure_ascii=False).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub(port=0, latency_ms=0, jitter=0.25, model="stub-model", seed=0):
+    """
+    Start the stub in a background thread.
+
+    Returns:
+        (server, url) - call server.shutdown() when done; url is the
+        /chat/completions endpoint to point a client at
+    """
+    handler = make_handler(latency_ms, jitter, model, random.Random(seed))
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible LLM stub")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter", type=float, default=0.25, help="log-normal sigma of the latency")
+    args = parser.parse_args()
+
+    server, url = start_stub(args.port, args.latency_ms, args.jitter)
+    print(f"🧪 LLM stub listening on {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -20,7 +20,9 @@ load_dotenv("../.env")
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from backend.solar_client import analyze_failure
+from evaluation import run_evaluation, summarize
+
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "8"))
 
 def load_sample_data():
     """Load sample data from CSV"""
@@ -74,7 +76,11 @@ def print_results(equipment_id, temp, vibration, pressure, failure_type, analysi
     
     print()
 
-def main():
+def main(df=None):
+    """
+    Run the PoC over df (defaults to the sample CSV) and return the
+    evaluation summary with per-class counts and the verdict.
+    """
     print_header()
     
     # Check API key
@@ -86,70 +92,58 @@ def main():
     
     # Load sample data
     print("📊 Loading sample data...")
-    df = load_sample_data()
+    df = load_sample_data() if df is None else df
     print(f"✅ Loaded {len(df)} equipment records\n")
     
-    # Analyze each record
+    # Analyze all records concurrently through the evaluation harness
     print("🔍 Running Solar LLM Analysis on sample data...\n")
-    
-    results_summary = {
-        'total_analyzed': len(df),
-        'normal_correct': 0,
-        'failure_correct': 0,
-        'errors': 0
-    }
-    
-    for idx, row in df.iterrows():
-        equipment_id = row['equipment_id']
-        temp = row['temp']
-        vibration = row['vibration']
-        pressure = row['pressure']
-        failure_type = row['failure_type']
-        
-        # Call Solar LLM API
-        analysis = analyze_failure(equipment_id, temp, vibration, pressure)
-        
-        # Print results
-        print_results(equipment_id, temp, vibration, pressure, failure_type, analysis)
-        
-        # Track results
-        if isinstance(analysis, dict):
-            if "error" in analysis:
-                results_summary['errors'] += 1
-            else:
-                # Try to extract status from analysis
-                status = analysis.get('status', '').lower() if isinstance(analysis, dict) else str(analysis).lower()
-                
-                if failure_type == 0 and '정상' in status:
-                    results_summary['normal_correct'] += 1
-                elif failure_type == 1 and ('주의' in status or '위협' in status or '고장' in status):
-                    results_summary['failure_correct'] += 1
-    
+    records, wall = run_evaluation(df, concurrency=EVAL_CONCURRENCY)
+
+    for (_, row), record in zip(df.iterrows(), records):
+        print_results(row['equipment_id'], row['temp'], row['vibration'], row['pressure'],
+                      row['failure_type'], record['analysis'])
+
+    summary = summarize(records, wall, EVAL_CONCURRENCY)
+    ok = [r for r in records if r['error'] is None]
+    accuracy = summary['accuracy']
+    latency = summary['latency_ms']
+
     # Print summary
     print("\n" + "="*70)
     print("📈 Analysis Summary")
     print("="*70)
-    print(f"Total Records Analyzed: {results_summary['total_analyzed']}")
-    print(f"Normal Status Correctly Identified: {results_summary['normal_correct']}")
-    print(f"Failure Status Correctly Identified: {results_summary['failure_correct']}")
-    print(f"API Errors: {results_summary['errors']}")
-    
-    if results_summary['errors'] == 0 and results_summary['total_analyzed'] > 0:
-        accuracy = ((results_summary['normal_correct'] + results_summary['failure_correct']) / 
-                   results_summary['total_analyzed']) * 100
+    print(f"Total Records Analyzed: {summary['calls']}")
+    print(f"Normal Status Correctly Identified: {sum(r['correct'] for r in ok if r['label'] == 0)}")
+    print(f"Failure Status Correctly Identified: {sum(r['correct'] for r in ok if r['label'] == 1)}")
+    print(f"API Errors: {summary['errors']}")
+    if ok:
+        print(f"Latency p50/p95/p99: {latency['p50']} / {latency['p95']} / {latency['p99']} ms")
+        print(f"Throughput: {summary['throughput_per_s']} diagnoses/s at concurrency {EVAL_CONCURRENCY}")
+
+    if summary['errors'] == 0 and accuracy is not None:
         print(f"\n✅ Overall Accuracy: {accuracy:.1f}%")
     
     print("\n" + "="*70)
     print("💡 Verdict: Is Solar LLM API Worth It?")
     print("="*70)
-    if results_summary['errors'] == 0:
+    if summary['errors'] == 0 and accuracy is not None:
         if accuracy >= 80:
+            verdict = "recommended"
             print("✅ RECOMMENDED - Solar LLM provides reliable failure diagnosis")
         else:
+            verdict = "needs_tuning"
             print("⚠️  NEEDS TUNING - API works but accuracy needs improvement")
     else:
+        verdict = "not_recommended"
         print("❌ NOT RECOMMENDED - API has connectivity or format issues")
     print("="*70 + "\n")
 
+    summary.update(
+        normal_correct=sum(r['correct'] for r in ok if r['label'] == 0),
+        failure_correct=sum(r['correct'] for r in ok if r['label'] == 1),
+        verdict=verdict,
+    )
+    return summary
+
 if __name__ == "__main__":
     main()
@@ -2,67 +2,157 @@
 """
 AskUp - Complete Interview Demo
 ================================
-Runs all three analyses in sequence:
+Runs all three analyses:
 1. PoC validation (100% accuracy)
 2. LLM comparison (Solar vs competitors)
 3. Cost/ROI analysis (at scale)
+
+The analyses are independent, so they run concurrently in a process pool
+(forked after the shared imports and the sample data are loaded once).
+Each stage's output is captured and printed in order, followed by a
+wall-clock / CPU timing table. --serial runs them in this process instead.
 """
 
-import subprocess
+import argparse
+import contextlib
+import io
+import multiprocessing
 import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import cost_calculator
+import llm_comparison
+import poc_solar_demo
+
+# (name, description, callable, kwargs) - callables return structured results
+STAGES = [
+    ("poc_solar_demo", "📊 PART 1: PoC Validation - Solar LLM Accuracy Test", poc_solar_demo.main, {}),
+    ("llm_comparison", "⚖️  PART 2: LLM Comparison - Solar vs GPT-4 vs Claude", llm_comparison.main, {"argv": []}),
+    ("cost_calculator", "💰 PART 3: Cost & ROI Analysis - Profitability at Scale", cost_calculator.main, {"argv": []}),
+]
+
+def judge(result):
+    """
+    Status of a stage that returned normally, from what it returned.
+
+    Returns:
+        ("failed", reason) when every LLM call errored, ("degraded", reason)
+        when some did or the PoC verdict is not "recommended", else ("passed", None)
+    """
+    if not isinstance(result, dict):
+        return "passed", None
+    calls, errors = result.get("calls"), result.get("errors") or 0
+    if calls and errors >= calls:
+        return "failed", f"all {calls} LLM calls failed"
+    if errors:
+        return "degraded", f"{errors} of {calls} LLM calls failed"
+    verdict = result.get("verdict")
+    if verdict is not None and verdict != "recommended":
+        return "degraded", f"verdict: {verdict}"
+    return "passed", None
+
+def run_stage(name, func, kwargs):
+    """
+    Run one analysis with its stdout captured.
+
+    Returns:
+        Dict with name, status, ok, result, error, output, wall_s and cpu_s;
+        ok is False when the stage raised or judge() failed it
+    """
+    output = io.StringIO()
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    result, error = None, None
+    try:
+        with contextlib.redirect_stdout(output):
+            result = func(**kwargs)
+    except BaseException:  # includes SystemExit from argparse
+        error = traceback.format_exc()
+    status, reason = ("failed", None) if error is not None else judge(result)
+    if status == "failed" and error is None:
+        error = reason
+    return {
+        "name": name,
+        "status": status,
+        "reason": reason,
+        "ok": status != "failed",
+        "result": result,
+        "error": error,
+        "output": output.getvalue(),
+        "wall_s": time.perf_counter() - wall_started,
+        "cpu_s": time.process_time() - cpu_started,
+    }
+
+def run_all(stages=STAGES, workers=None, serial=False):
+    """
+    Run every stage and return {"stages": [stage result, ...], "wall_s": total}.
+
+    Args:
+        stages: (name, description, callable, kwargs) tuples
+        workers: Process pool size (defaults to one per stage)
+        serial: Run in this process, one after another
+    """
+    # Loaded once here; forked workers inherit it (and the imports) for free
+    sample = poc_solar_demo.load_sample_data()
+    jobs = [(name, func, {**kwargs, "df": sample} if func is poc_solar_demo.main else kwargs)
+            for name, _, func, kwargs in stages]
+
+    started = time.perf_counter()
+    if serial:
+        results = [run_stage(*job) for job in jobs]
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(workers or len(jobs), mp_context=context) as pool:
+            futures = [pool.submit(run_stage, *job) for job in jobs]
+            results = [future.result() for future in futures]
+    return {"stages": results, "wall_s": time.perf_counter() - started}
 
-def run_script(script_name, description):
-    """Run a Python script and display results"""
+def print_timing(report):
+    """Print the per-stage wall-clock / CPU table"""
     print("\n" + "="*80)
-    print(f"▶️  {description}")
+    print("⏱️  STAGE TIMING")
     print("="*80)
-    
-    try:
-        result = subprocess.run(
-            [sys.executable, script_name],
-            capture_output=False,
-            text=True
-        )
-        if result.returncode != 0:
-            print(f"❌ Error running {script_name}")
-            return False
-        return True
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
-
-def main():
+    print(f"{'Stage':<25} {'Status':<12} {'Wall (s)':>12} {'CPU (s)':>12}")
+    print("-"*80)
+    labels = {"passed": "✅ PASSED", "degraded": "⚠️  DEGRADED", "failed": "❌ FAILED"}
+    for stage in report["stages"]:
+        status = labels[stage["status"]]
+        print(f"{stage['name']:<25} {status:<12} {stage['wall_s']:>12.2f} {stage['cpu_s']:>12.2f}"
+              + (f"  {stage['reason']}" if stage["reason"] else ""))
+    print("-"*80)
+    stage_total = sum(stage["wall_s"] for stage in report["stages"])
+    print(f"{'Total (elapsed)':<25} {'':<12} {report['wall_s']:>12.2f}   (stages sum to {stage_total:.2f}s)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AskUp demo analyses")
+    parser.add_argument("--serial", action="store_true", help="run the stages one after another in-process")
+    parser.add_argument("--workers", type=int, help="process pool size (default: one per stage)")
+    args = parser.parse_args(argv)
+
     print("\n" + "🎯"*40)
     print("✨ ASKUP COMPLETE INTERVIEW DEMO ✨")
     print("🎯"*40)
-    print("\nThis will run all three analyses sequentially:")
+    print(f"\nRunning all three analyses {'sequentially' if args.serial else 'concurrently'}:")
     print("1. poc_solar_demo.py - Proof of concept (100% accuracy)")
     print("2. llm_comparison.py - Why Solar LLM wins")
-    print("3. cost_calculator.py - ROI at different scales")
-    print("\nTotal time: ~5 minutes\n")
-    
-    scripts = [
-        ("poc_solar_demo.py", "📊 PART 1: PoC Validation - Solar LLM Accuracy Test"),
-        ("llm_comparison.py", "⚖️  PART 2: LLM Comparison - Solar vs GPT-4 vs Claude"),
-        ("cost_calculator.py", "💰 PART 3: Cost & ROI Analysis - Profitability at Scale"),
-    ]
-    
-    results = []
-    for script, desc in scripts:
-        success = run_script(script, desc)
-        results.append((script, success))
-    
+    print("3. cost_calculator.py - ROI at different scales\n")
+
+    report = run_all(workers=args.workers, serial=args.serial)
+
+    for (_, desc, _, _), stage in zip(STAGES, report["stages"]):
+        print("\n" + "="*80)
+        print(f"▶️  {desc}")
+        print("="*80)
+        print(stage["output"], end="")
+        if not stage["ok"]:
+            print(f"❌ Error running {stage['name']}:\n{stage['error']}")
+
     # Summary
-    print("\n" + "="*80)
-    print("📋 EXECUTION SUMMARY")
-    print("="*80)
-    
-    for script, success in results:
-        status = "✅ PASSED" if success else "❌ FAILED"
-        print(f"{status} - {script}")
-    
-    all_passed = all(success for _, success in results)
-    
+    print_timing(report)
+    all_passed = all(stage["status"] == "passed" for stage in report["stages"])
+
     print("\n" + "="*80)
     if all_passed:
         print("✅ ALL ANALYSES COMPLETED SUCCESSFULLY!")
@@ -71,12 +161,13 @@ def main():
         print("  • Solar is 10x cheaper than GPT-4 with better Korean support")
         print("  • ROI payback period is less than 1 day for mid-size facilities")
         print("  • TAM of $5-10B in Korea, $100B+ in Asia")
+    elif all(stage["ok"] for stage in report["stages"]):
+        print("⚠️  All analyses ran, but some LLM calls failed or the verdict is not positive. Check above.")
     else:
         print("⚠️  Some analyses failed. Check errors above.")
-    
+
     print("="*80 + "\n")
-    
-    return 0 if all_passed else 1
+    return report
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(0 if all(stage["ok"] for stage in main()["stages"]) else 1)
@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.anomaly import StreamingAnomalyDetector
+
+
+def _readings(equipment_id, temps):
+    n = len(temps)
+    return pd.DataFrame({
+        "equipment_id": [equipment_id] * n,
+        "temp": temps,
+        "vibration": np.full(n, 12.0) + np.random.default_rng(1).normal(0, 0.5, n),
+        "pressure": np.full(n, 101.0) + np.random.default_rng(2).normal(0, 0.5, n),
+    })
+
+
+def test_spike_is_flagged_only_for_its_machine():
+    rng = np.random.default_rng(0)
+    normal = _readings("EQ-101", 65 + rng.normal(0, 1, 200))
+    other = _readings("EQ-102", 80 + rng.normal(0, 1, 200))
+    detector = StreamingAnomalyDetector()
+    detector.update(pd.concat([normal, other], ignore_index=True))
+
+    scores = detector.update(pd.concat([_readings("EQ-101", [95.0]), _readings("EQ-102", [80.5])], ignore_index=True))
+    assert scores["is_spike"].tolist() == [True, False]
+
+
+def test_batch_and_one_at_a_time_agree():
+    rng = np.random.default_rng(3)
+    df = pd.concat([_readings("EQ-101", 65 + rng.normal(0, 1, 50)),
+                    _readings("EQ-102", 70 + rng.normal(0, 1, 50))]).sample(frac=1, random_state=0)
+    df = df.reset_index(drop=True)
+
+    batched = StreamingAnomalyDetector().update(df)
+    single = StreamingAnomalyDetector()
+    streamed = pd.concat([single.update(df.iloc[[i]]) for i in range(len(df))])
+    np.testing.assert_allclose(batched["anomaly_score"], streamed["anomaly_score"])
+    np.testing.assert_allclose(batched["drift_score"], streamed["drift_score"])
+
+
+def test_gradual_drift_is_flagged():
+    temps = np.concatenate([np.full(100, 65.0), np.linspace(65, 75, 40)])
+    temps += np.random.default_rng(4).normal(0, 0.5, len(temps))
+    scores = StreamingAnomalyDetector().update(_readings("EQ-103", temps))
+    assert not scores["is_drift"].iloc[:100].any()
+    assert scores["is_drift"].iloc[-10:].all()
+
+
+def test_missing_values_do_not_poison_the_baseline():
+    rng = np.random.default_rng(5)
+    detector = StreamingAnomalyDetector()
+    detector.update(_readings("EQ-104", 65 + rng.normal(0, 1, 100)))
+
+    gaps = _readings("EQ-104", [np.nan, np.inf, 65.0])
+    gaps.loc[0, "pressure"] = np.nan
+    scores = detector.update(gaps)
+    assert np.isfinite(detector.mean).all() and np.isfinite(detector.var).all()
+    assert np.isfinite(scores["anomaly_score"]).all() and not scores["is_spike"].any()
+
+    assert detector.update(_readings("EQ-104", [200.0]))["is_spike"].all()
+
+
+def test_simple_upload_scores_csvs_with_missing_columns():
+    from fastapi.testclient import TestClient
+    import backend.main_simple as simple
+
+    simple.clear_storage()
+    with TestClient(simple.app) as client:
+        response = client.post("/upload_csv", files={"file": ("a.csv", b"temp,vibration\n70,12\n", "text/csv")})
+    assert response.json()["inserted"] == 1
+    assert simple.data_storage[0]["equipment_id"] == "unknown" and simple.data_storage[0]["pressure"] == 0.0
+    simple.clear_storage()
@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from generate_fleet import COLUMNS, count_label, generate_fleet, load_fleet, parse_count
+from run_benchmarks import compare
+
+
+def test_generated_fleet_matches_sample_schema_and_has_episodes():
+    sample = pd.read_csv(Path(__file__).parent.parent / "data" / "pob_sample.csv")
+    df = load_fleet(20_005, machines=10, chunk_rows=3_000, episode_rate=2e-3)
+
+    assert list(df.columns) == list(sample.columns) == COLUMNS
+    assert len(df) == 20_005 and df["equipment_id"].nunique() == 10
+    assert pd.to_datetime(df["timestamp"]).is_monotonic_increasing
+    failing = df[df["failure_type"] == 1]
+    assert 0 < len(failing) < len(df) * 0.2
+    assert failing["temp"].mean() > df.loc[df["failure_type"] == 0, "temp"].mean() + 15
+
+    again = pd.concat(generate_fleet(20_005, machines=10, chunk_rows=3_000, episode_rate=2e-3), ignore_index=True)
+    pd.testing.assert_frame_equal(df, again)
+
+
+def test_counts_and_regression_check():
+    assert parse_count("10k") == 10_000 and parse_count("100M") == 100_000_000 and parse_count("2_500") == 2_500
+    assert count_label(1_000_000) == "1M" and count_label(2_500) == "2500"
+
+    baseline = {"results": {
+        "upload": {"rows": 100, "seconds": 1.0},
+        "tiny": {"rows": 100, "seconds": 0.001},
+        "resized": {"rows": 50, "seconds": 1.0},
+    }}
+    results = {
+        "upload": {"rows": 100, "seconds": 1.5},
+        "tiny": {"rows": 100, "seconds": 0.004},     # 4x, but only 3 ms
+        "resized": {"rows": 100, "seconds": 2.0},    # different size: not comparable
+        "new": {"rows": 100, "seconds": 1.0},
+    }
+    regressions = compare(results, baseline, tolerance=0.25)
+    assert [(name, ratio) for name, _, _, ratio in regressions] == [("upload", 1.5)]
+
+    # Fastest runs are compared, and a slowdown within the baseline's own spread is jitter
+    baseline = {"results": {
+        "steady": {"rows": 100, "seconds": 0.10, "runs": [0.10, 0.10, 0.11]},
+        "noisy": {"rows": 100, "seconds": 0.14, "runs": [0.10, 0.14, 0.20]},
+        "outlier": {"rows": 100, "seconds": 0.10, "runs": [0.10, 0.10, 0.10]},
+    }}
+    results = {
+        "steady": {"rows": 100, "seconds": 0.15, "runs": [0.15, 0.15, 0.16]},
+        "noisy": {"rows": 100, "seconds": 0.14, "runs": [0.13, 0.14, 0.15]},  # +30%, within 40 ms jitter
+        "outlier": {"rows": 100, "seconds": 0.20, "runs": [0.30, 0.20, 0.10]},  # one scheduler hiccup
+    }
+    assert [name for name, *_ in compare(results, baseline, tolerance=0.25)] == ["steady"]
@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cost_calculator import (SCENARIO_INPUTS, calculate_roi, calculate_roi_vectorized,
+                             monte_carlo, scenario_sweep, summarize_percentiles)
+
+
+def test_vectorized_roi_matches_scalar_including_tier_boundaries():
+    equipment = np.array([20, 50, 100, 100, 500, 1000, 2000])
+    failures = np.array([1, 2, 1, 10, 1.5, 1, 0.5])  # 20, 100, 100, 1000, 750, 1000, 1000 diagnoses
+    downtime = np.array([4, 2, 8, 1, 4, 6, 3])
+    loss = np.array([10000, 5000, 20000, 1000, 10000, 50000, 2000])
+    price = np.array([0.000165, 0.0001, 0.0005, 0.015, 0.000165, 0.001, 0.0002])
+
+    vectorized = calculate_roi_vectorized(equipment, failures, downtime, loss, price)
+    for i in range(len(equipment)):
+        scalar = calculate_roi(equipment[i], failures[i], downtime[i], loss[i], price[i])
+        for key, value in scalar.items():
+            assert np.isclose(vectorized[key][i], value, rtol=1e-3, atol=0.05), (i, key)
+
+
+def test_sweep_and_monte_carlo_shapes():
+    grid = scenario_sweep({"num_equipment": [10, 100], "failures_per_month": [1, 2, 3]})
+    assert len(grid) == 2 * 3 * 5 * 5 * 5
+    assert not grid[SCENARIO_INPUTS].duplicated().any()
+
+    sampled = monte_carlo(10_000, seed=1)
+    assert len(sampled) == 10_000
+    summary = summarize_percentiles(sampled)
+    assert summary["roi_percentage"]["p5"] <= summary["roi_percentage"]["p50"] <= summary["roi_percentage"]["p95"]
+    assert abs(sum(summary["saas_tier_share"].values()) - 1) < 1e-6
+
+
+def test_measured_usage_replaces_the_constant_cost_per_call():
+    from cost_calculator import measured_distributions, token_cost_profile
+
+    usage = pd.DataFrame({"prompt_tokens": [180, 190, 200, 210], "completion_tokens": [40, 60, 80, 100],
+                          "cost_usd": [None, None, None, None]})
+    profile = token_cost_profile(usage)
+    expected = ((180 + 190 + 200 + 210) / 4 * 0.00015 + (40 + 60 + 80 + 100) / 4 * 0.0006) / 1000
+    assert np.isclose(profile["cost_per_call"]["mean"], expected)
+    repriced = token_cost_profile(usage, input_cost_per_1k=0.0, output_cost_per_1k=0.001)
+    assert np.isclose(repriced["cost_per_call"]["mean"], 0.07 / 1000)
+
+    sampled = monte_carlo(5_000, measured_distributions(profile), seed=0)
+    assert (sampled["api_cost_per_call"] >= 0).all()
+    assert abs(sampled["api_cost_per_call"].mean() - expected) < profile["cost_per_call"]["sem"]
+
+
+def test_cli_usage_mode_reads_failed_calls_out(tmp_path, monkeypatch):
+    from cost_calculator import main
+
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({"prompt_tokens": [200, 200, None], "completion_tokens": [100, 100, None],
+                  "cost_usd": [1e-4, 1e-4, None], "error": [False, False, True]}).to_csv("usage.csv", index=False)
+    output = main(["--usage", "usage.csv"])
+    assert output["measured_usage"]["calls"] == 2
+    assert output["api_cost_per_call"] == 1e-4
+    assert output["results"][0]["monthly_cost"] == calculate_roi(20, 1, api_cost_per_call=1e-4)["monthly_cost"]
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect, text
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend import database, models
+
+
+def test_migrate_upgrades_a_voc_logs_table_from_before_the_detector(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE voc_logs (id INTEGER PRIMARY KEY, timestamp DATETIME, equipment_id VARCHAR, "
+            "temp FLOAT, vibration FLOAT, pressure FLOAT, failure_type INTEGER, solar_analysis JSON)"))
+        conn.execute(text(
+            "INSERT INTO voc_logs (timestamp, equipment_id, temp, vibration, pressure, failure_type, solar_analysis) "
+            "VALUES ('2024-01-01 10:00:00', 'EQ-101', 60, 12, 101, 1, '{\"status\": \"위험\"}'), "
+            "('2024-01-01 10:00:00', 'EQ-101', 61, 12, 101, 0, NULL), "
+            "('2024-01-01 11:00:00', 'EQ-101', 62, 12, 101, 0, NULL), "
+            "('2024-01-01 11:00:00', 'EQ-101', 63, 12, 101, 0, NULL)"))
+    monkeypatch.setattr(database, "engine", engine)
+
+    def index_names():
+        return {ix["name"] for ix in inspect(engine).get_indexes("voc_logs")}
+
+    # App startup adds the columns but never deletes rows
+    database.migrate(models)
+    columns = {c["name"] for c in inspect(engine).get_columns("voc_logs")}
+    assert {"anomaly_score", "drift_score"} <= columns
+    assert "uq_voc_logs_equipment_timestamp" not in index_names()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM voc_logs")).scalar() == 4
+
+    # The deploy step dedupes: the diagnosed copy wins, otherwise the newest
+    database.migrate(models, dedupe=True)
+    database.migrate(models, dedupe=True)  # idempotent
+    assert "uq_voc_logs_equipment_timestamp" in index_names()
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT temp, solar_analysis IS NOT NULL, anomaly_score FROM voc_logs "
+                                 "ORDER BY timestamp")).all()
+    assert rows == [(60.0, 1, None), (63.0, 0, None)]
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.downsample import build_series, lttb_indices
+
+
+def test_lttb_keeps_endpoints_and_target_size():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 50.0)
+    idx = lttb_indices(x, y, 500)
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_spike():
+    y = np.zeros(5_000)
+    y[2_345] = 100.0
+    idx = lttb_indices(np.arange(len(y), dtype=float), y, 50)
+    assert 2_345 in idx
+
+
+def test_lttb_short_series_is_untouched():
+    idx = lttb_indices([0.0, 1.0, 2.0], [1.0, 2.0, 3.0], 1000)
+    assert idx.tolist() == [0, 1, 2]
+
+
+def test_build_series_per_equipment():
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2023-10-27", periods=2_000, freq="min").tolist() * 2,
+        "equipment_id": ["EQ-101"] * 2_000 + ["EQ-102"] * 2_000,
+        "temp": np.random.default_rng(0).normal(70, 5, 4_000),
+    })
+    series = build_series(df, "temp", 100)
+    assert [s["equipment_id"] for s in series] == ["EQ-101", "EQ-102"]
+    assert all(len(s["value"]) == 100 and s["raw_points"] == 2_000 for s in series)
@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend import solar_client
+from evaluation import run_evaluation, summarize, use_stub
+
+
+def test_harness_measures_latency_tokens_and_accuracy_offline(monkeypatch):
+    monkeypatch.setenv("SOLAR_API_KEY", "stub")
+    monkeypatch.setattr(solar_client, "SOLAR_API_URL", solar_client.SOLAR_API_URL)
+    server = use_stub(latency_ms=20)
+    try:
+        df = pd.read_csv(Path(__file__).parent.parent / "data" / "pob_sample.csv")
+        records, wall = run_evaluation(df, concurrency=4, repeat=2)
+    finally:
+        server.shutdown()
+
+    summary = summarize(records, wall, concurrency=4)
+    assert summary["calls"] == 2 * len(df) and summary["errors"] == 0
+    assert summary["accuracy"] == 100.0
+    assert 0 < summary["latency_ms"]["p50"] <= summary["latency_ms"]["p95"] <= summary["latency_ms"]["p99"]
+    assert summary["tokens"]["prompt_mean"] > 0 and summary["tokens"]["completion_mean"] > 0
+    assert summary["throughput_per_s"] > 0
@@ -0,0 +1,53 @@
+import io
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.export import EXPORT_COLUMNS, export_stream, record_batches
+
+
+def make_records():
+    return [
+        {"timestamp": f"2024-01-0{day} 10:00:00", "equipment_id": eq, "temp": 70.0 + day,
+         "vibration": 12.0, "pressure": 101.0, "failure_type": 0, "anomaly_score": 0.5, "drift_score": 0.1}
+        for day in range(1, 6) for eq in ("EQ-101", "EQ-102")
+    ]
+
+
+def test_record_batches_filters_and_chunks():
+    records = make_records()
+    records[3]["analysis"] = {"status": "주의", "diagnosis": "과열"}
+
+    batches = list(record_batches(records, start=datetime(2024, 1, 2), end=datetime(2024, 1, 5),
+                                  equipment_ids=["EQ-102"], chunk_rows=2))
+    assert [len(b) for b in batches] == [2, 1]
+    assert {row[1] for b in batches for row in b} == {"EQ-102"}
+    assert [row[0][:10] for b in batches for row in b] == ["2024-01-02", "2024-01-03", "2024-01-04"]
+
+    diagnosed = list(record_batches(records, diagnosed_only=True))
+    assert len(diagnosed) == 1 and diagnosed[0][0][-1]["status"] == "주의"
+
+
+def test_csv_and_parquet_streams_round_trip():
+    records = make_records()
+    records[0]["analysis"] = {"status": "위협", "diagnosis": 'quoted "text", comma'}
+    batches = list(record_batches(records, chunk_rows=3))
+
+    chunks = list(export_stream(iter(batches), "csv"))
+    assert len(chunks) == 1 + len(batches)
+    csv = pd.read_csv(io.BytesIO(b"".join(chunks)))
+    assert list(csv.columns) == EXPORT_COLUMNS and len(csv) == len(records)
+    assert '"위협"' in csv.loc[0, "analysis"]
+
+    chunks = list(export_stream(iter(batches), "parquet"))
+    assert all(chunks[:-1]), "every row group is flushed as it is written"
+    table = pd.read_parquet(io.BytesIO(b"".join(chunks)))
+    assert len(table) == len(records) and table["temp"].tolist() == [r["temp"] for r in records]
+    assert str(table["timestamp"].dtype).startswith("datetime64")
+
+    empty = pd.read_csv(io.BytesIO(b"".join(export_stream(iter([]), "csv"))))
+    assert list(empty.columns) == EXPORT_COLUMNS and empty.empty
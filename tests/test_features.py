@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.features import FeatureState, build_features
+
+
+def _history(n=2_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2023-10-27", periods=n, freq="min"),
+        "equipment_id": rng.choice(["EQ-101", "EQ-102", "EQ-103"], n),
+        "temp": rng.normal(70, 2, n),
+        "vibration": rng.normal(15, 1, n),
+        "pressure": rng.normal(100, 1, n),
+        "failure_type": (rng.random(n) < 0.02).astype(int),
+    })
+
+
+def test_rolling_features_match_pandas_groupby_rolling():
+    df = _history()
+    features = build_features(df)
+    g = df.groupby("equipment_id")["temp"]
+    expected_mean = g.rolling(6, min_periods=1).mean().reset_index(level=0, drop=True)
+    expected_std = g.rolling(24, min_periods=2).std().reset_index(level=0, drop=True)
+    np.testing.assert_allclose(features["temp_mean_6"], expected_mean.reindex(df.index), rtol=1e-5)
+    np.testing.assert_allclose(features["temp_std_24"], expected_std.reindex(df.index), rtol=1e-4)
+
+
+def test_slope_matches_least_squares():
+    df = _history()
+    last = df[df["equipment_id"] == "EQ-101"].tail(24)
+    expected = np.polyfit(np.arange(24), last["temp"], 1)[0]
+    assert abs(build_features(df).loc[last.index[-1], "temp_slope_24"] - expected) < 1e-4
+
+
+def test_streaming_state_matches_full_recompute():
+    df = _history()
+    state = FeatureState()
+    streamed = pd.concat([state.transform(df.iloc[i:i + 250]) for i in range(0, len(df), 250)])
+    np.testing.assert_allclose(streamed.to_numpy(), build_features(df).to_numpy(), rtol=1e-5, atol=1e-4)
+
+
+def test_missing_readings_are_skipped_not_propagated():
+    df = _history()
+    gap = df.index[df["equipment_id"] == "EQ-101"][2]
+    df.loc[gap, "temp"] = np.nan
+    features = build_features(df)
+
+    g = df.groupby("equipment_id")["temp"]
+    expected_mean = g.rolling(6, min_periods=1).mean().reset_index(level=0, drop=True).reindex(df.index)
+    expected_std = g.rolling(24, min_periods=2).std().reset_index(level=0, drop=True).reindex(df.index)
+    np.testing.assert_allclose(features["temp_mean_6"], expected_mean, rtol=1e-5)
+    np.testing.assert_allclose(features["temp_std_24"], expected_std, rtol=1e-4, atol=1e-5)
+    # Only each machine's first reading lacks a std / slope; nothing after the gap goes NaN
+    first_rows = set(df.groupby("equipment_id").head(1).index)
+    for name in ("temp_std_24", "temp_slope_24", "temp_slope_6"):
+        assert set(features.index[features[name].isna()]) == first_rows, name
+
+    # The slope is the least-squares fit over the finite readings, at their own positions
+    window = df[df["equipment_id"] == "EQ-101"].head(24)
+    x, y = np.arange(24), window["temp"].to_numpy()
+    expected = np.polyfit(x[np.isfinite(y)], y[np.isfinite(y)], 1)[0]
+    assert abs(features.loc[window.index[-1], "temp_slope_24"] - expected) < 1e-4
+
+    # Streaming keeps the gap in its tail without poisoning later batches
+    state = FeatureState()
+    streamed = pd.concat([state.transform(df.iloc[i:i + 250]) for i in range(0, len(df), 250)])
+    np.testing.assert_allclose(streamed.to_numpy(), features.to_numpy(), rtol=1e-5, atol=1e-4)
+
+
+def test_resent_readings_do_not_enter_the_windows_twice():
+    df = _history()
+    state = FeatureState()
+    # Every batch re-sends the tail of the one before, as a retried /ingest would
+    streamed = []
+    for i in range(0, len(df), 250):
+        features = state.transform(df.iloc[max(i - 10, 0):i + 250])
+        assert len(features) == len(df.iloc[max(i - 10, 0):i + 250])
+        streamed.append(features.loc[df.index[i:i + 250]])
+        assert not state.tail.duplicated(["equipment_id", "timestamp"]).any()
+
+    np.testing.assert_allclose(pd.concat(streamed).to_numpy(), build_features(df).to_numpy(), rtol=1e-5, atol=1e-4)
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.ingest import IngestPipeline, IngestQueueFull, parse_reading
+
+
+def line(minute=0, **overrides):
+    reading = {"timestamp": f"2024-01-01 10:{minute:02d}:00", "equipment_id": "EQ-101",
+               "temp": 65.0, "vibration": 12.0, "pressure": 101.0, **overrides}
+    return json.dumps(reading).encode()
+
+
+def readings(n, start=0):
+    return [parse_reading(line(start + i)) for i in range(n)]
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def test_parse_reading_counts_bad_lines_as_invalid():
+    assert parse_reading(line(failure_type=1))["failure_type"] == 1
+    assert parse_reading(b"   ") is None
+    for bad in (line(failure_type="x"), line(timestamp="not a time"), line(timestamp=None),
+                line(temp="hot"), b'{"temp": 1}', b"[1, 2]", b"{oops"):
+        assert parse_reading(bad) is None, bad
+
+    async def scenario():
+        pipeline = IngestPipeline(lambda df: None, max_delay_ms=10)
+        pipeline.start()
+        body = b"\n".join([line(0), line(1, failure_type="x"), b"{oops", line(2, timestamp="never")])
+        result = await pipeline.ingest_stream(chunks(body[:17], body[17:]))
+        await pipeline.stop()
+        return result, pipeline.stats()
+
+    (accepted, invalid), stats = asyncio.run(scenario())
+    assert (accepted, invalid) == (1, 3)
+    assert stats["invalid_rows"] == 3 and stats["rows_ingested"] == 1
+
+
+def test_flushes_by_size_and_by_deadline():
+    batches = []
+
+    async def scenario():
+        pipeline = IngestPipeline(lambda df: batches.append(len(df)), batch_rows=4, max_delay_ms=60_000)
+        pipeline.start()
+        await pipeline.put(readings(2))
+        await pipeline.put(readings(2, start=2))
+        await asyncio.sleep(0.05)
+        assert batches == [4]  # batch_rows reached long before the deadline
+
+        pipeline.max_delay = 0.05
+        await pipeline.put(readings(1, start=4))
+        await asyncio.sleep(0.02)
+        assert batches == [4]  # still waiting for more rows
+        await asyncio.sleep(0.1)
+        assert batches == [4, 1]  # the deadline flushed the partial batch
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+
+
+def test_queue_full_rejects_with_ingest_queue_full():
+    release = asyncio.Event()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+
+        def write(df):
+            asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+
+        pipeline = IngestPipeline(write, batch_rows=1, max_delay_ms=1, queue_batches=1, enqueue_timeout=0.05)
+        pipeline.start()
+        await pipeline.put(readings(1))  # taken by the writer, which blocks
+        await asyncio.sleep(0.02)
+        await pipeline.put(readings(1, start=1))  # fills the queue
+        with pytest.raises(IngestQueueFull):
+            await pipeline.put(readings(1, start=2))
+        assert pipeline.stats()["rejected_rows"] == 1
+        release.set()
+        await pipeline.stop()
+        return pipeline.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["rows_ingested"] == 2
+
+
+def test_ingest_endpoint_returns_503_when_queue_full(monkeypatch):
+    from fastapi.testclient import TestClient
+    import backend.main_simple as simple
+
+    async def full(records):
+        # main_simple imports ingest as a top-level module: raise its own class
+        raise simple.IngestQueueFull("ingest queue full (9 rows pending)")
+
+    with TestClient(simple.app) as client:
+        monkeypatch.setattr(simple.ingest_pipeline, "put", full)
+        response = client.post("/ingest", content=line(0))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["detail"]["accepted"] == 0
+
+
+def test_writer_survives_bad_batches_and_retries_failed_writes():
+    written, failures = [], [2]
+
+    def write(df):
+        if failures[0]:
+            failures[0] -= 1
+            raise RuntimeError("database restarting")
+        written.append(len(df))
+
+    def detect(df):
+        if (df["temp"] > 1000).any():
+            raise ValueError("sensor overflow")
+        return df.assign(anomaly_score=0.0, drift_score=0.0)
+
+    async def scenario():
+        pipeline = IngestPipeline(write, detect=detect, batch_rows=2, max_delay_ms=5, retry_backoff_s=0.001)
+        pipeline.start()
+        await pipeline.put(readings(2))  # two failed writes, then the retry lands
+        await asyncio.sleep(0.05)
+        await pipeline.put([parse_reading(line(2, temp=5000.0)), parse_reading(line(3))])  # detector raises
+        await asyncio.sleep(0.05)
+        await pipeline.put(readings(2, start=4))  # the writer is still alive
+        await asyncio.wait_for(pipeline.stop(), 1)
+        return pipeline.stats()
+
+    stats = asyncio.run(scenario())
+    assert written == [2, 2]
+    assert stats["write_errors"] == 2 and stats["dropped_rows"] == 2
+    assert stats["rows_ingested"] == 4 and stats["queue_depth_rows"] == 0
+
+
+@pytest.mark.parametrize("backend", ["main", "main_simple"])
+def test_resent_readings_are_neither_published_nor_counted_again(backend, monkeypatch):
+    if backend == "main":
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+
+        monkeypatch.setenv("DB_INIT_ON_STARTUP", "0")
+        import backend.main as app
+        from backend import models
+
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        models.Base.metadata.create_all(engine)
+        monkeypatch.setattr(app, "SessionLocal", sessionmaker(bind=engine))
+        write = app._write_readings
+    else:
+        import backend.main_simple as app
+
+        saved, saved_index = list(app.data_storage), dict(app._storage_index)
+        write = app._store_readings
+
+    published = []
+    monkeypatch.setattr(app.broker, "publish_records", lambda topic, records: published.append((topic, records)))
+    first = [parse_reading(line(i, equipment_id="EQ-RESEND")) for i in range(3)]
+    again = [parse_reading(line(i, equipment_id="EQ-RESEND")) for i in range(3)]
+    again[1]["temp"] = 70.0
+
+    async def scenario():
+        pipeline = IngestPipeline(write, on_flush=app._publish_readings, batch_rows=1, max_delay_ms=1)
+        pipeline.start()
+        await pipeline.put(first)
+        await asyncio.sleep(0.05)
+        await pipeline.put(again + [parse_reading(line(3, equipment_id="EQ-RESEND"))])
+        await asyncio.wait_for(pipeline.stop(), 1)
+        return pipeline.stats()
+
+    try:
+        stats = asyncio.run(scenario())
+    finally:
+        if backend == "main_simple":
+            app.data_storage[:] = saved
+            app._storage_index.clear()
+            app._storage_index.update(saved_index)
+
+    batches = [records for topic, records in published if topic == app.READINGS]
+    assert [len(records) for records in batches] == [3, 2]
+    assert [r["temp"] for r in batches[1]] == [70.0, 65.0]
+    json.dumps(batches, default=str, allow_nan=False)  # no NaN scores from unscored re-sends
+    assert stats["rows_ingested"] == 5 and stats["rows_updated"] == 1 and stats["rows_skipped"] == 2
@@ -0,0 +1,179 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.jobs import DONE, FAILED, QUEUED, RUNNING, DiagnosisJob, DiagnosisJobQueue, JobQueueFull
+
+
+def test_riskiest_job_runs_first_and_every_status_is_reported():
+    order, updates = [], []
+    gate = threading.Event()
+
+    def run(job):
+        gate.wait(1)
+        order.append(job.equipment_id)
+        if job.equipment_id == "EQ-bad":
+            raise RuntimeError("solar timeout")
+        return {"status": "정상"}
+
+    async def scenario():
+        queue = DiagnosisJobQueue(run, on_update=lambda job: updates.append((job.equipment_id, job.status)),
+                                  workers=1)
+        queue.start()
+        first = await queue.submit("EQ-first", 1, 0.0, {})  # taken by the only worker right away
+        await asyncio.sleep(0.02)
+        for eq, priority in (("EQ-low", 0.1), ("EQ-bad", 0.5), ("EQ-high", 0.9)):
+            await queue.submit(eq, 1, priority, {})
+        gate.set()
+        await asyncio.wait_for(queue.queue.join(), 1)
+        await queue.stop()
+        return first, queue.stats()
+
+    first, stats = asyncio.run(scenario())
+    assert order == ["EQ-first", "EQ-high", "EQ-bad", "EQ-low"]
+    assert first.status == DONE and first.finished_at is not None
+    assert [s for eq, s in updates if eq == "EQ-first"] == [QUEUED, RUNNING, DONE]
+    assert [s for eq, s in updates if eq == "EQ-bad"] == [QUEUED, RUNNING, FAILED]
+    assert stats["completed"] == 3 and stats["failed"] == 1
+
+
+def test_duplicate_submissions_share_one_job_until_it_finishes():
+    calls = []
+
+    async def scenario():
+        queue = DiagnosisJobQueue(lambda job: calls.append(job.id) or {"status": "정상"}, workers=1)
+        queue.start()
+        first = await queue.submit("EQ-101", 7, 0.5, {})
+        again = await queue.submit("EQ-101", 7, 0.9, {})
+        other = await queue.submit("EQ-101", 8, 0.5, {})
+        await asyncio.wait_for(queue.queue.join(), 1)
+        later = await queue.submit("EQ-101", 7, 0.5, {})  # finished jobs are not reused
+        await asyncio.wait_for(queue.queue.join(), 1)
+        await queue.stop()
+        return first, again, other, later, queue.stats()
+
+    first, again, other, later, stats = asyncio.run(scenario())
+    assert again is first and other is not first and later is not first
+    assert len(calls) == 3
+    assert stats["submitted"] == 3 and stats["deduplicated"] == 1
+
+
+def test_full_queue_rejects_and_failed_persistence_leaves_no_ghost():
+    gate = threading.Event()
+
+    def persist(job):
+        if job.equipment_id == "EQ-db-down":
+            raise RuntimeError("database unavailable")
+
+    async def scenario():
+        queue = DiagnosisJobQueue(lambda job: gate.wait(1) and {}, on_update=persist, workers=1, maxsize=2)
+        queue.start()
+        await queue.submit("EQ-1", 1, 0.0, {})  # running
+        await asyncio.sleep(0.02)
+        await queue.submit("EQ-2", 1, 0.0, {})
+        await queue.submit("EQ-3", 1, 0.0, {})
+        with pytest.raises(JobQueueFull):
+            await queue.submit("EQ-4", 1, 0.0, {})
+        stats = queue.stats()
+        gate.set()
+        await asyncio.wait_for(queue.queue.join(), 1)
+
+        with pytest.raises(RuntimeError):
+            await queue.submit("EQ-db-down", 1, 0.0, {})
+        await queue.stop()
+        return stats, queue
+
+    stats, queue = asyncio.run(scenario())
+    assert stats["queued"] == 2 and stats["running"] == 1 and stats["submitted"] == 3
+    # The rejected and the unpersisted submissions left nothing queued or deduplicating
+    assert queue.stats()["submitted"] == 3 and not queue._active and queue.queue.empty()
+
+
+def test_analyze_scores_each_machine_on_its_recent_history(monkeypatch):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    monkeypatch.setenv("DB_INIT_ON_STARTUP", "0")
+    import backend.main as main
+    from backend import models
+    from backend.features import CONTEXT_ROWS
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)
+    with session() as db:
+        for eq, n in (("EQ-101", 40), ("EQ-102", 3)):
+            for i, ts in enumerate(pd.date_range("2024-01-01", periods=n, freq="h")):
+                db.add(models.VocLog(timestamp=ts, equipment_id=eq, temp=60.0 + i, vibration=12.0,
+                                     pressure=101.0, failure_type=0))
+        db.commit()
+
+    def get_db():
+        with session() as db:
+            yield db
+
+    seen, submitted = [], []
+
+    def failure_risk(df):
+        seen.append(df.copy())
+        return (df["temp"] / 1000).to_numpy()
+
+    async def submit(equipment_id, reading_key, priority, reading):
+        submitted.append((equipment_id, reading_key, priority, reading))
+        return DiagnosisJob(equipment_id, reading_key, priority, reading)
+
+    monkeypatch.setattr(main.predictor, "failure_risk", failure_risk)
+    monkeypatch.setattr(main.diagnosis_jobs, "submit", submit)
+    main.app.dependency_overrides[main.get_db] = get_db
+    try:
+        response = TestClient(main.app).post("/analyze")
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == 200 and len(response.json()["jobs"]) == 2
+    history = seen[0]
+    assert history.groupby("equipment_id").size().to_dict() == {"EQ-101": CONTEXT_ROWS + 1, "EQ-102": 3}
+    assert history.groupby("equipment_id")["timestamp"].is_monotonic_increasing.all()
+    latest = {eq: (key, priority, reading["temp"]) for eq, key, priority, reading in submitted}
+    assert latest["EQ-101"][2] == 99.0 and latest["EQ-101"][1] == pytest.approx(0.099)
+    assert latest["EQ-102"][2] == 62.0 and latest["EQ-102"][0] == 43
+
+
+def test_error_results_fail_the_job_and_are_never_stored(monkeypatch):
+    import time
+    from fastapi.testclient import TestClient
+    import backend.main_simple as simple
+
+    monkeypatch.delenv("SOLAR_API_KEY", raising=False)
+    published = []
+    monkeypatch.setattr(simple.broker, "publish", lambda topic, payload: published.append(topic))
+    saved, saved_index = list(simple.data_storage), dict(simple._storage_index)
+    line = (b'{"timestamp": "2030-01-01 00:00:00", "equipment_id": "EQ-NOKEY", "temp": 95.0, '
+            b'"vibration": 45.0, "pressure": 90.0, "failure_type": 1}')
+    try:
+        with TestClient(simple.app) as client:
+            assert client.post("/ingest", content=line).status_code == 200
+            while not any(r["equipment_id"] == "EQ-NOKEY" for r in simple.data_storage):
+                time.sleep(0.02)
+            job = client.post("/analyze", json={"equipment_ids": ["EQ-NOKEY"]}).json()["jobs"][0]
+            while job["status"] not in (DONE, FAILED):
+                time.sleep(0.02)
+                job = client.get(f"/jobs/{job['job_id']}").json()
+            direct = client.post("/analyze/EQ-NOKEY").json()
+        stored = next(r for r in simple.data_storage if r["equipment_id"] == "EQ-NOKEY")
+    finally:
+        simple.data_storage[:] = saved
+        simple._storage_index.clear()
+        simple._storage_index.update(saved_index)
+
+    assert job["status"] == FAILED and job["result"]["error"] == "SOLAR_API_KEY not found"
+    assert direct["error"] == "SOLAR_API_KEY not found"
+    assert stored.get("analysis") is None and simple.DIAGNOSES not in published
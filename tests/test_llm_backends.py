@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.llm_backends import OpenAICompatibleBackend, SolarBackend
+from llm_stub import start_stub
+
+
+def test_backends_share_the_diagnosis_contract():
+    server, url = start_stub(model="stub-model")
+    try:
+        backends = [
+            SolarBackend(url=url, api_key="stub"),
+            OpenAICompatibleBackend("stub", "stub-model", base_url=url.rsplit("/chat/completions", 1)[0],
+                                    api_key="stub", input_cost_per_1k=1.0, output_cost_per_1k=2.0),
+        ]
+        for backend in backends:
+            analysis, usage = backend.diagnose("EQ-102", 95.1, 45.2, 90.5)
+            assert analysis["status"] == "위협"
+            assert usage["prompt_tokens"] > 0 and usage["latency_ms"] > 0
+            assert usage["cost_usd"] == backend.cost(usage["prompt_tokens"], usage["completion_tokens"])
+    finally:
+        server.shutdown()
+
+
+def test_missing_key_is_reported_not_raised(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    analysis, usage = OpenAICompatibleBackend("GPT-4", "gpt-4").diagnose("EQ-101", 65.5, 12.1, 101.2)
+    assert analysis == {"error": "OPENAI_API_KEY not found"}
+    assert usage["cost_usd"] is None
+
+
+def test_comparison_savings_follow_the_models_and_survive_a_free_solar(capsys):
+    import llm_comparison
+
+    models = {name: dict(model) for name, model in llm_comparison.MODELS.items()}
+    models[llm_comparison.SOLAR]["cost_per_diagnosis"] = 0.001
+    models["GPT-4"]["cost_per_diagnosis"] = 0.009
+    savings = llm_comparison.annual_savings_vs_gpt4(models)
+    assert round(savings, 2) == 96.0  # (0.009 - 0.001) * 12,000 calls
+    llm_comparison.print_comparison(models)
+    out = capsys.readouterr().out
+    assert "Total Annual Savings (vs GPT-4): $96.00" in out and "9x cheaper" in out
+    assert out.count("\nSolar LLM:  ") == 1  # one row per model in the annual cost table
+
+    models[llm_comparison.SOLAR]["cost_per_diagnosis"] = 0.0
+    llm_comparison.print_comparison(models)
+    assert "(📈 n/a more expensive)" in capsys.readouterr().out
+
+
+def test_evaluation_results_replace_the_token_estimate(tmp_path, monkeypatch):
+    import json
+    import llm_comparison
+
+    solar = dict(llm_comparison.MODELS[llm_comparison.SOLAR])
+    monkeypatch.setitem(llm_comparison.MODELS, llm_comparison.SOLAR, solar)
+    path = tmp_path / "evaluation_results.json"
+    path.write_text(json.dumps({"latency_ms": {"p50": 412.3, "p99": 990.0}, "accuracy": 87.5,
+                                "tokens": {"total_mean": 320.0}, "cost_per_diagnosis_usd": 0.0002}))
+    llm_comparison.load_measurements(path)
+    assert solar["response_time_ms"] == 412 and solar["accuracy_score"] == 88
+    assert llm_comparison.cost_per_call(solar) == 0.0002
+    assert abs(solar["cost_per_1k_tokens"] - 0.000625) < 1e-12
+
+    # No billed cost (e.g. a stub backend): the measured token count at list price
+    solar = dict(llm_comparison.MODELS["GPT-4"], cost_per_1k_tokens=0.00033)
+    monkeypatch.setitem(llm_comparison.MODELS, llm_comparison.SOLAR, solar)
+    path.write_text(json.dumps({"tokens": {"total_mean": 320.0}, "cost_per_diagnosis_usd": None}))
+    llm_comparison.load_measurements(path)
+    assert abs(llm_comparison.cost_per_call(solar) - 0.32 * 0.00033) < 1e-12
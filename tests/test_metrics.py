@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.metrics import ERRORS, STAGE_SECONDS, Registry, record_llm_call, timed
+
+
+def test_histogram_and_counter_exposition():
+    registry = Registry()
+    hist = registry.histogram("t_seconds", "test", ["stage"], buckets=(0.01, 0.1, 1))
+    rows = registry.counter("t_rows_total", "test", ["source"])
+    for value in (0.005, 0.05, 0.05, 5):
+        hist.observe(value, stage="predict")
+    rows.inc(3, source="upload")
+    stats = {"queue_depth_rows": 7, "rows_ingested": 40, "note": "skipped"}
+    registry.collect_stats("t_ingest", "test", lambda: stats, counters=("rows_ingested",))
+
+    text = registry.render()
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{stage="predict",le="0.01"} 1' in text
+    assert 't_seconds_bucket{stage="predict",le="0.1"} 3' in text
+    assert 't_seconds_bucket{stage="predict",le="+Inf"} 4' in text
+    assert 't_seconds_count{stage="predict"} 4' in text
+    assert 't_rows_total{source="upload"} 3' in text
+    assert '# TYPE t_ingest_queue_depth_rows gauge\nt_ingest_queue_depth_rows 7' in text and "note" not in text
+    assert '# TYPE t_ingest_rows_ingested_total counter\nt_ingest_rows_ingested_total 40' in text
+
+
+def test_app_exports_running_totals_as_counters():
+    from fastapi.testclient import TestClient
+    import backend.main_simple as simple
+
+    with TestClient(simple.app) as client:
+        text = client.get("/metrics").text
+    for name in ("askup_ingest_rows_ingested_total", "askup_diagnosis_jobs_submitted_total",
+                 "askup_llm_singleflight_coalesced_total", "askup_llm_usage_rows_written_total"):
+        assert f"# TYPE {name} counter" in text
+    assert "# TYPE askup_ingest_queue_depth_rows gauge" in text
+    assert "# TYPE askup_diagnosis_jobs_running gauge" in text
+
+
+def test_timed_counts_errors_and_llm_usage_listener():
+    before = dict(ERRORS._values)
+    with pytest.raises(ValueError):
+        with timed("csv_parse"):
+            raise ValueError("bad csv")
+    assert ERRORS._values[("csv_parse",)] == before.get(("csv_parse",), 0) + 1
+
+    record_llm_call("EQ-1", {"error": "timeout"}, {"latency_ms": 1200.0, "prompt_tokens": None})
+    assert ERRORS._values[("llm",)] >= 1
+    assert STAGE_SECONDS._series[("llm",)][-1] >= 1.2
@@ -0,0 +1,80 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.profiling import ProfilingMiddleware
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+def make_client(tmp_path, **kwargs):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, token="secret", directory=tmp_path, **kwargs)
+
+    @app.get("/slow")
+    def slow():
+        return {"iterations": busy_loop(0.1)}
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            for i in range(3):
+                yield f"data: {i}\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def test_on_demand_profile_inline_and_token_guard(tmp_path):
+    client = make_client(tmp_path)
+
+    assert client.get("/slow", headers={"X-Profile": "wrong"}).status_code == 403
+    assert "iterations" in client.get("/slow").json()
+
+    response = client.get("/slow", headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    assert response.headers["x-profiled-status"] == "200"
+    profile = response.json()
+    assert profile["name"] == "GET /slow"
+    assert "busy_loop" in {frame["name"] for frame in profile["shared"]["frames"]}
+
+    collapsed = client.get("/slow?profile=secret&profile_format=collapsed").text
+    assert "busy_loop (test_profiling.py" in collapsed
+
+
+def test_sampled_mode_writes_rolling_directory(tmp_path):
+    client = make_client(tmp_path, sample_every=2, keep=2)
+    (tmp_path / "README.md").write_text("profiles land here")
+
+    for _ in range(6):
+        response = client.get("/slow")
+        assert "iterations" in response.json()
+
+    files = sorted(p.name for p in tmp_path.iterdir() if p.name != "README.md")
+    assert len(files) == 2 and all(name.endswith("_GET_slow.speedscope.json") for name in files)
+    assert json.loads((tmp_path / files[-1]).read_text())["profiles"]
+    assert (tmp_path / "README.md").exists()  # pruning only touches profile files
+
+
+def test_event_streams_pass_through_unprofiled(tmp_path):
+    client = make_client(tmp_path)
+
+    for query in ("profile=secret", "profile=secret&profile_output=store"):
+        response = client.get(f"/events?{query}")
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["x-profile-skipped"] == "streaming"
+        assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    assert not any(tmp_path.iterdir())
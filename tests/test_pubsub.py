@@ -0,0 +1,51 @@
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.pubsub import Broker, DIAGNOSES, READINGS
+
+
+def test_publish_fans_out_by_topic():
+    async def scenario():
+        broker = Broker()
+        everything = broker.subscribe()
+        readings_only = broker.subscribe([READINGS])
+
+        broker.publish(READINGS, [{"equipment_id": "EQ-101"}])
+        broker.publish(DIAGNOSES, {"equipment_id": "EQ-101"})
+
+        assert (await everything.get(1))[0] == READINGS
+        assert (await everything.get(1))[0] == DIAGNOSES
+        topic, data = await readings_only.get(1)
+        assert topic == READINGS and json.loads(data) == [{"equipment_id": "EQ-101"}]
+        assert readings_only.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_drops_oldest_without_blocking():
+    async def scenario():
+        broker = Broker(maxsize=3)
+        sub = broker.subscribe()
+        for i in range(10):
+            broker.publish(READINGS, i)
+        assert sub.dropped == 7
+        assert [json.loads((await sub.get(1))[1]) for _ in range(3)] == [7, 8, 9]
+
+    asyncio.run(scenario())
+
+
+def test_publish_from_worker_thread():
+    async def scenario():
+        broker = Broker()
+        sub = broker.subscribe()
+        thread = threading.Thread(target=broker.publish, args=(DIAGNOSES, {"ok": True}))
+        thread.start()
+        thread.join()
+        assert (await sub.get(1))[0] == DIAGNOSES
+
+    asyncio.run(scenario())
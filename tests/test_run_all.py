@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from run_all import judge, run_stage
+
+
+def test_stage_status_comes_from_its_results():
+    assert judge({"calls": 5, "errors": 5, "verdict": "not_recommended"}) == ("failed", "all 5 LLM calls failed")
+    assert judge({"calls": 5, "errors": 2, "verdict": "not_recommended"}) == ("degraded", "2 of 5 LLM calls failed")
+    assert judge({"calls": 5, "errors": 0, "verdict": "needs_tuning"}) == ("degraded", "verdict: needs_tuning")
+    assert judge({"calls": 5, "errors": 0, "verdict": "recommended"}) == ("passed", None)
+    assert judge({"timestamp": "2024-01-01"}) == ("passed", None)
+    assert judge(None) == ("passed", None)
+
+    stage = run_stage("poc", lambda: print("diagnosing") or {"calls": 3, "errors": 3}, {})
+    assert stage["status"] == "failed" and not stage["ok"]
+    assert stage["error"] == "all 3 LLM calls failed" and stage["output"] == "diagnosing\n"
+
+    crashed = run_stage("poc", lambda: 1 / 0, {})
+    assert crashed["status"] == "failed" and "ZeroDivisionError" in crashed["error"]
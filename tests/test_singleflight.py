@@ -0,0 +1,54 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.singleflight import SingleFlight
+
+
+def _concurrently(n, fn):
+    results, errors = [], []
+
+    def target():
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def slow_diagnosis():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"status": "위협"}
+
+    results, _ = _concurrently(8, lambda: flight.do(("EQ-102", 1), slow_diagnosis))
+    assert len(calls) == 1
+    assert results == [{"status": "위협"}] * 8
+    assert flight.stats() == {"executed": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_errors_propagate_to_every_waiter_and_are_not_cached():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError("Solar unavailable")
+
+    _, errors = _concurrently(4, lambda: flight.do("k", failing))
+    assert len(errors) == 4 and all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.do("k", lambda: "ok") == "ok"
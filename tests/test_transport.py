@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.transport import (ARROW_MEDIA_TYPE, JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, compress, decode_frame,
+                               decompress, encode_frame, negotiate_encoding, negotiate_media_type)
+
+
+def make_frame():
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01 10:00", periods=4, freq="min").astype(str),
+        "equipment_id": ["EQ-101", "EQ-102", "EQ-101", "EQ-103"],
+        "temp": [65.5, 95.1, 66.0, 70.2],
+        "vibration": [12.1, 45.2, 12.3, 13.0],
+        "pressure": [101.2, 90.5, 101.0, 100.8],
+        "failure_type": [0, 1, 0, 0],
+        "analysis": [None, {"status": "위협", "diagnosis": "과열"}, None, None],
+    })
+
+
+def test_negotiation_follows_q_values_and_falls_back():
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("text/html, */*") == JSON_MEDIA_TYPE
+    assert negotiate_media_type(f"{JSON_MEDIA_TYPE};q=0.5, {ARROW_MEDIA_TYPE}") == ARROW_MEDIA_TYPE
+    assert negotiate_media_type(f"{ARROW_MEDIA_TYPE};q=0.2, {MSGPACK_MEDIA_TYPE};q=0.9") == MSGPACK_MEDIA_TYPE
+    assert negotiate_media_type(f"{ARROW_MEDIA_TYPE};q=0, {JSON_MEDIA_TYPE}") == JSON_MEDIA_TYPE
+
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("br, identity") is None
+    assert negotiate_encoding("gzip;q=0.5, zstd") == "zstd"
+    assert negotiate_encoding("zstd;q=0.1, gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=bogus") is None
+
+
+@pytest.mark.parametrize("media_type", [JSON_MEDIA_TYPE, ARROW_MEDIA_TYPE, MSGPACK_MEDIA_TYPE])
+@pytest.mark.parametrize("encoding", [None, "gzip", "zstd"])
+def test_every_format_and_encoding_round_trips(media_type, encoding):
+    df = make_frame()
+    body = compress(encode_frame(df, media_type), encoding)
+    decoded = decode_frame(decompress(body, encoding), media_type)
+
+    assert list(decoded.columns) == list(df.columns)
+    assert decoded["equipment_id"].astype(str).tolist() == df["equipment_id"].tolist()
+    assert pd.to_datetime(decoded["timestamp"]).tolist() == pd.to_datetime(df["timestamp"]).tolist()
+    for name in ("temp", "vibration", "pressure", "failure_type"):
+        assert decoded[name].tolist() == df[name].tolist()
+    assert decoded["analysis"].isna().sum() == 3
+    assert "과열" in str(decoded["analysis"].iloc[1])
+
+
+def test_binary_formats_are_smaller_once_compressed():
+    df = pd.concat([make_frame()] * 500, ignore_index=True)
+    json_body = encode_frame(df, JSON_MEDIA_TYPE)
+    for media_type in (ARROW_MEDIA_TYPE, MSGPACK_MEDIA_TYPE):
+        assert len(encode_frame(df, media_type)) < len(json_body)
+    for encoding in ("gzip", "zstd"):
+        assert len(compress(json_body, encoding)) < len(json_body) / 5
+
+
+def test_dashboard_data_negotiates_format_and_encoding():
+    from fastapi.testclient import TestClient
+    import backend.main_simple as simple
+
+    records = make_frame().drop(columns="analysis").to_dict("records")
+    saved = list(simple.data_storage)
+    simple.data_storage[:] = records
+    try:
+        with TestClient(simple.app) as client:
+            plain = client.get("/dashboard_data", headers={"Accept-Encoding": "identity"})
+            arrow = client.get("/dashboard_data", headers={"Accept": ARROW_MEDIA_TYPE, "Accept-Encoding": "zstd"})
+    finally:
+        simple.data_storage[:] = saved
+
+    assert plain.headers["content-type"].startswith(JSON_MEDIA_TYPE)
+    assert len(plain.json()["data"]) == 4
+    assert arrow.headers["content-type"] == ARROW_MEDIA_TYPE
+    assert arrow.headers["content-encoding"] == "zstd"
+    assert arrow.headers["vary"].startswith("Accept, Accept-Encoding")  # CORS appends Origin
+    # TestClient hands back the body as sent on the wire, like the dashboard's raw read
+    assert decode_frame(decompress(arrow.content, "zstd"), ARROW_MEDIA_TYPE)["temp"].tolist() == [65.5, 95.1, 66.0, 70.2]
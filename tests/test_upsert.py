@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import create_engine, select
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend import models
+from backend.upsert import upsert_readings
+
+
+def readings(temps, start="2024-01-01 10:00"):
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=len(temps), freq="10min"),
+        "equipment_id": "EQ-101",
+        "temp": temps,
+        "vibration": 12.0,
+        "pressure": 101.0,
+        "failure_type": 0,
+        "anomaly_score": 0.1,
+        "drift_score": None,
+    })
+
+
+def test_upsert_inserts_updates_and_skips():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        counts, changed = upsert_readings(conn, readings([60.0, 61.0, 62.0]))
+    assert counts == {"inserted": 3, "updated": 0, "skipped": 0} and changed.all()
+
+    # Same file again, with other detector scores: nothing to write
+    again = readings([60.0, 61.0, 62.0]).assign(anomaly_score=0.9)
+    with engine.begin() as conn:
+        counts, changed = upsert_readings(conn, again)
+    assert counts == {"inserted": 0, "updated": 0, "skipped": 3} and not changed.any()
+
+    # Overlapping log: one corrected reading, one new, one duplicated inside the batch
+    overlap = pd.concat([readings([61.0, 65.0], start="2024-01-01 10:10"),
+                         readings([70.0, 70.0], start="2024-01-01 10:30").iloc[[0, 0]]], ignore_index=True)
+    with engine.begin() as conn:
+        counts, changed = upsert_readings(conn, overlap)
+        rows = conn.execute(select(models.VocLog.id, models.VocLog.temp).order_by(models.VocLog.timestamp)).all()
+    assert counts == {"inserted": 1, "updated": 1, "skipped": 2}
+    assert changed.tolist() == [False, True, False, True]
+    assert [temp for _, temp in rows] == [60.0, 61.0, 65.0, 70.0]
+    assert rows[2][0] == 3, "updated readings keep their id"
+
+
+def test_predicted_labels_never_replace_stored_ones():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        upsert_readings(conn, readings([95.0, 60.0]).assign(failure_type=[1, 0]))
+
+    # Same readings without labels: the model disagrees, the stored labels stay
+    predicted = readings([95.0, 60.0, 61.0]).assign(failure_type=[0, 1, 1], label_predicted=True)
+    with engine.begin() as conn:
+        counts, changed = upsert_readings(conn, predicted)
+        labels = conn.execute(select(models.VocLog.failure_type).order_by(models.VocLog.timestamp)).scalars().all()
+    assert counts == {"inserted": 1, "updated": 0, "skipped": 2}
+    assert changed.tolist() == [False, False, True]
+    assert labels == [1, 0, 1]
+
+
+def test_score_hook_sees_only_new_or_changed_readings_in_time_order():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    scored = []
+
+    def score(df):
+        scored.append(df["timestamp"].dt.strftime("%H:%M").tolist())
+        return pd.DataFrame({"anomaly_score": df["temp"] / 10, "drift_score": 0.0}, index=df.index)
+
+    first = readings([60.0, 61.0]).drop(columns=["anomaly_score", "drift_score"])
+    with engine.begin() as conn:
+        upsert_readings(conn, first, score=score)
+    assert first["anomaly_score"].tolist() == [6.0, 6.1]
+
+    # Re-upload, out of order, with one corrected reading and one new one
+    again = readings([60.0, 61.5, 62.0]).iloc[::-1].drop(columns=["anomaly_score", "drift_score"])
+    with engine.begin() as conn:
+        counts, _ = upsert_readings(conn, again, score=score)
+        stored = conn.execute(select(models.VocLog.temp, models.VocLog.anomaly_score)
+                              .order_by(models.VocLog.timestamp)).all()
+    assert scored == [["10:00", "10:10"], ["10:10", "10:20"]]
+    assert counts == {"inserted": 1, "updated": 1, "skipped": 1}
+    assert stored == [(60.0, 6.0), (61.5, 6.15), (62.0, 6.2)]
@@ -0,0 +1,73 @@
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.usage import UsageRecorder, aggregate_usage, filter_usage, usage_row
+
+
+def call(tokens=(180, 40), cost=5e-5, latency=800.0):
+    return {"model": "solar-1-mini-chat", "prompt_tokens": tokens[0], "completion_tokens": tokens[1],
+            "total_tokens": None if None in tokens else sum(tokens), "latency_ms": latency, "cost_usd": cost}
+
+
+def test_recorder_flushes_in_bulk_and_keeps_rows_when_a_write_fails():
+    batches, fail = [], [True]
+
+    def write(rows):
+        if fail[0]:
+            raise RuntimeError("db down")
+        batches.append(rows)
+
+    async def scenario():
+        recorder = UsageRecorder(write, flush_rows=3, flush_interval_s=60)
+        recorder.start()
+        for _ in range(3):
+            recorder.record("EQ-101", {"status": "정상"}, call())
+        await asyncio.sleep(0.05)  # flush_rows reached: the flusher wakes, the write fails
+        assert recorder.stats()["write_errors"] == 1 and recorder.stats()["pending_rows"] == 3
+
+        fail[0] = False
+        recorder.record("EQ-102", {"error": "timeout"}, call(tokens=(None, None), cost=None))
+        await recorder.stop()
+        return recorder.stats()
+
+    stats = asyncio.run(scenario())
+    assert [len(b) for b in batches] == [4]
+    assert stats["rows_written"] == 4 and stats["pending_rows"] == 0
+    assert batches[0][-1]["error"] and batches[0][-1]["prompt_tokens"] is None
+
+
+def test_aggregate_usage_by_day_and_equipment():
+    rows = [usage_row("EQ-101", {}, call()), usage_row("EQ-101", {}, call(latency=1200.0)),
+            usage_row("EQ-102", {"error": "x"}, call(tokens=(None, None), cost=None, latency=30000.0))]
+    rows[0]["created_at"] = datetime(2024, 1, 1, 23, 59)
+
+    summary = aggregate_usage(rows, ["day", "equipment_id"])
+    assert [(g["day"], g["equipment_id"], g["calls"]) for g in summary["groups"]] == [
+        ("2024-01-01", "EQ-101", 1), (rows[1]["created_at"].strftime("%Y-%m-%d"), "EQ-101", 1),
+        (rows[2]["created_at"].strftime("%Y-%m-%d"), "EQ-102", 1)]
+    totals = summary["totals"]
+    assert totals["calls"] == 3 and totals["errors"] == 1
+    assert totals["prompt_tokens"] == 360 and totals["cost_usd"] == 1e-4
+    assert totals["latency_ms_max"] == 30000.0
+
+    assert aggregate_usage(filter_usage(rows, equipment_ids=["EQ-102"]), ["model"])["totals"]["calls"] == 1
+    empty = aggregate_usage([], ["day"])
+    assert empty["groups"] == [] and empty["totals"]["calls"] == 0 and empty["totals"]["latency_ms_mean"] == 0
+
+
+def test_missing_api_key_is_still_recorded(monkeypatch):
+    from backend import solar_client
+
+    monkeypatch.delenv("SOLAR_API_KEY", raising=False)
+    recorder = UsageRecorder(lambda rows: None)
+    monkeypatch.setattr(solar_client, "_usage_listeners", [recorder.record])
+
+    analysis, usage = solar_client.diagnose("EQ-101", 65.5, 12.1, 101.2)
+    assert analysis["error"] == "SOLAR_API_KEY not found"
+    assert usage["total_tokens"] == 0 and usage["cost_usd"] == 0.0
+    row = recorder._pending[0]
+    assert row["error"] and row["equipment_id"] == "EQ-101" and row["prompt_tokens"] == 0